@@ -0,0 +1,357 @@
+"""
+Full-text search over anniversary events
+
+An inverted index from tokens to the events of `anniversary_list_to_df`
+that can be saved to disk and memory-mapped back in.
+"""
+from __future__ import annotations
+
+import json
+import math
+import re
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from string_table import StringTable
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Tokens are runs of word characters, compared in lower case
+token_pat = re.compile(r"\w+")
+
+# Query syntax: quoted phrases, the OR operator, and negated terms
+query_pat = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+# BM25 parameters
+k1 = 1.2
+b = 0.75
+
+# Array files making up a saved index
+array_names = [
+    "term_blob",
+    "term_offsets",
+    "term_ptr",
+    "post_docs",
+    "post_tf",
+    "pos_ptr",
+    "positions",
+    "doc_len",
+    "date_blob",
+    "date_offsets",
+    "event_blob",
+    "event_offsets",
+]
+
+
+def tokenize(text: str) -> list[str]:
+    """Split a text into lower case word tokens
+
+    Arguments:
+        text (str): the text to tokenize
+    Returns:
+        tokens (list[str]): the tokens, in order of appearance
+    """
+    return token_pat.findall(text.lower())
+
+
+class AnniversaryIndex:
+    """Inverted index over the "Event" column of an anniversary dataframe
+
+    Each event row is a document. For every token the index stores the sorted ids of the
+    documents containing it, the term frequency and the token positions, all as flat
+    numpy arrays (CSR layout), so lookups are a binary search in the vocabulary followed
+    by slicing the postings.
+    """
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.terms = StringTable(arrays["term_blob"], arrays["term_offsets"])
+        self.dates = StringTable(arrays["date_blob"], arrays["date_offsets"])
+        self.events = StringTable(arrays["event_blob"], arrays["event_offsets"])
+        self.doc_len = arrays["doc_len"]
+        self.n_docs = len(self.doc_len)
+        self.avg_len = float(self.doc_len.mean()) if self.n_docs else 0.0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> AnniversaryIndex:
+        """Build the index from a dataframe with columns "Date" and "Event"
+
+        Parameters:
+            df (pd.DataFrame): anniversaries, as returned by `anniversary_list_to_df`
+        Returns:
+            index (AnniversaryIndex): the index, with one document per row of `df`
+        """
+        dates = [str(d) for d in df["Date"]]
+        events = [str(e) for e in df["Event"]]
+
+        # Collect the positions of every token in every document
+        postings: dict[str, list[tuple[int, list[int]]]] = {}
+        doc_len = np.zeros(len(events), dtype=np.int32)
+        for doc_id, event in enumerate(events):
+            tokens = tokenize(event)
+            doc_len[doc_id] = len(tokens)
+            doc_positions: dict[str, list[int]] = {}
+            for pos, token in enumerate(tokens):
+                doc_positions.setdefault(token, []).append(pos)
+            for token, pos_list in doc_positions.items():
+                postings.setdefault(token, []).append((doc_id, pos_list))
+
+        # Flatten into CSR arrays, with the vocabulary sorted for binary search
+        vocabulary = sorted(postings)
+        term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        post_docs, post_tf, pos_lengths, positions = [], [], [], []
+        for i, term in enumerate(vocabulary):
+            for doc_id, pos_list in postings[term]:
+                post_docs.append(doc_id)
+                post_tf.append(len(pos_list))
+                pos_lengths.append(len(pos_list))
+                positions.extend(pos_list)
+            term_ptr[i + 1] = len(post_docs)
+
+        pos_ptr = np.zeros(len(pos_lengths) + 1, dtype=np.int64)
+        pos_ptr[1:] = np.cumsum(pos_lengths, dtype=np.int64)
+
+        terms = StringTable.from_strings(vocabulary)
+        date_table = StringTable.from_strings(dates)
+        event_table = StringTable.from_strings(events)
+        arrays = {
+            "term_blob": terms.blob,
+            "term_offsets": terms.offsets,
+            "term_ptr": term_ptr,
+            "post_docs": np.array(post_docs, dtype=np.int32),
+            "post_tf": np.array(post_tf, dtype=np.int32),
+            "pos_ptr": pos_ptr,
+            "positions": np.array(positions, dtype=np.int32),
+            "doc_len": doc_len,
+            "date_blob": date_table.blob,
+            "date_offsets": date_table.offsets,
+            "event_blob": event_table.blob,
+            "event_offsets": event_table.offsets,
+        }
+        return cls(arrays)
+
+    def save(self, directory: str | Path) -> None:
+        """Write the index to `directory`, one .npy file per array
+
+        Parameters:
+            directory (str | Path): directory to save to, created if missing
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in array_names:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(self.arrays[name]))
+        with open(directory / "meta.json", "w") as f:
+            json.dump({"documents": self.n_docs, "terms": len(self.terms)}, f)
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> AnniversaryIndex:
+        """Load an index written by `save`
+
+        Parameters:
+            directory (str | Path): directory the index was saved to
+            mmap (bool): memory-map the arrays instead of reading them into memory
+        Returns:
+            index (AnniversaryIndex): the loaded index
+        """
+        directory = Path(directory)
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in array_names
+        }
+        return cls(arrays)
+
+    def term_id(self, term: str) -> int | None:
+        """Return the id of `term` in the vocabulary, or None if it is not indexed"""
+        i = bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return None
+
+    def _postings(self, term: str) -> slice:
+        """Return the slice of the postings arrays belonging to `term`"""
+        i = self.term_id(term)
+        if i is None:
+            return slice(0, 0)
+        return slice(int(self.arrays["term_ptr"][i]), int(self.arrays["term_ptr"][i + 1]))
+
+    def documents(self, term: str) -> np.ndarray:
+        """Return the sorted ids of all documents containing `term`"""
+        return np.asarray(self.arrays["post_docs"][self._postings(term)])
+
+    def _positions(self, term: str) -> dict[int, np.ndarray]:
+        """Return a mapping from document id to the positions of `term` in it"""
+        span = self._postings(term)
+        pos_ptr = self.arrays["pos_ptr"]
+        positions = self.arrays["positions"]
+        return {
+            int(doc_id): np.asarray(positions[pos_ptr[p] : pos_ptr[p + 1]])
+            for p, doc_id in zip(range(span.start, span.stop), self.arrays["post_docs"][span])
+        }
+
+    def phrase_documents(self, phrase: str) -> np.ndarray:
+        """Return the sorted ids of all documents containing the tokens of `phrase` in order"""
+        tokens = tokenize(phrase)
+        if not tokens:
+            return np.array([], dtype=np.int32)
+        # Only documents containing every token can contain the phrase
+        candidates = self.documents(tokens[0])
+        for token in tokens[1:]:
+            candidates = np.intersect1d(candidates, self.documents(token), assume_unique=True)
+        if len(tokens) == 1 or len(candidates) == 0:
+            return candidates
+
+        token_positions = [self._positions(token) for token in tokens]
+        matches = []
+        for doc_id in candidates:
+            # The phrase starts at p if token i is found at p + i for every i
+            starts = token_positions[0][int(doc_id)]
+            for i, positions in enumerate(token_positions[1:], start=1):
+                starts = np.intersect1d(starts, positions[int(doc_id)] - i)
+            if len(starts):
+                matches.append(doc_id)
+        return np.array(matches, dtype=np.int32)
+
+    def _parse_query(self, query: str) -> tuple[list[list[tuple[str, str]]], list[tuple[str, str]]]:
+        """Split a query into AND-ed groups of OR-ed clauses, and negated clauses
+
+        A clause is a ("term", token) or ("phrase", text) tuple.
+        """
+        groups: list[list[tuple[str, str]]] = []
+        excluded: list[tuple[str, str]] = []
+        join_next = False
+        negate_next = False
+        for match in query_pat.finditer(query):
+            negated, phrase, word = match.groups()
+            if word == "OR":
+                join_next = bool(groups)
+                continue
+            if word in ("AND", "NOT"):
+                negate_next = word == "NOT"
+                continue
+
+            if phrase is not None:
+                clause = ("phrase", phrase)
+                negated = bool(negated) or negate_next
+            else:
+                negated = word.startswith("-") or negate_next
+                tokens = tokenize(word)
+                if not tokens:
+                    continue
+                # Punctuated words like "U.S." are searched for as phrases
+                clause = ("term", tokens[0]) if len(tokens) == 1 else ("phrase", " ".join(tokens))
+            negate_next = False
+
+            if negated:
+                excluded.append(clause)
+            elif join_next:
+                groups[-1].append(clause)
+            else:
+                groups.append([clause])
+            join_next = False
+        return groups, excluded
+
+    def _match(self, clause: tuple[str, str]) -> np.ndarray:
+        kind, text = clause
+        if kind == "phrase":
+            return self.phrase_documents(text)
+        return self.documents(text)
+
+    def _bm25(self, doc_ids: np.ndarray, terms: list[str]) -> np.ndarray:
+        """Score the documents `doc_ids` against `terms` with BM25"""
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        doc_len = np.asarray(self.doc_len[doc_ids], dtype=np.float64)
+        norm = k1 * (1 - b + b * doc_len / max(self.avg_len, 1.0))
+        for term in set(terms):
+            span = self._postings(term)
+            docs = np.asarray(self.arrays["post_docs"][span])
+            if len(docs) == 0:
+                continue
+            idf = math.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            tf = np.zeros(len(doc_ids), dtype=np.float64)
+            # Postings are sorted by document id, so matching documents are found by binary search
+            where = np.searchsorted(docs, doc_ids)
+            where = np.minimum(where, len(docs) - 1)
+            found = docs[where] == doc_ids
+            tf[found] = np.asarray(self.arrays["post_tf"][span])[where[found]]
+            scores += idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query: str, k: int | None = 10) -> pd.DataFrame:
+        """Find the events matching `query`, best matches first
+
+        Words are required by default (AND). Words joined by `OR` match either one,
+        "quoted text" must appear as a phrase, and words prefixed by `-` or `NOT` are excluded.
+
+        Parameters:
+            query (str): the search query, e.g. 'day "United States" -feast'
+            k (int, optional): maximum number of results, or None for all
+        Returns:
+            results (pd.DataFrame): matching rows with columns ["Date", "Event", "Score"]
+        """
+        import pandas as pd
+
+        groups, excluded = self._parse_query(query)
+        if groups:
+            doc_ids = None
+            for group in groups:
+                matched = self._match(group[0])
+                for clause in group[1:]:
+                    matched = np.union1d(matched, self._match(clause))
+                doc_ids = matched if doc_ids is None else np.intersect1d(doc_ids, matched)
+        else:
+            doc_ids = np.array([], dtype=np.int32)
+        for clause in excluded:
+            doc_ids = np.setdiff1d(doc_ids, self._match(clause))
+
+        terms = [
+            token for group in groups for _, text in group for token in tokenize(text)
+        ]
+        scores = self._bm25(doc_ids, terms)
+        # Stable sort keeps the original (date) order among equal scores
+        order = np.argsort(-scores, kind="stable")
+        if k is not None:
+            order = order[:k]
+
+        return pd.DataFrame(
+            {
+                "Date": [self.dates[int(doc_ids[i])] for i in order],
+                "Event": [self.events[int(doc_ids[i])] for i in order],
+                "Score": scores[order],
+            }
+        )
+
+
+def read_anniversary_tables(tables_dir: str | Path) -> pd.DataFrame:
+    """Read the markdown tables written by `anniversary_table` back into one dataframe
+
+    Parameters:
+        tables_dir (str | Path): the "tables_of_anniversaries" directory
+    Returns:
+        df (pd.DataFrame): all events of all months, with columns ["Date", "Event"]
+    """
+    import pandas as pd
+
+    rows = []
+    for path in sorted(Path(tables_dir).glob("anniversaries_*.md")):
+        with open(path, encoding="utf-8") as f:
+            # Skip the header and the alignment row
+            lines = f.read().splitlines()[2:]
+        for line in lines:
+            cells = [cell.strip() for cell in line.strip().strip("|").split("|", 1)]
+            if len(cells) == 2:
+                rows.append((cells[0], cells[1]))
+    return pd.DataFrame(rows, columns=["Date", "Event"])
+
+
+if __name__ == "__main__":
+    # build the index from the saved tables and run a query against it
+    here = Path(__file__).parent
+    index = AnniversaryIndex.from_frame(read_anniversary_tables(here / "tables_of_anniversaries"))
+    index.save(here / "anniversary_index")
+    index = AnniversaryIndex.load(here / "anniversary_index")
+    print(index.search('day "United States"').to_markdown(index=False))
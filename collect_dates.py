@@ -8,6 +8,8 @@ from __future__ import annotations
 
 import re
 
+from instrumentation import timed
+
 # create array with all names of months
 month_names = [
     "January",
@@ -77,6 +79,7 @@ def zero_pad(n: str):
     ...
 
 
+@timed("parse", "find_dates")
 def find_dates(text: str, output: str | None = None) -> list:
     """Finds all dates in a text using reg ex
 
@@ -0,0 +1,271 @@
+"""
+A polite crawler for wiki articles
+
+Pages are fetched with `get_html` by a pool of threads, in order of priority (by default
+breadth first), within a depth and a page budget, never more than `per_host` pages at a time
+nor more often than every `delay` seconds per host. The links of each page are found with
+`filter_urls.find_articles`, every page is only fetched once, and each page is handed to
+pluggable extractors such as `find_dates`, `extract_anniversaries` or `find_img_src`,
+optionally as a `Document` so the extractors share its parses.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from collections import Counter, namedtuple
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from document import Document
+from filter_urls import find_articles
+from requesting_urls import get_html
+
+# A crawled page: its URL, depth from the seeds, the result of each extractor,
+# and the error if the page could not be fetched or an extractor failed
+CrawlResult = namedtuple("CrawlResult", ["url", "depth", "data", "error"])
+
+# Live counters of a crawl
+CrawlMetrics = namedtuple(
+    "CrawlMetrics",
+    ["pages", "errors", "bytes", "backlog", "in_flight", "elapsed", "pages_per_second"],
+)
+
+# Shortest wait for a finished page, so the scheduling loop never spins
+min_wait = 0.001
+
+
+def article_links(html: str | Document, url: str) -> Iterable[str]:
+    """Default link finder of the crawler: the wiki articles the page links to"""
+    return find_articles(html, base_url=url)
+
+
+class Crawler:
+    """Crawl the pages reachable from `seeds`
+
+    Arguments:
+        seeds (Iterable[str]): the URLs to start from, at depth 0
+        extractors (dict[str, Callable[[str], object]], optional): name -> function taking the
+            html of a page, e.g. `{"dates": find_dates, "images": find_img_src}`. Use
+            functools.partial for extractors taking more arguments.
+        max_depth (int): number of links followed from the seeds
+        max_pages (int): number of pages fetched
+        max_workers (int): number of pages fetched at the same time
+        per_host (int): number of pages fetched at the same time from one host
+        delay (float): number of seconds between the requests to one host
+        priority (Callable[[str, int], float], optional): priority of a URL found at a depth,
+            lowest first, by default the depth (breadth first)
+        links (Callable[[str, str], Iterable[str]]): function taking the html and URL of a page,
+            returning the URLs to crawl from it, by default `article_links`
+        same_host (bool): only follow links to the hosts of the seeds
+        on_metrics (Callable[[CrawlMetrics], None], optional): called with the metrics
+            every `report_every` seconds, and at the end of the crawl
+        report_every (float): number of seconds between the calls to `on_metrics`
+        documents (bool): fetch the pages as bytes, and hand the extractors and `links` a
+            Document of each page instead of its html, so a page is scanned and parsed
+            once however many extractors use it
+    """
+
+    def __init__(
+        self,
+        seeds: Iterable[str],
+        extractors: dict[str, Callable[[str], object]] | None = None,
+        max_depth: int = 2,
+        max_pages: int = 100,
+        max_workers: int = 8,
+        per_host: int = 2,
+        delay: float = 0.1,
+        priority: Callable[[str, int], float] | None = None,
+        links: Callable[[str, str], Iterable[str]] = article_links,
+        same_host: bool = True,
+        on_metrics: Callable[[CrawlMetrics], None] | None = None,
+        report_every: float = 5.0,
+        documents: bool = False,
+    ):
+        if max_workers < 1 or per_host < 1:
+            raise ValueError("max_workers and per_host must be at least 1")
+        self.extractors = extractors or {}
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.delay = delay
+        self.priority = priority or (lambda url, depth: depth)
+        self.links = links
+        self.on_metrics = on_metrics
+        self.report_every = report_every
+        self.documents = documents
+
+        # One frontier per host, of (priority, order found, url, depth), with only the hosts
+        # having queued URLs, and every URL ever queued
+        self.frontiers: dict[str, list[tuple[float, int, str, int]]] = {}
+        self.seen: set[str] = set()
+        self.order = itertools.count()
+        seeds = list(seeds)
+        self.hosts = {urlparse(url).netloc for url in seeds} if same_host else None
+        for url in seeds:
+            self.add(url, 0)
+
+        # Politeness bookkeeping: pages in flight and time of the next allowed request per host
+        self.busy: Counter[str] = Counter()
+        self.next_request: dict[str, float] = {}
+        self.in_flight = 0
+        self.started = 0
+        self.pages = 0
+        self.errors = 0
+        self.bytes = 0
+        self.start_time = time.monotonic()
+
+    def add(self, url: str, depth: int) -> bool:
+        """Queue `url` found at `depth`, unless it was already queued or is out of bounds
+
+        Returns:
+            added (bool): whether the URL was queued
+        """
+        url = url.partition("#")[0]
+        if url in self.seen or depth > self.max_depth:
+            return False
+        host = urlparse(url).netloc
+        if self.hosts is not None and host not in self.hosts:
+            return False
+        self.seen.add(url)
+        frontier = self.frontiers.setdefault(host, [])
+        heapq.heappush(frontier, (self.priority(url, depth), next(self.order), url, depth))
+        return True
+
+    @property
+    def metrics(self) -> CrawlMetrics:
+        """The counters of the crawl so far"""
+        elapsed = time.monotonic() - self.start_time
+        return CrawlMetrics(
+            pages=self.pages,
+            errors=self.errors,
+            bytes=self.bytes,
+            backlog=sum(len(frontier) for frontier in self.frontiers.values()),
+            in_flight=self.in_flight,
+            elapsed=elapsed,
+            pages_per_second=self.pages / elapsed if elapsed > 0 else 0.0,
+        )
+
+    def _next_ready(self, now: float) -> tuple[str, str, int] | None:
+        """Pop the best queued URL whose host can take a request now
+
+        Only the head of each host's frontier is compared, so a pick costs one step per host
+        with queued URLs plus one heap pop, however many URLs are queued.
+
+        Returns:
+            (host, url, depth) (tuple[str, str, int] | None): the URL to fetch, if any
+        """
+        best = None
+        for host, frontier in self.frontiers.items():
+            if self.busy[host] >= self.per_host or self.next_request.get(host, 0) > now:
+                continue
+            if best is None or frontier[0] < self.frontiers[best][0]:
+                best = host
+        if best is None:
+            return None
+        frontier = self.frontiers[best]
+        _, _, url, depth = heapq.heappop(frontier)
+        if not frontier:
+            del self.frontiers[best]
+        return best, url, depth
+
+    def _next_time(self) -> float | None:
+        """Time at which a host of a queued URL can take a request again, if none is busy"""
+        times = [self.next_request.get(host, 0) for host in self.frontiers if self.busy[host] < self.per_host]
+        return min(times) if times else None
+
+    def _fetch(self, url: str, depth: int) -> tuple[CrawlResult, list[str], int]:
+        """Fetch a page and run the extractors on it, in a worker thread"""
+        try:
+            html = get_html(url, raw=self.documents)
+        except Exception as e:
+            return CrawlResult(url, depth, {}, str(e)), [], 0
+        page = Document(html, url) if self.documents else html
+        data = {}
+        error = None
+        for name, extract in self.extractors.items():
+            try:
+                data[name] = extract(page)
+            except Exception as e:
+                error = f"{name}: {e}"
+        links = list(self.links(page, url)) if depth < self.max_depth else []
+        return CrawlResult(url, depth, data, error), links, len(html)
+
+    def crawl(self) -> Iterator[CrawlResult]:
+        """Crawl, yielding each page as soon as it is done
+
+        Yields:
+            result (CrawlResult): each crawled page
+        """
+        self.start_time = time.monotonic()
+        last_report = self.start_time
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            try:
+                while True:
+                    # Start as many requests as the budgets and the politeness allow
+                    now = time.monotonic()
+                    while self.in_flight < self.max_workers and self.started < self.max_pages:
+                        item = self._next_ready(now)
+                        if item is None:
+                            break
+                        host, url, depth = item
+                        self.busy[host] += 1
+                        self.next_request[host] = now + self.delay
+                        self.in_flight += 1
+                        self.started += 1
+                        running[executor.submit(self._fetch, url, depth)] = host
+
+                    if not running:
+                        next_time = self._next_time()
+                        if next_time is None or self.started >= self.max_pages:
+                            break
+                        # Every queued host was asked recently, wait for the first one
+                        time.sleep(max(0.0, next_time - time.monotonic()))
+                        continue
+
+                    # Wake up for the next finished page, the next report, or the next allowed
+                    # request if one could be started then
+                    timeouts = []
+                    if self.on_metrics is not None:
+                        timeouts.append(self.report_every - (now - last_report))
+                    if self.in_flight < self.max_workers and self.started < self.max_pages:
+                        next_time = self._next_time()
+                        if next_time is not None:
+                            timeouts.append(next_time - now)
+                    timeout = max(min_wait, min(timeouts)) if timeouts else None
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                    for future in done:
+                        host = running.pop(future)
+                        self.busy[host] -= 1
+                        self.in_flight -= 1
+                        result, links, size = future.result()
+                        self.pages += 1
+                        self.bytes += size
+                        if result.error is not None:
+                            self.errors += 1
+                        for link in links:
+                            self.add(link, result.depth + 1)
+                        yield result
+
+                    if self.on_metrics is not None and time.monotonic() - last_report >= self.report_every:
+                        self.on_metrics(self.metrics)
+                        last_report = time.monotonic()
+            finally:
+                # Don't start the queued requests if the caller stops early
+                for future in running:
+                    future.cancel()
+        if self.on_metrics is not None:
+            self.on_metrics(self.metrics)
+
+
+def crawl(seeds: Iterable[str], **kwargs) -> Iterator[CrawlResult]:
+    """Crawl the pages reachable from `seeds`, see Crawler for the arguments
+
+    Yields:
+        result (CrawlResult): each crawled page
+    """
+    return Crawler(seeds, **kwargs).crawl()
@@ -0,0 +1,313 @@
+"""
+Wiki races shared by several worker processes
+
+The frontier and the visited articles of a level by level search live in an SQLite
+database in write-ahead-log mode. Worker processes claim articles of the current level,
+fetch and scan them, and add the articles they link to at the next level. A coordinator
+moves the search to the next level once every article of the current one is done, so
+the first path found is still a shortest one, and hands the articles of crashed workers
+to others once their lease runs out.
+
+Workers can also be started by hand, e.g. `python distributed_race.py worker race.sqlite`,
+from any process able to open the database (SQLite needs a local file system).
+"""
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from filter_urls import article_title, article_url
+from sqlite_connections import connect
+
+if TYPE_CHECKING:
+    from link_cache import LinkCache
+
+schema = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    parent INTEGER,
+    depth INTEGER NOT NULL,
+    -- 0: waiting, 1: claimed by a worker, 2: done
+    state INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS nodes_depth_state ON nodes (depth, state);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# States of the articles
+waiting, claimed, done = 0, 1, 2
+
+
+class SharedFrontier:
+    """The frontier and visited articles of a search, in an SQLite database shared by processes
+
+    Arguments:
+        path (str | Path): the database file
+        timeout (float): number of seconds to wait for another process writing to the database
+    """
+
+    def __init__(self, path: str | Path, timeout: float = 30):
+        self.path = Path(path)
+        # Transactions are started explicitly, with BEGIN IMMEDIATE to take the write lock at once
+        self.db = connect(self.path, timeout, isolation_level=None)
+        self.db.executescript(schema)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        return self.db
+
+    def get(self, key: str) -> str | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: object) -> None:
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def start(self, start: str, finish: str) -> None:
+        """Set up a new search from `start` to `finish`, removing any previous one"""
+        db = self._transaction()
+        try:
+            db.execute("DELETE FROM nodes")
+            db.execute("DELETE FROM meta")
+            db.execute(
+                "INSERT INTO nodes (id, title, parent, depth) VALUES (0, ?, NULL, 0)",
+                (article_title(start),),
+            )
+            self.set("start", start)
+            self.set("finish", finish)
+            self.set("level", 0)
+            self.set("status", "running")
+            if article_title(start) == article_title(finish):
+                self.set("found", 0)
+                self.set("status", "finished")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @property
+    def finished(self) -> bool:
+        return self.get("status") != "running"
+
+    def claim(self) -> tuple[int, str, int] | None:
+        """Claim an article of the current level for this worker
+
+        Returns:
+            (node, url, depth) (tuple[int, str, int] | None): the article id, its URL and depth,
+                or None if every article of the level is claimed
+        """
+        db = self._transaction()
+        try:
+            level = int(self.get("level"))
+            row = db.execute(
+                "SELECT id, title FROM nodes WHERE depth = ? AND state = ? LIMIT 1",
+                (level, waiting),
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE nodes SET state = ?, claimed_at = ? WHERE id = ?",
+                    (claimed, time.time(), row[0]),
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        node, title = row
+        start = self.get("start")
+        if node == 0:
+            return node, start, level
+        base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+        return node, article_url(title, base_url), level
+
+    def complete(self, node: int, depth: int, links: list[str]) -> None:
+        """Record the links of a claimed article, adding the new ones to the next level"""
+        titles = [article_title(url) for url in links]
+        target = article_title(self.get("finish"))
+        db = self._transaction()
+        try:
+            # Another worker may have been given the article after the lease ran out
+            state = db.execute("SELECT state FROM nodes WHERE id = ?", (node,)).fetchone()[0]
+            if state != done:
+                db.executemany(
+                    "INSERT OR IGNORE INTO nodes (title, parent, depth) VALUES (?, ?, ?)",
+                    [(title, node, depth + 1) for title in titles],
+                )
+                db.execute("UPDATE nodes SET state = ? WHERE id = ?", (done, node))
+                # The levels are expanded in order, so the first time finish is found is the closest
+                if target in titles and self.get("found") is None:
+                    (found,) = db.execute("SELECT id FROM nodes WHERE title = ?", (target,)).fetchone()
+                    self.set("found", found)
+                    self.set("status", "finished")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def advance(self, lease: float) -> bool:
+        """Coordinate the search: hand back expired claims, and go to the next level when
+        the current one is done
+
+        Arguments:
+            lease (float): number of seconds a worker has to complete an article it claimed
+        Returns:
+            running (bool): whether the search goes on
+        """
+        db = self._transaction()
+        try:
+            if self.finished:
+                db.execute("COMMIT")
+                return False
+            level = int(self.get("level"))
+            db.execute(
+                "UPDATE nodes SET state = ? WHERE state = ? AND claimed_at < ?",
+                (waiting, claimed, time.time() - lease),
+            )
+            (left,) = db.execute(
+                "SELECT COUNT(*) FROM nodes WHERE depth = ? AND state != ?", (level, done)
+            ).fetchone()
+            if left == 0:
+                (next_level,) = db.execute(
+                    "SELECT COUNT(*) FROM nodes WHERE depth = ?", (level + 1,)
+                ).fetchone()
+                if next_level:
+                    self.set("level", level + 1)
+                else:
+                    # Every reachable article was visited without finding finish
+                    self.set("status", "finished")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return not self.finished
+
+    def found_path(self) -> list[str]:
+        """Return the path found, see find_path, or an empty list if there is none"""
+        found = self.get("found")
+        if found is None:
+            return []
+        start, finish = self.get("start"), self.get("finish")
+        base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+        titles = []
+        node = int(found)
+        # Follow the parents from finish back to start
+        while node is not None:
+            title, node = self.db.execute(
+                "SELECT title, parent FROM nodes WHERE id = ?", (node,)
+            ).fetchone()
+            titles.append(title)
+        path = [article_url(title, base_url) for title in reversed(titles)]
+        path[0], path[-1] = start, finish
+        return path
+
+
+def run_worker(path: str | Path, cache: LinkCache | str | Path | None = None, poll: float = 0.02) -> int:
+    """Expand the articles of a shared search until it is finished
+
+    Arguments:
+        path (str | Path): the database of the search
+        cache (LinkCache | str | Path, optional): link cache, or the path of its database,
+            see find_path
+        poll (float): number of seconds to wait when no article is left to claim
+    Returns:
+        count (int): the number of articles this worker expanded
+    """
+    from wiki_race_challenge import get_links
+
+    if cache is not None and not hasattr(cache, "get"):
+        from link_cache import LinkCache
+
+        cache = LinkCache(cache)
+
+    frontier = SharedFrontier(path)
+    count = 0
+    try:
+        while not frontier.finished:
+            claim = frontier.claim()
+            if claim is None:
+                time.sleep(poll)
+                continue
+            node, url, depth = claim
+            try:
+                links = get_links(url, cache)
+            except Exception as e:
+                print(f"Error: {e}")
+                links = []
+            frontier.complete(node, depth, links)
+            count += 1
+    finally:
+        frontier.close()
+    return count
+
+
+def find_path_distributed(
+    start: str,
+    finish: str,
+    path: str | Path | None = None,
+    processes: int | None = None,
+    cache: str | Path | None = None,
+    lease: float = 120,
+    poll: float = 0.02,
+) -> list[str]:
+    """Find the shortest path from `start` to `finish` with several worker processes
+
+    This process coordinates the search, and starts `processes` workers. More workers can
+    join with `run_worker` on the same database.
+
+    Arguments:
+        start (str): wikipedia article URL to start from
+        finish (str): wikipedia article URL to stop at
+        path (str | Path, optional): the database of the search, by default a temporary file
+        processes (int, optional): number of worker processes, by default one per CPU
+        cache (str | Path, optional): path of a link cache database shared by the workers
+        lease (float): number of seconds before the article claimed by a worker that stopped
+            responding is handed to another one
+        poll (float): number of seconds between the coordination steps
+    Returns:
+        urls (list[str]): the path from `start` to `finish`, see find_path
+    """
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if path is None:
+            path = Path(tmp_dir) / "race.sqlite"
+        frontier = SharedFrontier(path)
+        try:
+            frontier.start(start, finish)
+            workers = processes or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_worker, path, cache, poll) for _ in range(workers)]
+                while frontier.advance(lease):
+                    # Stop if every worker failed
+                    if all(future.done() for future in futures):
+                        for future in futures:
+                            future.result()
+                        break
+                    time.sleep(poll)
+            return frontier.found_path()
+        finally:
+            frontier.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Join a wiki race shared through an SQLite database")
+    parser.add_argument("command", choices=["worker"])
+    parser.add_argument("database", help="the database of the search")
+    parser.add_argument("--cache", help="the database of a link cache")
+    args = parser.parse_args()
+    print(f"Expanded {run_worker(args.database, args.cache)} articles")
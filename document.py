@@ -0,0 +1,155 @@
+"""
+A page parsed once, shared by the extractors
+
+`Document` wraps the html of a page and computes what the extractors need from it on first
+access only: the decoded text, the BeautifulSoup tree, the anchor and img tags, the tree the
+tables are read from, and the results built on them. `find_urls`, `find_articles`,
+`scan_article_links`, `find_img_src`, `extract_anniversaries` and the wikitables readers
+(hence the olympic parsers) accept a Document in place of the html, so running several of
+them on a page scans and parses it once.
+"""
+from __future__ import annotations
+
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+# The parsers and extractors are imported in the methods using them, they import this module
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+    from wikitables import RawTable
+
+# Elements whose text is not shown on the page
+invisible_tags = {"script", "style", "head", "title", "meta", "noscript", "template"}
+
+# Elements starting on a new line
+block_tags = {
+    "address", "article", "aside", "blockquote", "br", "caption", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+
+
+class Document:
+    """The html of a page, with its parses cached
+
+    Arguments:
+        html (str | bytes): the html of the page, or the raw page (see get_html)
+        url (str, optional): URL of the page, relative links are resolved against it
+        encoding (str): encoding of `html` when it is bytes
+    """
+
+    def __init__(self, html: str | bytes, url: str | None = None, encoding: str = "utf-8"):
+        self.html = html
+        self.url = url
+        self.encoding = encoding
+        # flavor -> parsed tree other than the soup, see table_tree
+        self._table_trees: dict[str, object] = {}
+
+    def __repr__(self) -> str:
+        return f"Document(url={self.url!r}, {len(self.html)} {type(self.html).__name__})"
+
+    @property
+    def base_url(self) -> str:
+        return self.url or "https://en.wikipedia.org"
+
+    @cached_property
+    def text(self) -> str:
+        """The html as text"""
+        if isinstance(self.html, str):
+            return self.html
+        return self.html.decode(self.encoding, "replace")
+
+    @cached_property
+    def data(self) -> bytes:
+        """The html as bytes, in `encoding`"""
+        if isinstance(self.html, bytes):
+            return self.html
+        return self.html.encode(self.encoding)
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        """The BeautifulSoup tree of the page, don't modify it"""
+        from bs4 import BeautifulSoup
+
+        if isinstance(self.html, bytes):
+            return BeautifulSoup(self.html, "html.parser", from_encoding=self.encoding)
+        return BeautifulSoup(self.html, "html.parser")
+
+    @cached_property
+    def hrefs(self) -> list[str]:
+        """The href attributes of the anchor tags, as they are in the page, in order"""
+        from filter_urls import href_bytes_pat, href_pat
+
+        # Scan the html in the form it came in, decoding only the matches
+        if isinstance(self.html, bytes):
+            return [href.decode(self.encoding, "replace") for href in href_bytes_pat.findall(self.html)]
+        return href_pat.findall(self.html)
+
+    @cached_property
+    def img_tags(self) -> list[str]:
+        """The img tags of the page, in order"""
+        from filter_urls import img_tag_bytes_pat, img_tag_pat
+
+        if isinstance(self.html, bytes):
+            return [tag.decode(self.encoding, "replace") for tag in img_tag_bytes_pat.findall(self.html)]
+        return img_tag_pat.findall(self.html)
+
+    @cached_property
+    def links(self) -> set[str]:
+        """The URLs the page links to, see find_urls"""
+        from filter_urls import find_urls
+
+        return find_urls(self, base_url=self.base_url)
+
+    @cached_property
+    def articles(self) -> set[str]:
+        """The wiki articles the page links to, see find_articles"""
+        from filter_urls import find_articles
+
+        return find_articles(self, base_url=self.base_url)
+
+    @cached_property
+    def images(self) -> set[str]:
+        """The src attributes of the img tags, see find_img_src"""
+        from filter_urls import find_img_src
+
+        return find_img_src(self)
+
+    @cached_property
+    def visible_text(self) -> str:
+        """The text of the page as shown, without scripts, styles and the head"""
+        from bs4 import NavigableString, Tag
+
+        parts = []
+        for node in self.soup.descendants:
+            if isinstance(node, Tag):
+                # Blocks are separated by white space, inline elements run on
+                if node.name in block_tags:
+                    parts.append(" ")
+            elif type(node) is NavigableString:
+                # Skips comments, doctypes and the like, which are NavigableString subclasses
+                if not any(parent.name in invisible_tags for parent in node.parents):
+                    parts.append(node)
+        return " ".join("".join(parts).split())
+
+    @cached_property
+    def tables(self) -> list[RawTable]:
+        """Every table of the page, see wikitables.find_tables"""
+        from wikitables import find_tables
+
+        return find_tables(self)
+
+    def table_tree(self, flavor: str) -> object:
+        """The tree the tables are read from, see wikitables.parse_tables
+
+        With bs4 it is the soup itself, the tables skip its hidden elements without changing it.
+        An lxml tree is parsed once, on first use.
+        """
+        if flavor == "bs4":
+            return self.soup
+        if flavor not in self._table_trees:
+            from wikitables import parse_tables
+
+            self._table_trees[flavor] = parse_tables(self.html, flavor, self.encoding)
+        return self._table_trees[flavor]
@@ -7,12 +7,19 @@ collecting olympic statistics from wikipedia
 from __future__ import annotations
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from bs4 import BeautifulSoup
-import requests
-import re
-import matplotlib.pyplot as plt
-import pandas as pd
+from urllib.parse import urljoin
+from instrumentation import timed
+from requesting_urls import get_html, get_html_many
+from wikitables import find_column, parse_numbers, read_wikitable
+from olympic_charts import bar_chart, render_chart, render_charts
+from table_cache import MISSING, TableCache, default_cache_dir
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from document import Document
 
 # Countries to submit statistics for
 scandinavian_countries = ["Norway", "Sweden", "Denmark"]
@@ -21,8 +28,25 @@ scandinavian_countries = ["Norway", "Sweden", "Denmark"]
 summer_sports = ["Sailing", "Athletics",
                  "Handball", "Football", "Cycling", "Archery"]
 
+# The totals row under the 'Medals by summer sport' table, e.g. 'Totals (3 entries)'
+totals_pat = r'^Totals?\b'
+
+# Parsed tables, by page url and revision. Kept on disk too when $WIKI_CACHE_DIR is set
+table_cache = TableCache(default_cache_dir("olympic_tables"))
+
+
+def get_page(url: str) -> bytes:
+    """Fetch a page as it was received, the parsers read the utf-8 bytes directly"""
+    return get_html(url, raw=True)
 
-def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path) -> None:
+
+def report_scandi_stats(
+    url: str,
+    sports_list: list[str],
+    work_dir: str | Path,
+    max_workers: int = 8,
+    render_workers: int | None = None,
+) -> None:
     """
     Given the url, extract and display following statistics for the Scandinavian countries:
 
@@ -36,6 +60,8 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
         url (str) : url to the 'All-time Olympic Games medal table' wiki page
         sports_list (list[str]) : list of summer Olympic games sports to display statistics for
         work_dir (str | Path) : (absolute) path to your current working directory
+        max_workers (int) : maximum number of country pages to download at the same time
+        render_workers (int, optional) : number of processes rendering the charts, by default one per CPU
 
     Returns:
         None
@@ -50,44 +76,82 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
     work_dir = Path(work_dir)
     country_dict = get_scandi_stats(url)
 
-    stats_dir = work_dir / "olympic_games_results"
-    stats_dir.mkdir(parents=True, exist_ok=True)
+    # Fetch and parse each country page once, for all the sports
+    sport_stats = get_country_sport_stats(country_dict, max_workers)
 
-    # Plot the total number of gold medals for summer and winter Olympics using plot_scandi_stats function
-    plot_scandi_stats(country_dict, stats_dir)
+    charts, best_in_sport = scandi_report(country_dict, sport_stats, sports_list)
+    write_scandi_report(charts, best_in_sport, work_dir / "olympic_games_results", render_workers)
 
-    # Iterate through each sport and make a call to get_sport_stats
-    # Plot the sport specific stats
-    # Make a call to find_best_country_in_sport for each sport
 
-    best_in_sport = []
-    medal = "Gold"
+def scandi_report(
+    country_dict: dict[str, dict[str, str | dict[str, int]]],
+    sport_stats: dict[str, dict[str, dict[str, int]]],
+    sports_list: list[str],
+) -> tuple[dict[str, dict], list[tuple[str, str]]]:
+    """Gather the charts and the best country of each sport reported by report_scandi_stats
+
+    Parameters:
+        country_dict (dict) : countries and their urls, as returned by get_scandi_stats
+        sport_stats (dict) : medals per sport of each country, as returned by get_country_sport_stats
+        sports_list (list[str]) : list of summer Olympic games sports to display statistics for
+
+    Returns:
+        charts (dict[str, dict]) : file name -> chart, see render_charts
+        best_in_sport (list[tuple[str, str]]) : (sport, best country in gold medals) for each sport
+    """
+    # Only the aggregation is timed, the pages are fetched and parsed before, and written after
+    with timed("extract", "report_scandi_stats"):
+        # Plot the total number of gold medals for summer and winter Olympics, rendered with the sport charts below
+        charts = {'total_medal_ranking.png': scandi_stats_chart(country_dict)}
+
+        # Iterate through each sport and make a call to get_sport_stats
+        # Plot the sport specific stats
+        # Make a call to find_best_country_in_sport for each sport
+
+        best_in_sport = []
+        medal = "Gold"
+
+        for sport in sports_list:
+            results = {}
+            for country, country_sport_stats in sport_stats.items():
+                results[country] = medals_in_sport(country_sport_stats, sport)
+
+            # Plot the total number of gold, silver and bronze medals in the selected summer sports
+            charts[f'{sport}_medal_ranking.png'] = sport_stats_chart(results, sport)
 
-    for sport in sports_list:
-        results = {}
-        for country, country_info in country_dict.items():
-            results[country] = get_sport_stats(country_info['url'], sport)
+            # Find the best country in number of gold medals in each sport
+            best_country = find_best_country_in_sport(results, medal)
+            best_in_sport.append((sport, best_country))
+
+    return charts, best_in_sport
+
+
+def write_scandi_report(
+    charts: dict[str, dict],
+    best_in_sport: list[tuple[str, str]],
+    stats_dir: str | Path,
+    render_workers: int | None = None,
+) -> None:
+    """Render the charts and save the table of the best country in each sport, see scandi_report
 
-        # Plot the total number of gold, silver and bronze medals in the selected summer sports
-        countries = list(results.keys())
-        gold_medals = [results[country]['Gold'] for country in countries]
-        silver_medals = [results[country]['Silver'] for country in countries]
-        bronze_medals = [results[country]['Bronze'] for country in countries]
+    Parameters:
+        charts (dict[str, dict]) : file name -> chart, see render_charts
+        best_in_sport (list[tuple[str, str]]) : (sport, best country in gold medals) for each sport
+        stats_dir (str | Path) : the directory to write the charts and the table to
+        render_workers (int, optional) : number of processes rendering the charts, by default one per CPU
 
-        plt.bar(countries, gold_medals, color='gold')
-        plt.bar(countries, silver_medals, bottom=gold_medals, color='silver')
-        plt.bar(countries, bronze_medals, bottom=[
-                i+j for i, j in zip(gold_medals, silver_medals)], color='#cd7f32')
-        plt.title(f'Total number of medals in {sport}')
-        plt.savefig(stats_dir / f'{sport}_medal_ranking.png')
-        plt.close()
+    Returns:
+        None
+    """
+    stats_dir = Path(stats_dir)
+    stats_dir.mkdir(parents=True, exist_ok=True)
 
-        # Find the best country in number of gold medals in each sport
-        best_country = find_best_country_in_sport(results, medal)
-        best_in_sport.append((sport, best_country))
+    # Render all the charts in parallel, skipping the ones whose data did not change
+    with timed("write", "report_scandi_stats"):
+        render_charts(charts, stats_dir, max_workers=render_workers)
 
     # Create and save the md table of best in each sport stats
-    with open(stats_dir / 'best_of_sport_by_Gold.md', 'w') as f:
+    with timed("write", "report_scandi_stats"), open(stats_dir / 'best_of_sport_by_Gold.md', 'w') as f:
         f.write('| Sport | Best Country |\n')
         f.write('|-------|--------------|\n')
         for sport, best_country in best_in_sport:
@@ -96,6 +160,8 @@ def report_scandi_stats(url: str, sports_list: list[str], work_dir: str | Path)
 
 def get_scandi_stats(
     url: str,
+    countries: list[str] | None = None,
+    html: bytes | None = None,
 ) -> dict[str, dict[str, str | dict[str, int]]]:
     """Given the url, extract the urls for the Scandinavian countries,
        as well as number of gold medals acquired in summer and winter Olympic games
@@ -103,6 +169,8 @@ def get_scandi_stats(
 
     Parameters:
       url (str): url to the 'All-time Olympic Games medal table' wiki page
+      countries (list[str], optional): countries to extract instead of the Scandinavian ones
+      html (bytes, optional): the page, already fetched with get_page, see get_medal_table
 
     Returns:
       country_dict: dictionary of the form:
@@ -118,47 +186,198 @@ def get_scandi_stats(
 
         with the tree keys "Norway", "Denmark", "Sweden".
     """
-    # Send a GET request to the provided URL
-    response = requests.get(url)
-
-    # Parse the HTML response using BeautifulSoup
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # Find the 'List of NOCs with medals' table in the parsed HTML
-    table = soup.find('table', {'class': ['wikitable', 'sortable']})
-
-    country_dict = {}
-
-    # If the table is found, iterate over each row (representing a country) in the table
-    if table is not None:
-        rows = table.find_all('tr')
-        for row in rows:
-            cells = row.find_all('td')
-
-            # If cells are found in the row, extract country name and medal counts
-            if cells:
-                country_link = cells[0].find('a')
-
-                # If a link is found in the first cell (representing country name), extract information
-                if country_link:
-                    country_name = country_link.text.strip()
-
-                    # If the country is a Scandinavian country, store its name, Wikipedia URL, and medal counts
-                    if country_name in scandinavian_countries:
-                        summer_medals = int(
-                            cells[2].text.strip().replace(',', ''))
-                        winter_medals = int(
-                            cells[7].text.strip().replace(',', ''))
-                        country_dict[country_name] = {
-                            "url": "https://en.wikipedia.org" + country_link['href'],
-                            "medals": {
-                                "Summer": summer_medals,
-                                "Winter": winter_medals,
-                            },
-                        }
+    return medal_table_to_country_dict(get_medal_table(url, html), countries)
+
 
-    # Return the dictionary containing information about Scandinavian countries and their medal counts
-    return country_dict
+def get_medal_table(url: str, html: bytes | None = None) -> pd.DataFrame:
+    """Given the url, read the whole 'List of NOCs with medals' table, with every country in it.
+
+    Parameters:
+      url (str): url to the 'All-time Olympic Games medal table' wiki page
+      html (bytes, optional): the page, already fetched with get_page. It is only parsed if the
+        cached table is of another revision. By default the page is only fetched if the cached
+        table is stale.
+
+    Returns:
+      table (pd.DataFrame): one row per country, indexed by country name, with the columns
+        "URL" (url to the country specific Olympic performance wiki page) and
+        "{games} {count}" for games in medal_games and count in medal_counts, e.g. "Summer Gold",
+        "Winter Games" (the number of games attended) or "Combined Total".
+        All the count columns are integers.
+    """
+    if html is None:
+        medal_table = table_cache.cached(url, parse_medal_table, get_page)
+    else:
+        medal_table = table_cache.parsed(url, parse_medal_table, html)
+    medal_table = medal_table.copy()
+
+    # Country links are relative to the page
+    medal_table["URL"] = (
+        medal_table["URL"].map(lambda href: urljoin(url, href), na_action='ignore').astype('string')
+    )
+    return medal_table
+
+
+@timed("parse", "parse_medal_table")
+def parse_medal_table(html: str | bytes | Document) -> pd.DataFrame:
+    """Parse the 'List of NOCs with medals' table of the 'All-time Olympic Games medal table' page.
+
+    Parameters:
+      html (str | bytes | Document): the html of the 'All-time Olympic Games medal table' wiki page,
+        bytes are taken to be utf-8
+
+    Returns:
+      table (pd.DataFrame): see get_medal_table, with the "URL" column holding the links as they are in the page
+    """
+    import pandas as pd
+
+    # Find the 'List of NOCs with medals' table in the page
+    table = read_wikitable(html, attrs={'class': 'wikitable'}, links=True)
+
+    # The first column holds the country names and links, the rows without a link are totals and notes
+    team = table.columns[0]
+    link = f'{team} link'
+    if link in table.columns:
+        table = table[table[link].notna()]
+        urls = table[link]
+    else:
+        # A table without any team link: keep the named rows, without URL
+        table = table[table[team].notna()]
+        urls = pd.Series(pd.NA, index=table.index, dtype='string')
+
+    # Drop the IOC code and notes after the country name, e.g. 'Norway (NOR)'
+    medal_table = pd.DataFrame({"URL": urls})
+    medal_table.index = pd.Index(
+        table[team].str.replace(r'\s*[(\[].*$', '', regex=True), name="Country"
+    )
+
+    # The remaining columns come in groups of games, e.g. "Summer Olympic Games Gold"
+    count_columns = [name for name in table.columns[1:] if not name.endswith(' link')]
+    unreadable = pd.Series(False, index=table.index)
+    for i, name in enumerate(count_columns):
+        column = medal_table_column(name)
+        if column is None:
+            # Fall back to the layout of the table: five columns per group of games
+            column = f"{medal_games[i // 5 % 3]} {medal_counts[i % 5]}"
+        # Read every cell as read_wikitable does, e.g. '1,061‡', a dash counts as 0
+        counts, present = parse_numbers(table[name].astype('string'))
+        unreadable |= present & counts.isna()
+        medal_table[column] = counts.fillna(0).to_numpy()
+
+    # Drop the rows with counts that are not numbers, rather than guessing them
+    medal_table = medal_table[~unreadable.to_numpy()]
+    count_names = medal_table.columns[1:]
+    medal_table[count_names] = medal_table[count_names].astype('int64')
+    return medal_table
+
+
+# The groups of games and counts in the medal table
+medal_games = ["Summer", "Winter", "Combined"]
+medal_counts = ["Games", "Gold", "Silver", "Bronze", "Total"]
+
+
+def medal_table_column(header: str) -> str | None:
+    """Name a column of the 'List of NOCs with medals' table after its header, e.g.
+       'Summer Olympic Games Gold' -> 'Summer Gold', 'Combined total No.' -> 'Combined Games'.
+
+    Parameters:
+      header (str): the column header
+    Returns:
+      column (str | None): the column name, or None if the header is not recognized
+    """
+    header = header.lower()
+    games = next((games for games in medal_games[:2] if games.lower() in header), None)
+    if games is None and ('combined' in header or header.startswith('total')):
+        games = "Combined"
+    count = next((count for count in medal_counts[1:4] if count.lower() in header), None)
+    if count is None and header.endswith('total'):
+        count = "Total"
+    elif count is None and header.endswith(('no.', 'games')):
+        count = "Games"
+    if games is None or count is None:
+        return None
+    return f"{games} {count}"
+
+
+def medal_table_to_country_dict(
+    medal_table: pd.DataFrame, countries: list[str] | None = None
+) -> dict[str, dict[str, str | dict[str, int]]]:
+    """Pick countries from the medal table, in the format of get_scandi_stats.
+
+    Parameters:
+      medal_table (pd.DataFrame): the table returned by get_medal_table
+      countries (list[str], optional): countries to pick, by default the Scandinavian ones
+    Returns:
+      country_dict: see get_scandi_stats, in the order of the medal table
+    """
+    import pandas as pd
+
+    if countries is None:
+        countries = scandinavian_countries
+    picked = medal_table[medal_table.index.isin(countries)]
+    picked = picked[~picked.index.duplicated()]
+    return {
+        country: {
+            "url": row["URL"],
+            "medals": {
+                "Summer": int(row["Summer Gold"]),
+                "Winter": int(row["Winter Gold"]),
+            },
+        }
+        for country, row in picked.iterrows()
+    }
+
+
+def rank_countries(
+    medal_table: pd.DataFrame,
+    column: str = "Combined Gold",
+    k: int | None = None,
+    countries: list[str] | None = None,
+) -> pd.DataFrame:
+    """Rank the countries of a medal table by one of its columns, most medals first.
+
+    Tied countries share the same (best) rank, so e.g. two leaders are both ranked 1
+    and the next country is ranked 3.
+
+    Parameters:
+      medal_table (pd.DataFrame): medal counts per country, e.g. from get_medal_table
+      column (str): the column to rank by, e.g. "Summer Gold" or "Winter Total"
+      k (int, optional): only keep the countries ranked k or better (more than k with ties)
+      countries (list[str], optional): only rank these countries
+    Returns:
+      ranking (pd.DataFrame): the selected rows of `medal_table`, sorted by `column`,
+        with the rank in an added "Rank" column
+    """
+    if column not in medal_table.columns:
+        raise ValueError(
+            f"{column} is invalid parameter for ranking, must be in {list(medal_table.columns)}"
+        )
+    if countries is not None:
+        medal_table = medal_table[medal_table.index.isin(countries)]
+
+    ranking = medal_table.assign(
+        Rank=medal_table[column].rank(method='min', ascending=False).astype('int64')
+    )
+    ranking = ranking.sort_values(['Rank'], kind='stable')
+    if k is not None:
+        ranking = ranking[ranking['Rank'] <= k]
+    return ranking
+
+
+def best_countries(
+    medal_table: pd.DataFrame, column: str = "Combined Gold", countries: list[str] | None = None
+) -> list[str]:
+    """Find the countries with the most medals in `column`, several if they are tied.
+
+    Parameters:
+      medal_table (pd.DataFrame): medal counts per country, e.g. from get_medal_table
+      column (str): the column to compare
+      countries (list[str], optional): only compare these countries
+    Returns:
+      best (list[str]): the leading countries, in the order of the table
+    """
+    ranking = rank_countries(medal_table, column, k=1, countries=countries)
+    return [country for country in medal_table.index if country in ranking.index]
 
 
 def get_sport_stats(country_url: str, sport: str) -> dict[str, int]:
@@ -174,35 +393,159 @@ def get_sport_stats(country_url: str, sport: str) -> dict[str, int]:
                           Format:
                           {"Gold" : x, "Silver" : y, "Bronze" : z}
     """
-    response = requests.get(country_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return medals_in_sport(get_all_sport_stats(country_url), sport)
+
+
+def get_all_sport_stats(country_url: str) -> dict[str, dict[str, int]]:
+    """Given the url to country specific performance page, get the number of gold, silver, and bronze medals
+      the given country has acquired in every sport of the summer Olympic games.
+
+    Parameters:
+        - country_url (str) : url to the country specific Olympic performance wiki page
+
+    Returns:
+        - sport_stats (dict[str, dict[str, int]]) : dictionary of medals per sport, with the sport names as
+                          they appear in the 'Medals by summer sport' table
+                          Format:
+                          {"Sailing" : {"Gold" : x, "Silver" : y, "Bronze" : z}, ...}
+    """
+    sport_stats = table_cache.cached(country_url, parse_sport_stats, get_page)
+    # Copy, so callers can't change the cached results
+    return {sport: dict(medals) for sport, medals in sport_stats.items()}
+
+
+def get_country_sport_stats(
+    country_dict: dict[str, dict[str, str | dict[str, int]]], max_workers: int = 8
+) -> dict[str, dict[str, dict[str, int]]]:
+    """Get the medals per sport for every country in `country_dict`, downloading the country pages
+      concurrently and parsing each page while the remaining ones are still being fetched.
+
+    Parameters:
+        - country_dict (dict) : countries and their urls, as returned by get_scandi_stats
+        - max_workers (int) : maximum number of country pages to download at the same time
+
+    Returns:
+        - country_sport_stats (dict[str, dict[str, dict[str, int]]]) : the result of get_all_sport_stats
+                          for each country, in the order of `country_dict`
+    """
+    country_of_url = {
+        country_info['url']: country for country, country_info in country_dict.items()
+    }
+    name = f"{parse_sport_stats.__module__}.{parse_sport_stats.__qualname__}"
+
+    # Only download the pages that are not cached
+    sport_stats = {}
+    for country_url, country in country_of_url.items():
+        cached = table_cache.get(country_url, name)
+        if cached is not MISSING:
+            sport_stats[country] = cached
+    missing = [url for url, country in country_of_url.items() if country not in sport_stats]
+
+    for country_url, html in get_html_many(missing, max_workers=max_workers, raw=True):
+        # A page whose revision did not change doesn't need parsing again
+        sport_stats[country_of_url[country_url]] = table_cache.parsed(country_url, parse_sport_stats, html)
+
+    return {
+        country: {sport: dict(medals) for sport, medals in sport_stats[country].items()}
+        for country in country_dict
+    }
+
+
+def fetch_country_pages(
+    country_dict: dict[str, dict[str, str | dict[str, int]]], max_workers: int = 8
+) -> dict[str, bytes]:
+    """Download the page of every country in `country_dict` concurrently, to parse with parse_country_pages.
+
+    Unlike get_country_sport_stats, every page is downloaded, so that fetching and parsing can be
+    run (and timed) as separate steps.
+
+    Parameters:
+        - country_dict (dict) : countries and their urls, as returned by get_scandi_stats
+        - max_workers (int) : maximum number of country pages to download at the same time
+
+    Returns:
+        - pages (dict[str, bytes]) : url -> the page as it was received, see get_page
+    """
+    urls = [country_info['url'] for country_info in country_dict.values()]
+    return dict(get_html_many(urls, max_workers=max_workers, raw=True))
+
+
+def parse_country_pages(
+    country_dict: dict[str, dict[str, str | dict[str, int]]], pages: dict[str, bytes]
+) -> dict[str, dict[str, dict[str, int]]]:
+    """Get the medals per sport for every country in `country_dict` from its downloaded page.
+
+    Pages whose revision is cached are not parsed again.
+
+    Parameters:
+        - country_dict (dict) : countries and their urls, as returned by get_scandi_stats
+        - pages (dict[str, bytes]) : the country pages, as returned by fetch_country_pages
+
+    Returns:
+        - country_sport_stats (dict[str, dict[str, dict[str, int]]]) : see get_country_sport_stats
+    """
+    country_sport_stats = {}
+    for country, country_info in country_dict.items():
+        url = country_info['url']
+        sport_stats = table_cache.parsed(url, parse_sport_stats, pages[url])
+        # Copy, so callers can't change the cached results
+        country_sport_stats[country] = {sport: dict(medals) for sport, medals in sport_stats.items()}
+    return country_sport_stats
+
+
+@timed("parse", "parse_sport_stats")
+def parse_sport_stats(html: str | bytes | Document) -> dict[str, dict[str, int]]:
+    """Parse the 'Medals by summer sport' table of a country specific performance page.
+
+    Parameters:
+        - html (str | bytes | Document) : the html of the country specific Olympic performance wiki page,
+                          bytes are taken to be utf-8
+
+    Returns:
+        - sport_stats (dict[str, dict[str, int]]) : dictionary of medals per sport, see get_all_sport_stats
+    """
+    import pandas as pd
 
     # Find the table with the title 'Medals by summer sport'
-    table = soup.find('span', string=re.compile(
-        'medals by summer sport', re.IGNORECASE)).find_parent('table')
+    table = read_wikitable(html, match='medals by summer sport')
 
-    medals = {"Gold": 0, "Silver": 0, "Bronze": 0}
+    # The first column holds the sport names, followed by the medal counts
+    sport = table.columns[0]
+    medal_columns = {
+        medal: find_column(table, medal) or table.columns[i]
+        for i, medal in enumerate(["Gold", "Silver", "Bronze"], start=1)
+    }
+    counts = pd.DataFrame(
+        {medal: pd.to_numeric(table[name], errors='coerce') for medal, name in medal_columns.items()}
+    )
 
-    # Find all rows in the table
-    rows = table.find_all('tr')
+    sport_stats = {}
 
-    for row in rows:
-        # Find all cells in the row
-        header = row.find('th')
-        if header:
-            # The header contains the sport name
-            sport_name = header.get_text(strip=True)
-            if sport_name.lower() == sport.lower():
-                # Find all cells in this row
-                cells = row.find_all('td')
-                if len(cells) >= 3:
-                    # The first three cells contain the medal counts
-                    medals["Gold"] = int(cells[0].get_text(strip=True))
-                    medals["Silver"] = int(cells[1].get_text(strip=True))
-                    medals["Bronze"] = int(cells[2].get_text(strip=True))
-                break
+    # Keep the rows with medal counts, the first one of each sport, but not the totals at the bottom
+    totals = table[sport].astype('string').str.contains(totals_pat, case=False, na=False)
+    for i in counts.index[counts.notna().all(axis=1) & ~totals]:
+        sport_name = table.at[i, sport]
+        if pd.notna(sport_name) and sport_name not in sport_stats:
+            sport_stats[sport_name] = {medal: int(counts.at[i, medal]) for medal in counts.columns}
 
-    return medals
+    return sport_stats
+
+
+def medals_in_sport(sport_stats: dict[str, dict[str, int]], sport: str) -> dict[str, int]:
+    """Look up the medals of one sport in the result of `get_all_sport_stats`.
+
+    Parameters:
+        - sport_stats (dict[str, dict[str, int]]) : medals per sport, as returned by get_all_sport_stats
+        - sport (str) : name of the summer Olympic sport in interest, matched case-insensitively
+
+    Returns:
+        - medals (dict[str, int]) : {"Gold" : x, "Silver" : y, "Bronze" : z}, all zero if the
+                          country has no medals in the sport
+    """
+    for sport_name, medals in sport_stats.items():
+        if sport_name.lower() == sport.lower():
+            return dict(medals)
+    return {"Gold": 0, "Silver": 0, "Bronze": 0}
 
 
 def find_best_country_in_sport(
@@ -225,26 +568,17 @@ def find_best_country_in_sport(
                        If two countries lead return their names separated with '/' like 'Norway/Sweden'
                        If all or none of the countries lead, return string 'None'
     """
+    import pandas as pd
+
     valid_medals = {"Gold", "Silver", "Bronze"}
     if medal not in valid_medals:
         raise ValueError(
             f"{medal} is invalid parameter for ranking, must be in {valid_medals}"
         )
 
-    # Initialize the best country and the maximum medal count
-    best_country = []
-    max_medals = 0
-
-    # Iterate over each country and its medal counts
-    for country, medals in results.items():
-        # Check if this country has more of the given medal than the current best
-        if medals.get(medal, 0) > max_medals:
-            # Update the best country and the maximum medal count
-            best_country = [country]
-            max_medals = medals[medal]
-        elif medals.get(medal, 0) == max_medals:
-            # If there is a tie, add this country to the list of best countries
-            best_country.append(country)
+    # Missing medal counts count as zero
+    medal_table = pd.DataFrame.from_dict(results, orient='index').reindex(columns=[medal]).fillna(0)
+    best_country = best_countries(medal_table, medal)
 
     # If all or none of the countries lead, return 'None'
     if len(best_country) in [0, len(results)]:
@@ -272,30 +606,54 @@ def plot_scandi_stats(
     Returns:
       None
     """
-    # Convert output_parent to Path object if it's not None
+    # Save the plot if output_parent is provided
     if output_parent is not None:
         output_parent = Path(output_parent)
+        render_chart(scandi_stats_chart(country_dict), output_parent / 'total_medal_ranking.png')
+
+
+def scandi_stats_chart(country_dict: dict[str, dict[str, str | dict[str, int]]]) -> dict:
+    """Describe the chart of plot_scandi_stats: summer and winter gold medals stacked per country.
 
-    # Plot the total number of gold medals for summer and winter Olympics
+    Parameters:
+      country_dict (dict) : countries and their medals, as returned by get_scandi_stats
+    Returns:
+      chart (dict) : the chart, see olympic_charts.bar_chart
+    """
     countries = list(country_dict.keys())
     summer_medals = [country_dict[country]['medals']['Summer']
                      for country in countries]
     winter_medals = [country_dict[country]['medals']['Winter']
                      for country in countries]
+    return bar_chart(
+        countries,
+        [(summer_medals, 'gold'), (winter_medals, 'blue')],
+        'Total number of gold medals for summer and winter Olympics',
+    )
 
-    plt.bar(countries, summer_medals, color='gold')
-    plt.bar(countries, winter_medals, bottom=summer_medals, color='blue')
-    plt.title('Total number of gold medals for summer and winter Olympics')
 
-    # Save the plot if output_parent is provided
-    if output_parent is not None:
-        plt.savefig(output_parent / 'total_medal_ranking.png')
+def sport_stats_chart(results: dict[str, dict[str, int]], sport: str) -> dict:
+    """Describe the chart of the gold, silver and bronze medals per country in one sport, stacked.
 
-    plt.close()
+    Parameters:
+      results (dict[str, dict[str, int]]) : medals per country in the sport, see find_best_country_in_sport
+      sport (str) : name of the sport, for the title
+    Returns:
+      chart (dict) : the chart, see olympic_charts.bar_chart
+    """
+    countries = list(results.keys())
+    gold_medals = [results[country]['Gold'] for country in countries]
+    silver_medals = [results[country]['Silver'] for country in countries]
+    bronze_medals = [results[country]['Bronze'] for country in countries]
+    return bar_chart(
+        countries,
+        [(gold_medals, 'gold'), (silver_medals, 'silver'), (bronze_medals, '#cd7f32')],
+        f'Total number of medals in {sport}',
+    )
 
 
 # run the whole thing if called as a script, for quick testing
 if __name__ == "__main__":
     url = "https://en.wikipedia.org/wiki/All-time_Olympic_Games_medal_table"
-    work_dir = 'C:/Users/crist/OneDrive/Desktop/IN3110/IN3110-cristila/assignment4'
+    work_dir = Path(__file__).parent
     report_scandi_stats(url, summer_sports, work_dir)
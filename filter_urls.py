@@ -7,31 +7,56 @@ Filtering URLs from HTML
 from __future__ import annotations
 
 import re
-from urllib.parse import urljoin, urlparse
+from typing import TYPE_CHECKING
+from urllib.parse import quote, unquote, urljoin, urlparse
 
+from document import Document
+from instrumentation import timed
 
+if TYPE_CHECKING:
+    from redirects import RedirectResolver
+
+# The href attribute of every anchor tag, and the img tags, in html text and in raw html bytes
+href_pat = re.compile(r'<a [^>]*href="([^"]*)', flags=re.IGNORECASE)
+img_tag_pat = re.compile(r"<img[^>]+>", flags=re.IGNORECASE)
+href_bytes_pat = re.compile(href_pat.pattern.encode(), flags=re.IGNORECASE)
+img_tag_bytes_pat = re.compile(img_tag_pat.pattern.encode(), flags=re.IGNORECASE)
+
+# The src attribute of an img tag
+src_pat = re.compile(r'src="([^"]+)"', flags=re.IGNORECASE)
+
+
+@timed("parse", "find_urls")
 def find_urls(
-    html: str,
+    html: str | bytes | Document,
     base_url: str = "https://en.wikipedia.org",
     output: str | None = None,
+    encoding: str = "utf-8",
 ) -> set[str]:
     """
     Find all the url links in a html text using regex
 
     Arguments:
-        html (str): html string to parse
+        html (str | bytes | Document): html string to parse, the raw page (see get_html),
+            or a Document whose anchor tags are scanned once for every extractor
         base_url (str): the base url to the wikipedia.org pages
         output (Optional[str]): file to write to if wanted
+        encoding (str): encoding of `html` when it is bytes
     Returns:
         urls (Set[str]) : set with all the urls found in html text
     """
-    # create and compile regular expression(s)
-    url_pat = re.compile(r'<a [^>]*href="([^"]*)', flags=re.IGNORECASE)
+    if isinstance(html, Document):
+        hrefs = html.hrefs
+    elif isinstance(html, bytes):
+        # Scan the bytes, and only decode the links instead of the whole page
+        hrefs = [href.decode(encoding, "replace") for href in href_bytes_pat.findall(html)]
+    else:
+        hrefs = href_pat.findall(html)
 
     urls = set()
     # 1. find all the anchor tags, then
     # 2. find the urls href attributes
-    for url in url_pat.findall(html):
+    for url in hrefs:
         # Ignore links to internal fragments
         if not url.startswith('#'):
             # Handle relative URLs
@@ -50,22 +75,35 @@ def find_urls(
     return urls
 
 
-def find_articles(html: str, output: str | None = None, base_url: str = "https://en.wikipedia.org") -> set[str]:
+def find_articles(
+    html: str | bytes | Document,
+    output: str | None = None,
+    base_url: str = "https://en.wikipedia.org",
+    redirects: RedirectResolver | None = None,
+    encoding: str = "utf-8",
+) -> set[str]:
     """Finds all the wiki articles inside a html text. Make call to find urls, and filter
     arguments:
-        - text (str) : the html text to parse
+        - text (str | bytes | Document) : the html text to parse, the raw page (see get_html),
+          or a Document
         - output (str, optional): the file to write the output to if wanted
         - base_url (str, optional): the base_url to pass through to find_urls
+        - redirects (RedirectResolver, optional): resolve the articles of its wiki to the
+          canonical URL of the article they stand for, so redirects and spelling variants
+          of the same article are only listed once
+        - encoding (str, optional): encoding of the html when it is bytes
     returns:
         - (Set[str]) : a set with urls to all the articles found
     """
-    urls = find_urls(html, base_url=base_url)
+    urls = find_urls(html, base_url=base_url, encoding=encoding)
 
     # Regular expression pattern for Wikipedia article URLs in any language
     pattern = re.compile(r'^https://[a-z]+\.wikipedia\.org/wiki/[^:]+$')
 
     # Filter out non-article URLs using the pattern
     articles = {url for url in urls if pattern.match(url)}
+    if redirects is not None:
+        articles = set(redirects.resolve_urls(articles))
 
     # Write to file if wanted
     if output:
@@ -76,27 +114,119 @@ def find_articles(html: str, output: str | None = None, base_url: str = "https:/
     return articles
 
 
-def find_img_src(html: str):
+def scan_article_links(
+    html: str | bytes | Document, base_url: str = "https://en.wikipedia.org", encoding: str = "utf-8"
+) -> list[str]:
+    """Quickly find the links to the wiki articles of one site, without parsing the html
+
+    The links are found and filtered with the same rules as find_articles (anchor href
+    attributes, no internal fragments, no ':' after /wiki/), scanning the raw bytes,
+    but only the articles on the site of `base_url` are kept.
+
+    Arguments:
+        html (str | bytes | Document): the html text to scan, the raw page (see get_html),
+            or a Document
+        base_url (str): URL of the page, relative links are resolved against it
+        encoding (str): encoding of `html` when it is bytes
+    Returns:
+        urls (list[str]): URLs of the linked articles, in order of first appearance
+    """
+    if isinstance(html, Document):
+        hrefs = html.hrefs
+    elif isinstance(html, str):
+        hrefs = href_pat.findall(html)
+    else:
+        hrefs = [href.decode(encoding, "replace") for href in href_bytes_pat.findall(html)]
+    parts = urlparse(base_url)
+    prefix = f"{parts.scheme}://{parts.netloc}/wiki/"
+
+    urls = []
+    seen = set()
+    for href in hrefs:
+        # Ignore links to internal fragments
+        if not href or href.startswith("#"):
+            continue
+        # Resolve relative URLs, only when needed, and strip fragment identifiers
+        url = prefix + href[6:] if href.startswith("/wiki/") else urljoin(base_url, href)
+        url = url.partition("#")[0]
+        if url.startswith(prefix) and ":" not in url[len(prefix) :] and url not in seen:
+            seen.add(url)
+            urls.append(url)
+    return urls
+
+
+def find_img_src(html: str | bytes | Document, encoding: str = "utf-8"):
     """Find all src attributes of img tags in an HTML string
 
     Args:
-        html (str): A string containing some HTML.
+        html (str | bytes | Document): A string containing some HTML, the raw page (see get_html),
+            or a Document.
+        encoding (str): The encoding of `html` when it is bytes.
 
     Returns:
         src_set (set): A set of strings containing image URLs
 
     The set contains every found src attribute of an img tag in the given HTML.
     """
-    # img_pat finds all the <img alt="..." src="..."> snippets
-    # this finds <img and collects everything up to the closing '>'
-    img_pat = re.compile(r"<img[^>]+>", flags=re.IGNORECASE)
-    # src finds the text between quotes of the `src` attribute
-    src_pat = re.compile(r'src="([^"]+)"', flags=re.IGNORECASE)
+    # img_tag_pat finds all the <img alt="..." src="..."> snippets, from <img up to the closing '>',
+    # and src_pat the text between quotes of their `src` attribute
+    if isinstance(html, Document):
+        img_tags = html.img_tags
+    elif isinstance(html, bytes):
+        # Only decode the img tags, not the whole page
+        img_tags = [tag.decode(encoding, "replace") for tag in img_tag_bytes_pat.findall(html)]
+    else:
+        img_tags = img_tag_pat.findall(html)
     src_set = set()
     # first, find all the img tags
-    for img_tag in img_pat.findall(html):
+    for img_tag in img_tags:
         # then, find the src attribute of the img, if any
         match = src_pat.search(img_tag)
         if match:
             src_set.add(match.group(1))
     return src_set
+
+
+def article_title(url: str) -> str:
+    """Get the title of the wiki article at a URL
+
+    turns 'https://en.wikipedia.org/wiki/Dungeons_%26_Dragons' into 'Dungeons & Dragons'
+
+    Args:
+        url (str): URL of a wiki article
+    Returns:
+        title (str): the article title, with spaces instead of underscores
+    """
+    path = urlparse(url).path
+    _, _, title = path.partition("/wiki/")
+    return unquote(title).replace("_", " ")
+
+
+def canonical_title(title: str) -> str:
+    """Normalize an article title the way MediaWiki does
+
+    turns 'united_Kingdom', 'united%20Kingdom' and ' united  Kingdom' into 'United Kingdom'
+
+    Args:
+        title (str): the title, possibly percent-encoded, with underscores
+    Returns:
+        title (str): the title with spaces, single spaced, with a capital first letter
+    """
+    title = " ".join(unquote(title).replace("_", " ").split())
+    return title[:1].upper() + title[1:]
+
+
+def article_url(title: str, base_url: str = "https://en.wikipedia.org") -> str:
+    """Get the URL of a wiki article, encoded the way MediaWiki writes its links
+
+    turns 'Dungeons & Dragons' into 'https://en.wikipedia.org/wiki/Dungeons_%26_Dragons'
+
+    Args:
+        title (str): the article title
+        base_url (str): the base url of the wiki
+    Returns:
+        url (str): the URL of the article
+    """
+    # MediaWiki leaves these characters unescaped in article paths
+    path = quote(title.replace(" ", "_"), safe=";@$!*(),/~:")
+    return urljoin(base_url, "/wiki/" + path)
@@ -6,11 +6,16 @@ Collecting anniversaries from Wikipedia
 from __future__ import annotations
 
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
-from bs4 import BeautifulSoup
 import re
-import requests
+
+from document import Document
+from instrumentation import timed
+from requesting_urls import get_html
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Month names to submit for, from Wikipedia:Selected anniversaries namespace
 months_in_namespace = [
@@ -29,7 +34,10 @@ months_in_namespace = [
 ]
 
 
-def extract_anniversaries(html: str, month: str) -> list[str]:
+@timed("parse", "extract_anniversaries")
+def extract_anniversaries(
+    html: str | bytes | Document, month: str, encoding: str = "utf-8"
+) -> list[str]:
     """Extract all the passages from the html which contain an anniversary, and save their plain text in a list.
         For the pages in the given namespace, all the relevant passages start with a month href
          <p>
@@ -41,8 +49,10 @@ def extract_anniversaries(html: str, month: str) -> list[str]:
         </p>
 
     Parameters:
-        - html (str): The html to parse
+        - html (str | bytes | Document): The html to parse, the raw page (see get_html),
+                                         or a Document whose BeautifulSoup tree is reused
         - month (str): The month in interest, the page name of the Wikipedia:Selected anniversaries namespace
+        - encoding (str): The encoding of the html when it is bytes, so BeautifulSoup doesn't have to guess it
 
     Returns:
         - ann_list (list[str]): A list of the highlighted anniversaries for a given month
@@ -50,8 +60,15 @@ def extract_anniversaries(html: str, month: str) -> list[str]:
                                 '{Month} {day}: Event 1 (maybe some parentheses); Event 2; Event 3, something, something\n'
                                 {Month} can be any month in the namespace and {day} is a number 1-31
     """
+    from bs4 import BeautifulSoup
+
     # Parse the HTML with BeautifulSoup
-    soup = BeautifulSoup(html, 'html.parser')
+    if isinstance(html, Document):
+        soup = html.soup
+    elif isinstance(html, bytes):
+        soup = BeautifulSoup(html, 'html.parser', from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, 'html.parser')
 
     # Find all paragraph elements
     paragraphs = soup.find_all('p')
@@ -83,6 +100,8 @@ def anniversary_list_to_df(ann_list: list[str]) -> pd.DataFrame:
     Returns:
         df (pd.Dataframe): A (dense) dataframe with columns ["Date"] and ["Event"] where each row represents a single event
     """
+    import pandas as pd
+
     # Initialize an empty list to store the data
     data = []
 
@@ -141,25 +160,41 @@ def anniversary_table(
     for month in month_list:
         # Construct URL for the month-specific page
         page_url = f"{namespace_url}{month}"
-        # Send GET request to the URL
-        response = requests.get(page_url)
-        # Get the HTML content from the response
-        html = response.text
+        # Get the HTML content of the page
+        html = get_html(page_url)
 
         # Extract list of anniversaries from the HTML
         ann_list = extract_anniversaries(html, month)
-        # Convert list of anniversaries to DataFrame
-        df = anniversary_list_to_df(ann_list)
+        with timed("extract", "anniversary_table"):
+            # Convert list of anniversaries to DataFrame
+            df = anniversary_list_to_df(ann_list)
+
+        write_anniversary_table(df, month, output_dir)
+
 
+def write_anniversary_table(df: pd.DataFrame, month: str, output_dir: str | Path) -> Path:
+    """Save the anniversaries of a month as a markdown table
+
+    Parameters:
+        - df (pd.DataFrame): the anniversaries, see anniversary_list_to_df
+        - month (str): the month, naming the file anniversaries_{month}.md
+        - output_dir (str | Path): the directory to write the table to
+
+    Returns:
+        - path (Path): the markdown file
+    """
+    path = Path(output_dir) / f"anniversaries_{month.lower()}.md"
+    with timed("write", "anniversary_table"):
         # Convert DataFrame to markdown table
         table = df.to_markdown(index=False)
         # Write markdown table to file
-        with open(output_dir / f"anniversaries_{month.lower()}.md", 'w', encoding='utf-8') as f:
+        with open(path, 'w', encoding='utf-8') as f:
             f.write(table)
+    return path
 
 
 if __name__ == "__main__":
     # make tables for all the months
-    work_dir = 'C:/Users/crist/OneDrive/Desktop/IN3110/IN3110-cristila/assignment4'
+    work_dir = Path(__file__).parent
     namespace_url = "https://en.wikipedia.org/wiki/Wikipedia:Selected_anniversaries/"
     anniversary_table(namespace_url, months_in_namespace, work_dir)
@@ -0,0 +1,244 @@
+"""
+Harvesting the images of wiki pages
+
+Extends `filter_urls.find_img_src` with the `srcset` and `width` attributes of the images,
+to download the smallest variant at least as wide as needed instead of the original.
+Images are downloaded concurrently, and stored once per content, named by their hash.
+"""
+from __future__ import annotations
+
+import hashlib
+import html as html_lib
+import json
+import os
+import re
+from collections import namedtuple
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from document import Document
+
+# The attributes of a tag, with double quoted, single quoted or unquoted values
+attribute_pat = re.compile(r"""([\w-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+# The URL of a srcset candidate, after the separators of the previous one
+candidate_pat = re.compile(r"[\s,]*(\S+)")
+
+# File in the output directory mapping each downloaded URL to its file
+manifest_name = "images.json"
+
+# An img tag: its src, its srcset candidates as (url, width, density), and its width attribute
+Image = namedtuple("Image", ["src", "srcset", "width"])
+
+
+def parse_srcset(srcset: str) -> list[tuple[str, int | None, float | None]]:
+    """Parse the candidates of a srcset attribute
+
+    turns 'a.png 1.5x, b.png 2x' into [('a.png', None, 1.5), ('b.png', None, 2.0)]
+    and 'a.png 320w, b.png 640w' into [('a.png', 320, None), ('b.png', 640, None)]
+
+    Arguments:
+        srcset (str): the attribute value
+    Returns:
+        candidates (list[tuple[str, int | None, float | None]]): (url, width, pixel density)
+            of each candidate, a candidate without descriptor has density 1
+    """
+    candidates = []
+    pos = 0
+    while pos < len(srcset):
+        # URLs may contain commas, they end at white space, or at commas ending the candidate
+        match = candidate_pat.match(srcset, pos)
+        if match is None:
+            break
+        url = match.group(1)
+        pos = match.end()
+        descriptor = ""
+        if url.endswith(","):
+            url = url.rstrip(",")
+        else:
+            end = srcset.find(",", pos)
+            end = len(srcset) if end < 0 else end
+            descriptor = srcset[pos:end].strip()
+            pos = end + 1
+        width, density = None, None
+        try:
+            if descriptor.endswith("w"):
+                width = int(descriptor[:-1])
+            elif descriptor.endswith("x"):
+                density = float(descriptor[:-1])
+            elif not descriptor:
+                density = 1.0
+            else:
+                raise ValueError(descriptor)
+        except ValueError:
+            # Ignore invalid candidates, as browsers do
+            continue
+        if url:
+            candidates.append((url, width, density))
+    return candidates
+
+
+def find_images(html: str | bytes | Document, encoding: str = "utf-8") -> list[Image]:
+    """Find the img tags of an HTML string, with their srcset and width
+
+    Arguments:
+        html (str | bytes | Document): some HTML, the raw page (see get_html), or a Document
+            whose img tags are scanned once
+        encoding (str): encoding of `html` when it is bytes
+    Returns:
+        images (list[Image]): the images with a src attribute, in order of appearance
+    """
+    images = []
+    # The img tags are found as in find_img_src, only the tags of raw pages are decoded
+    if not isinstance(html, Document):
+        html = Document(html, encoding=encoding)
+    img_tags = html.img_tags
+    for img_tag in img_tags:
+        attributes = {
+            # Only the group of the quoting used is not empty
+            name.lower(): html_lib.unescape(double or single or bare)
+            for name, double, single, bare in attribute_pat.findall(img_tag)
+        }
+        if "src" not in attributes:
+            continue
+        width = attributes.get("width", "")
+        images.append(
+            Image(
+                src=attributes["src"],
+                srcset=parse_srcset(attributes.get("srcset", "")),
+                width=int(width) if width.isdigit() else None,
+            )
+        )
+    return images
+
+
+def normalize_image_url(url: str, base_url: str = "https://en.wikipedia.org") -> str:
+    """Make an image URL absolute
+
+    turns '//upload.wikimedia.org/a.png' into 'https://upload.wikimedia.org/a.png'
+
+    Arguments:
+        url (str): the URL, absolute, protocol-relative or relative
+        base_url (str): URL of the page the image is on
+    Returns:
+        url (str): the absolute URL
+    """
+    return urljoin(base_url, url)
+
+
+def choose_image_url(image: Image, target_width: int | None = None) -> str:
+    """Choose the smallest variant of an image at least `target_width` pixels wide
+
+    The width of the variants is given by their `w` descriptors, or by their pixel density
+    times the width of the img tag. Without any variant wide enough, the widest is chosen.
+
+    Arguments:
+        image (Image): the image, see find_images
+        target_width (int, optional): the width needed, by default the src
+    Returns:
+        url (str): the URL of the chosen variant
+    """
+    if target_width is None:
+        return image.src
+    variants = [(image.width, image.src)] if image.width else []
+    for url, width, density in image.srcset:
+        if width is None and density is not None and image.width:
+            width = round(image.width * density)
+        if width is not None:
+            variants.append((width, url))
+    if not variants:
+        return image.src
+    wide_enough = [variant for variant in variants if variant[0] >= target_width]
+    if wide_enough:
+        return min(wide_enough)[1]
+    return max(variants)[1]
+
+
+def download(url: str) -> bytes:
+    """Download the content at `url`"""
+    import requests
+
+    response = requests.get(url)
+    response.raise_for_status()
+    return response.content
+
+
+def store(data: bytes, url: str, output_dir: Path) -> Path:
+    """Write `data` to `output_dir`, named by its sha256 hash and the extension of `url`
+
+    The same content is only written once, whichever URL it came from.
+    """
+    suffix = Path(urlparse(url).path).suffix.lower()
+    path = output_dir / (hashlib.sha256(data).hexdigest() + suffix)
+    if not path.exists():
+        # Write to a temporary file first, so the file is never seen half written
+        tmp_path = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return path
+
+
+def harvest_images(
+    pages: Iterable[tuple[str, str | bytes | Document]],
+    output_dir: str | Path,
+    target_width: int | None = 320,
+    max_workers: int = 8,
+) -> dict[str, Path]:
+    """Download the images of several pages
+
+    URLs downloaded before into `output_dir` (recorded in its manifest) are not downloaded
+    again, and identical images are stored once.
+
+    Arguments:
+        pages (Iterable[tuple[str, str | bytes | Document]]): (url, html) of each page, e.g. from get_html_many
+        output_dir (str | Path): the directory to store the images in
+        target_width (int, optional): download the smallest variant of each image at least this
+            wide, see choose_image_url. With None, the src of the images is downloaded.
+        max_workers (int): number of images downloaded at the same time
+    Returns:
+        files (dict[str, Path]): image URL -> the file it is stored in, for every image
+            of the pages that could be downloaded
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / manifest_name
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    urls = []
+    for page_url, html in pages:
+        for image in find_images(html):
+            urls.append(normalize_image_url(choose_image_url(image, target_width), page_url))
+    urls = list(dict.fromkeys(urls))
+
+    files = {
+        url: output_dir / manifest[url]
+        for url in urls
+        if url in manifest and (output_dir / manifest[url]).exists()
+    }
+    missing = [url for url in urls if url not in files]
+
+    def fetch(url: str) -> Path | None:
+        try:
+            return store(download(url), url, output_dir)
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for url, path in zip(missing, executor.map(fetch, missing)):
+            if path is not None:
+                files[url] = path
+                manifest[url] = path.name
+
+    # Record the downloaded URLs, written to a temporary file first so the manifest is never half written
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return files
@@ -0,0 +1,214 @@
+"""
+Timings and counters of the fetch, decode, parse, extract and write stages
+
+Disabled by default, where every hook costs one global lookup. Enable it with `enable()`,
+or by setting $WIKI_METRICS before the modules are imported. The hooks record
+
+  - wiki_stage_seconds{stage, function}: latency histogram of each instrumented stage
+  - wiki_pages_fetched_total{status}, wiki_fetched_bytes_total: the requests made
+  - wiki_cache_hits_total{cache}, wiki_cache_misses_total{cache}: the cache lookups
+
+and are exported with `to_json` or `to_prometheus` (the Prometheus text format),
+or written to a file with `write_metrics`.
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+# Environment variable enabling the metrics at import time
+metrics_variable = "WIKI_METRICS"
+
+enabled = bool(os.environ.get(metrics_variable))
+
+# Upper bounds of the latency histogram buckets, in seconds
+latency_buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Help text of the metrics, for the Prometheus export
+descriptions = {
+    "wiki_stage_seconds": "Time spent in each stage of the instrumented functions",
+    "wiki_pages_fetched_total": "Pages requested, by HTTP status",
+    "wiki_fetched_bytes_total": "Bytes received",
+    "wiki_cache_hits_total": "Lookups answered by a cache",
+    "wiki_cache_misses_total": "Lookups a cache could not answer",
+}
+
+# (metric, sorted labels) -> value, and -> [count of each bucket..., count above the buckets, sum]
+counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+histograms: dict[tuple[str, tuple[tuple[str, str], ...]], list[float]] = {}
+lock = threading.Lock()
+
+
+def enable() -> None:
+    """Start recording"""
+    global enabled
+    enabled = True
+
+
+def disable() -> None:
+    """Stop recording, the recorded metrics are kept"""
+    global enabled
+    enabled = False
+
+
+def reset() -> None:
+    """Forget the recorded metrics"""
+    with lock:
+        counters.clear()
+        histograms.clear()
+
+
+def count(metric: str, value: float = 1, **labels: str) -> None:
+    """Add `value` to a counter"""
+    if not enabled:
+        return
+    key = (metric, tuple(sorted(labels.items())))
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(metric: str, value: float, **labels: str) -> None:
+    """Record `value` in a histogram"""
+    if not enabled:
+        return
+    key = (metric, tuple(sorted(labels.items())))
+    with lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(latency_buckets) + 2)
+        # Buckets are cumulative when exported, each value is counted in its own bucket here
+        histogram[bisect.bisect_left(latency_buckets, value)] += 1
+        histogram[-1] += value
+
+
+class timed:
+    """Time a stage, as a context manager or as a decorator
+
+        with timed("write", "anniversary_table"):
+            ...
+
+        @timed("parse", "find_urls")
+        def find_urls(...):
+
+    Arguments:
+        stage (str): the stage, e.g. "fetch", "decode", "parse", "extract" or "write"
+        function (str): name of the function the stage is part of
+    """
+
+    __slots__ = ("stage", "function", "start")
+
+    def __init__(self, stage: str, function: str):
+        self.stage = stage
+        self.function = function
+        self.start = None
+
+    def __enter__(self) -> timed:
+        if enabled:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.start is not None:
+            seconds = time.perf_counter() - self.start
+            observe("wiki_stage_seconds", seconds, stage=self.stage, function=self.function)
+            self.start = None
+
+    def __call__(self, func: Callable) -> Callable:
+        stage, function = self.stage, self.function
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            # A new timer per call, the calls may overlap in threads or recursion
+            with timed(stage, function):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def snapshot() -> dict:
+    """The recorded metrics
+
+    Returns:
+        metrics (dict): {"counters": [{"name", "labels", "value"}, ...],
+            "histograms": [{"name", "labels", "buckets": {bound: cumulative count}, "count", "sum"}, ...]}
+    """
+    with lock:
+        counter_items = sorted(counters.items())
+        histogram_items = sorted((key, list(values)) for key, values in histograms.items())
+    result = {"counters": [], "histograms": []}
+    for (name, labels), value in counter_items:
+        result["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), values in histogram_items:
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip([*latency_buckets, "+Inf"], values):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        result["histograms"].append(
+            {"name": name, "labels": dict(labels), "buckets": buckets, "count": cumulative, "sum": values[-1]}
+        )
+    return result
+
+
+def to_json() -> str:
+    """The recorded metrics as JSON, see snapshot"""
+    return json.dumps(snapshot(), indent=1)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict[str, str], **extra: str) -> str:
+    labels = {**labels, **extra}
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    # Whole numbers without exponent, large byte counts included
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def to_prometheus() -> str:
+    """The recorded metrics in the Prometheus text exposition format"""
+    metrics = snapshot()
+    lines = []
+    described = set()
+
+    def describe(name, kind):
+        if name not in described:
+            described.add(name)
+            lines.append(f"# HELP {name} {descriptions.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for counter in metrics["counters"]:
+        describe(counter["name"], "counter")
+        lines.append(f"{counter['name']}{_labels(counter['labels'])} {_number(counter['value'])}")
+    for histogram in metrics["histograms"]:
+        name, labels = histogram["name"], histogram["labels"]
+        describe(name, "histogram")
+        for bound, cumulative in histogram["buckets"].items():
+            lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_number(histogram['sum'])}")
+        lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str | Path) -> None:
+    """Write the recorded metrics to `path`, as JSON if it ends with .json, else as Prometheus text"""
+    path = Path(path)
+    text = to_json() if path.suffix == ".json" else to_prometheus()
+    # Write to a temporary file first, so a scraper never reads half a file
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,82 @@
+"""
+Persistent cache of the links of wiki articles
+
+The links found on each page are stored in an SQLite database in write-ahead-log mode,
+so any number of race processes on a host can read it while one of them writes, and
+hub pages are only fetched once for all of them.
+"""
+from __future__ import annotations
+
+import time
+import zlib
+from pathlib import Path
+
+from instrumentation import count
+from sqlite_connections import ThreadConnections
+from table_cache import default_cache_dir
+
+schema = """
+CREATE TABLE IF NOT EXISTS links (
+    url TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    links BLOB NOT NULL
+)
+"""
+
+
+class LinkCache:
+    """Page URL -> linked article URLs, stored in an SQLite database
+
+    Arguments:
+        path (str | Path, optional): the database file, by default links.sqlite in
+            `$WIKI_CACHE_DIR/links`, or in memory (for this object only) if that is not set
+        ttl (float): number of seconds the links of a page are used before fetching it again
+        timeout (float): number of seconds to wait for another process writing to the database
+    """
+
+    def __init__(self, path: str | Path | None = None, ttl: float = 7 * 24 * 3600, timeout: float = 30):
+        if path is None:
+            directory = default_cache_dir("links")
+            path = directory / "links.sqlite" if directory is not None else None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        self.connections = ThreadConnections(path, timeout)
+        with self.connections.get() as db:
+            db.execute(schema)
+
+    def get(self, url: str) -> list[str] | None:
+        """Return the cached links of the page at `url`, or None if missing or older than the ttl"""
+        with self.connections.lock():
+            row = self.connections.get().execute(
+                "SELECT fetched_at, links FROM links WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or time.time() - row[0] >= self.ttl:
+            count("wiki_cache_misses_total", cache="links")
+            return None
+        count("wiki_cache_hits_total", cache="links")
+        data = zlib.decompress(row[1]).decode("utf-8")
+        return data.split("\n") if data else []
+
+    def put(self, url: str, links: list[str]) -> None:
+        """Store the links of the page at `url`"""
+        data = zlib.compress("\n".join(links).encode("utf-8"))
+        with self.connections.lock():
+            with self.connections.get() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO links (url, fetched_at, links) VALUES (?, ?, ?)",
+                    (url, time.time(), data),
+                )
+
+    def __len__(self) -> int:
+        with self.connections.lock():
+            return self.connections.get().execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self.connections.lock():
+            with self.connections.get() as db:
+                db.execute("DELETE FROM links")
@@ -0,0 +1,179 @@
+"""
+Compact bookkeeping of the pages found by a search
+
+Titles are interned to integer ids: each title is stored once, utf-8 encoded in a single
+bytes arena, and looked up through an open-addressed hash index of ids, itself a typed
+array, that probes by comparing the stored bytes. Parent pointers and frontiers are typed
+arrays of ids too, so every page found costs the bytes of its title plus 20 to 40 bytes,
+instead of well over 100 for a dict entry holding a full URL string.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+from array import array
+from collections.abc import Iterable
+
+# Id of the parent of a search root
+no_parent = -1
+
+# Free slot of the hash index of NodeTable
+empty = -1
+
+# Fullest the hash index gets before it is doubled
+max_load = 2 / 3
+
+
+class BloomFilter:
+    """Probabilistic set of strings: membership tests may give false positives, never false negatives
+
+    Arguments:
+        capacity (int): the number of strings the filter is sized for
+        error_rate (float): the false positive rate once `capacity` strings are added
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        if capacity < 1:
+            raise ValueError(f"{capacity} is an invalid capacity, must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError(f"{error_rate} is an invalid error rate, must be between 0 and 1")
+        # Optimal number of bits and of hash functions for the capacity and error rate
+        self.n_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: the k positions are h1 + i*h2, from one 128 bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.n_bits for i in range(self.n_hashes))
+
+    def add(self, item: str) -> None:
+        """Add a string to the set"""
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class NodeTable:
+    """Titles found by a search, each with an integer id and the id of the page it was found from
+
+    Arguments:
+        bloom_capacity (int, optional): expected number of titles. When given, a Bloom filter
+            is checked before the table, so most titles never seen before are recognized
+            without a lookup in the (large, cache unfriendly) table of a huge search.
+    """
+
+    def __init__(self, bloom_capacity: int | None = None):
+        # utf-8 titles, title i is arena[offsets[i]:offsets[i + 1]]
+        self.arena = bytearray()
+        self.offsets = array("q", [0])
+        self.parents = array("i")
+        # Open-addressed hash index: the id of each title at the slot its hash leads to, or the
+        # next free slot after it (linear probing). Its size is a power of two.
+        self.slots = array("q", [empty]) * 8
+        self.bloom = BloomFilter(bloom_capacity) if bloom_capacity else None
+
+    @classmethod
+    def from_arrays(
+        cls, arena: bytes, offsets: array, parents: array, bloom_capacity: int | None = None
+    ) -> NodeTable:
+        """Rebuild a table from its `arena`, `offsets` and `parents`, e.g. read back from a file
+
+        Arguments:
+            arena, offsets, parents: the attributes of the table to rebuild
+            bloom_capacity (int, optional): see NodeTable
+        Returns:
+            nodes (NodeTable): the table, with the same ids
+        """
+        nodes = cls(bloom_capacity)
+        nodes.arena = bytearray(arena)
+        nodes.offsets = array("q", offsets)
+        nodes.parents = array("i", parents)
+        # Title hashes differ between processes, index the titles again
+        nodes._reindex()
+        if nodes.bloom is not None:
+            for node in range(len(nodes)):
+                nodes.bloom.add(nodes.title(node))
+        return nodes
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __contains__(self, title: str) -> bool:
+        return self.id(title) is not None
+
+    def title(self, node: int) -> str:
+        """Return the title of the page with id `node`"""
+        return self.arena[self.offsets[node] : self.offsets[node + 1]].decode("utf-8")
+
+    def _slot(self, key: bytes) -> int:
+        """Index of the slot of the hash index holding the id of the title `key`,
+        or of the free slot it goes in"""
+        slots, offsets, arena = self.slots, self.offsets, self.arena
+        mask = len(slots) - 1
+        i = hash(key) & mask
+        while True:
+            node = slots[i]
+            if node == empty:
+                return i
+            # Compare the stored bytes in place, without copying them
+            start = offsets[node]
+            if offsets[node + 1] - start == len(key) and arena.startswith(key, start):
+                return i
+            i = (i + 1) & mask
+
+    def _reindex(self) -> None:
+        """Rebuild the hash index, large enough for one more title"""
+        size = 8
+        while (len(self) + 1) > size * max_load:
+            size *= 2
+        self.slots = array("q", [empty]) * size
+        mask = size - 1
+        for node in range(len(self)):
+            i = hash(bytes(self.arena[self.offsets[node] : self.offsets[node + 1]])) & mask
+            while self.slots[i] != empty:
+                i = (i + 1) & mask
+            self.slots[i] = node
+
+    def id(self, title: str) -> int | None:
+        """Return the id of `title`, or None if it was not found yet"""
+        if self.bloom is not None and title not in self.bloom:
+            return None
+        node = self.slots[self._slot(title.encode("utf-8"))]
+        return None if node == empty else node
+
+    def add(self, title: str, parent: int = no_parent) -> int | None:
+        """Add a title, found from the page with id `parent`
+
+        Arguments:
+            title (str): the page title
+            parent (int): id of the page linking to it, `no_parent` for a search root
+        Returns:
+            node (int | None): the id of the new page, or None if `title` was already found
+        """
+        key = title.encode("utf-8")
+        slot = self._slot(key)
+        if self.slots[slot] != empty:
+            return None
+        node = len(self.parents)
+        self.slots[slot] = node
+        if self.bloom is not None:
+            self.bloom.add(title)
+        self.arena += key
+        self.offsets.append(len(self.arena))
+        self.parents.append(parent)
+        if len(self) + 1 > len(self.slots) * max_load:
+            self._reindex()
+        return node
+
+    def path(self, node: int) -> list[str]:
+        """Return the titles from the search root to the page with id `node`"""
+        titles = []
+        while node != no_parent:
+            titles.append(self.title(node))
+            node = self.parents[node]
+        return titles[::-1]
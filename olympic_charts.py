@@ -0,0 +1,132 @@
+"""
+Rendering the charts of the Olympic reports
+
+Charts are described by plain dictionaries, rendered with the object-oriented
+Figure API on the Agg backend (no pyplot state), in parallel worker processes,
+and skipped when their data has not changed since they were last rendered.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Bump to re-render every chart after changing how charts are drawn
+chart_version = 1
+
+# File in the output directory recording the hash of every rendered chart
+manifest_name = ".chart_hashes.json"
+
+
+def bar_chart(
+    labels: list[str], series: list[tuple[list[int], str]], title: str
+) -> dict:
+    """Describe a stacked bar chart
+
+    Arguments:
+        labels (list[str]): the label of each bar
+        series (list[tuple[list[int], str]]): (values, color) of each layer of the bars, bottom first
+        title (str): the chart title
+    Returns:
+        chart (dict): the chart, as taken by `render_chart` and `render_charts`
+    """
+    return {
+        "kind": "stacked_bar",
+        "labels": [str(label) for label in labels],
+        "series": [
+            {"values": [int(value) for value in values], "color": color}
+            for values, color in series
+        ],
+        "title": title,
+    }
+
+
+def chart_hash(chart: dict) -> str:
+    """Hash the data of a chart, changing whenever the rendered image would"""
+    data = json.dumps({"version": chart_version, "chart": chart}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render_chart(chart: dict, path: str | Path) -> str:
+    """Draw a chart and save it to `path`
+
+    Arguments:
+        chart (dict): the chart, see `bar_chart`
+        path (str | Path): the image file to write
+    Returns:
+        path (str): the written file
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if chart["kind"] != "stacked_bar":
+        raise ValueError(f"{chart['kind']} is an invalid chart kind, must be 'stacked_bar'")
+
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    # Stack each layer on top of the ones below
+    bottom = [0] * len(chart["labels"])
+    for layer in chart["series"]:
+        ax.bar(chart["labels"], layer["values"], bottom=bottom, color=layer["color"])
+        bottom = [b + v for b, v in zip(bottom, layer["values"])]
+    ax.set_title(chart["title"])
+
+    fig.savefig(path)
+    return str(path)
+
+
+def render_charts(
+    charts: dict[str, dict], output_dir: str | Path, max_workers: int | None = None
+) -> list[str]:
+    """Render several charts into `output_dir`, in parallel worker processes
+
+    A chart is only rendered if its file is missing or its data changed since it was last rendered,
+    which is tracked by a hash per file in a manifest in `output_dir`.
+
+    Arguments:
+        charts (dict[str, dict]): file name -> chart, see `bar_chart`
+        output_dir (str | Path): the directory to write the images to
+        max_workers (int, optional): number of worker processes, by default one per CPU.
+            With 1, the charts are rendered in this process.
+    Returns:
+        rendered (list[str]): the file names that were (re-)rendered
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / manifest_name
+
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    hashes = {name: chart_hash(chart) for name, chart in charts.items()}
+    stale = [
+        name
+        for name in charts
+        if manifest.get(name) != hashes[name] or not (output_dir / name).exists()
+    ]
+
+    if len(stale) > 1 and max_workers != 1:
+        workers = min(max_workers or os.cpu_count() or 1, len(stale))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            paths = [output_dir / name for name in stale]
+            list(executor.map(render_chart, [charts[name] for name in stale], paths))
+    else:
+        for name in stale:
+            render_chart(charts[name], output_dir / name)
+
+    # Record the new hashes, written to a temporary file first so the manifest is never half written
+    manifest.update({name: hashes[name] for name in stale})
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+    return stale
@@ -0,0 +1,276 @@
+"""
+The nightly batch as one pipeline
+
+Builds a graph of tasks (fetch -> parse -> aggregate -> write) for the anniversary tables
+and the Olympic report, and runs every task as soon as the tasks it depends on are done,
+on a shared pool of threads. The anniversary months and the Olympic pages are fetched and
+parsed side by side, through the same `get_html` and parsed-table cache, and the wall time
+of each stage is reported at the end.
+
+    python pipeline.py --work-dir out --metrics out/metrics.prom
+"""
+from __future__ import annotations
+
+import time
+from collections import namedtuple
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+# A task: its name, the function computing it from the results of `deps`, and its stage
+Task = namedtuple("Task", ["name", "func", "deps", "stage"])
+
+# When a task ran, in seconds since the pipeline started, and why it failed if it did
+TaskTiming = namedtuple("TaskTiming", ["name", "stage", "start", "end", "error"])
+
+# The outcome of a run: task name -> result, and the timing of each task in order of completion
+PipelineRun = namedtuple("PipelineRun", ["results", "timings", "wall_time"])
+
+namespace_url = "https://en.wikipedia.org/wiki/Wikipedia:Selected_anniversaries/"
+olympic_url = "https://en.wikipedia.org/wiki/All-time_Olympic_Games_medal_table"
+
+
+class Pipeline:
+    """A graph of tasks, each one run once all its dependencies are done
+
+    Tasks are added after their dependencies, so the graph can't have cycles.
+    """
+
+    def __init__(self):
+        self.tasks: dict[str, Task] = {}
+
+    def add(self, name: str, func: Callable, deps: Sequence[str] = (), stage: str = "") -> str:
+        """Add a task
+
+        Arguments:
+            name (str): unique name of the task
+            func (Callable): called with the results of `deps`, in order
+            deps (Sequence[str]): names of the tasks this one needs
+            stage (str): the stage the task belongs to, e.g. "fetch", for the report
+        Returns:
+            name (str): the name of the task, to use in the `deps` of others
+        """
+        if name in self.tasks:
+            raise ValueError(f"A task named {name!r} was already added")
+        missing = [dep for dep in deps if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"{name!r} depends on unknown tasks {missing}, add them first")
+        self.tasks[name] = Task(name, func, tuple(deps), stage)
+        return name
+
+    def run(self, max_workers: int = 8) -> PipelineRun:
+        """Run every task, the independent ones concurrently
+
+        A task that raises is reported with `print`, and the tasks depending on it are skipped.
+
+        Arguments:
+            max_workers (int): number of tasks run at the same time
+        Returns:
+            run (PipelineRun): the results and timings of the tasks
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        results = {}
+        timings = []
+        # Tasks left to start, in the order they were added
+        waiting = dict(self.tasks)
+        failed = set()
+        start = time.monotonic()
+
+        def call(task):
+            task_start = time.monotonic() - start
+            value = task.func(*[results[dep] for dep in task.deps])
+            return task_start, value
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running = {}
+            while waiting or running:
+                for task in list(waiting.values()):
+                    if any(dep in failed for dep in task.deps):
+                        # Skipped tasks count as failed, for the tasks depending on them
+                        del waiting[task.name]
+                        failed.add(task.name)
+                        now = time.monotonic() - start
+                        timings.append(TaskTiming(task.name, task.stage, now, now, "skipped"))
+                    elif all(dep in results for dep in task.deps):
+                        del waiting[task.name]
+                        running[executor.submit(call, task)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    end = time.monotonic() - start
+                    try:
+                        task_start, results[task.name] = future.result()
+                        timings.append(TaskTiming(task.name, task.stage, task_start, end, None))
+                    except Exception as e:
+                        print(f"Error: {task.name}: {e}")
+                        failed.add(task.name)
+                        timings.append(TaskTiming(task.name, task.stage, end, end, str(e)))
+        return PipelineRun(results, timings, time.monotonic() - start)
+
+
+def stage_times(timings: Sequence[TaskTiming]) -> dict[str, float]:
+    """Wall time of each stage: the time at least one of its tasks was running
+
+    Arguments:
+        timings (Sequence[TaskTiming]): the timings of a run
+    Returns:
+        seconds (dict[str, float]): stage -> seconds, in order of first start
+    """
+    intervals = {}
+    for timing in sorted(timings, key=lambda timing: timing.start):
+        intervals.setdefault(timing.stage, []).append((timing.start, timing.end))
+    seconds = {}
+    for stage, spans in intervals.items():
+        total = 0.0
+        current_start, current_end = spans[0]
+        # Merge the overlapping spans, the tasks of a stage run concurrently
+        for span_start, span_end in spans[1:]:
+            if span_start > current_end:
+                total += current_end - current_start
+                current_start, current_end = span_start, span_end
+            else:
+                current_end = max(current_end, span_end)
+        seconds[stage] = total + current_end - current_start
+    return seconds
+
+
+def nightly_pipeline(
+    work_dir: str | Path,
+    months: Sequence[str] | None = None,
+    sports: Sequence[str] | None = None,
+    anniversaries_url: str = namespace_url,
+    medal_table_url: str = olympic_url,
+    max_workers: int = 8,
+    render_workers: int | None = None,
+    anniversaries: bool = True,
+    olympics: bool = True,
+) -> Pipeline:
+    """The tasks of the anniversary tables and of the Olympic report
+
+    Writes the same files as `anniversary_table` and `report_scandi_stats`.
+
+    Arguments:
+        work_dir (str | Path): the directory to write the tables and charts to
+        months (Sequence[str], optional): the months to make anniversary tables for, by default all
+        sports (Sequence[str], optional): the summer sports to report on, by default `summer_sports`
+        anniversaries_url (str): URL of the "Wikipedia:Selected_anniversaries/" namespace
+        medal_table_url (str): URL of the 'All-time Olympic Games medal table' page
+        max_workers (int): number of country pages downloaded at the same time
+        render_workers (int, optional): number of processes rendering the charts, by default one per CPU
+        anniversaries (bool): include the anniversary tables
+        olympics (bool): include the Olympic report
+    Returns:
+        pipeline (Pipeline): the tasks, to `run`
+    """
+    import fetch_olympic_statistics as olympic
+    import find_anniversaries
+    from requesting_urls import get_html
+
+    work_dir = Path(work_dir)
+    pipeline = Pipeline()
+
+    if anniversaries:
+        output_dir = work_dir / "tables_of_anniversaries"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for month in months or find_anniversaries.months_in_namespace:
+            # Bind the month now, not when the task runs
+            fetch = pipeline.add(
+                f"fetch {month}",
+                lambda url=f"{anniversaries_url}{month}": get_html(url, raw=True),
+                stage="fetch",
+            )
+            parse = pipeline.add(
+                f"parse {month}",
+                lambda html, month=month: find_anniversaries.extract_anniversaries(html, month),
+                [fetch],
+                stage="parse",
+            )
+            table = pipeline.add(
+                f"aggregate {month}", find_anniversaries.anniversary_list_to_df, [parse], stage="aggregate"
+            )
+            pipeline.add(
+                f"write {month}",
+                lambda df, month=month: find_anniversaries.write_anniversary_table(df, month, output_dir),
+                [table],
+                stage="write",
+            )
+
+    if olympics:
+        sports = list(sports or olympic.summer_sports)
+        medal_page = pipeline.add(
+            "fetch medal table", lambda: olympic.get_page(medal_table_url), stage="fetch"
+        )
+        # The pages go through the parsed-table cache of the module, an unchanged revision isn't parsed again
+        countries = pipeline.add(
+            "parse medal table",
+            lambda html: olympic.get_scandi_stats(medal_table_url, html=html),
+            [medal_page],
+            stage="parse",
+        )
+        country_pages = pipeline.add(
+            "fetch country pages",
+            lambda country_dict: olympic.fetch_country_pages(country_dict, max_workers),
+            [countries],
+            stage="fetch",
+        )
+        sport_stats = pipeline.add(
+            "parse country pages", olympic.parse_country_pages, [countries, country_pages], stage="parse"
+        )
+        report = pipeline.add(
+            "aggregate olympic report",
+            lambda country_dict, stats: olympic.scandi_report(country_dict, stats, sports),
+            [countries, sport_stats],
+            stage="aggregate",
+        )
+        pipeline.add(
+            "render olympic report",
+            lambda report: olympic.write_scandi_report(
+                *report, work_dir / "olympic_games_results", render_workers
+            ),
+            [report],
+            stage="render",
+        )
+    return pipeline
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Make the anniversary tables and the Olympic report")
+    parser.add_argument("--work-dir", default=".", help="directory to write the results to")
+    parser.add_argument("--months", nargs="+", help="months to make anniversary tables for, by default all")
+    parser.add_argument("--sports", nargs="+", help="summer sports to report on")
+    parser.add_argument("--only", choices=["anniversaries", "olympics"], help="only run one of the two")
+    parser.add_argument("--workers", type=int, default=8, help="number of tasks run at the same time")
+    parser.add_argument("--render-workers", type=int, help="number of processes rendering the charts")
+    parser.add_argument("--metrics", help="write the metrics to this file, as JSON if it ends with .json")
+    args = parser.parse_args()
+
+    if args.metrics:
+        import instrumentation
+
+        instrumentation.enable()
+
+    pipeline = nightly_pipeline(
+        args.work_dir,
+        months=args.months,
+        sports=args.sports,
+        max_workers=args.workers,
+        render_workers=args.render_workers,
+        anniversaries=args.only != "olympics",
+        olympics=args.only != "anniversaries",
+    )
+    run = pipeline.run(max_workers=args.workers)
+
+    for stage, seconds in stage_times(run.timings).items():
+        print(f"{stage:<10} {seconds:8.2f} s")
+    print(f"{'total':<10} {run.wall_time:8.2f} s")
+    failed = [timing.name for timing in run.timings if timing.error is not None]
+    if args.metrics:
+        instrumentation.write_metrics(args.metrics)
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        raise SystemExit(1)
@@ -0,0 +1,135 @@
+"""
+Checkpoints of wiki race searches
+
+The state of a level by level search (the table of found articles with their parents,
+the level being expanded and how far it got, and the next level so far) is written to
+a single compact file, so a restarted search continues without fetching any page again.
+
+File layout: magic, header length (4 bytes, little endian), JSON header,
+then the zlib compressed arrays, one after the other, in the order of `array_names`.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from node_table import NodeTable
+
+magic = b"WRCK1\n"
+
+# Arrays of a checkpoint, with their typecodes
+array_names = {"offsets": "q", "parents": "i", "level": "i", "next_level": "i"}
+
+
+@dataclass
+class SearchState:
+    """Everything needed to continue a level by level search
+
+    Arguments:
+        start (str): URL of the start article
+        targets (dict[str, list[str]]): finish article title -> finish URLs
+        nodes (NodeTable): the articles found so far
+        level (array): ids of the articles of the level being expanded
+        position (int): number of articles of `level` already expanded
+        next_level (array): ids of the articles found from them
+        depth (int): the depth of `level`
+        found (dict[str, int]): finish article title -> id, for the finishes found so far
+        max_depth (int, optional): see find_paths
+    """
+
+    start: str
+    targets: dict[str, list[str]]
+    nodes: NodeTable
+    level: array = field(default_factory=lambda: array("i", [0]))
+    position: int = 0
+    next_level: array = field(default_factory=lambda: array("i"))
+    depth: int = 0
+    found: dict[str, int] = field(default_factory=dict)
+    max_depth: int | None = None
+
+
+def save_checkpoint(path: str | Path, state: SearchState) -> None:
+    """Write the state of a search to `path`, replacing any previous checkpoint at once
+
+    Arguments:
+        path (str | Path): the checkpoint file
+        state (SearchState): the search state
+    """
+    path = Path(path)
+    arrays = {
+        "offsets": state.nodes.offsets,
+        "parents": state.nodes.parents,
+        "level": state.level,
+        "next_level": state.next_level,
+    }
+    header = {
+        "start": state.start,
+        "targets": state.targets,
+        "found": state.found,
+        "position": state.position,
+        "depth": state.depth,
+        "max_depth": state.max_depth,
+        "byteorder": sys.byteorder,
+        "arena": len(state.nodes.arena),
+        "lengths": {name: len(arrays[name]) for name in array_names},
+    }
+    header = json.dumps(header).encode("utf-8")
+    body = zlib.compress(
+        bytes(state.nodes.arena) + b"".join(arrays[name].tobytes() for name in array_names)
+    )
+
+    # Write to a temporary file first, so a crash never leaves a half written checkpoint
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(magic + len(header).to_bytes(4, "little") + header + body)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str | Path, bloom_capacity: int | None = None) -> SearchState:
+    """Read a checkpoint written by `save_checkpoint`
+
+    Arguments:
+        path (str | Path): the checkpoint file
+        bloom_capacity (int, optional): see NodeTable
+    Returns:
+        state (SearchState): the search state
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(magic):
+        raise ValueError(f"{path} is not a wiki race checkpoint")
+    size = int.from_bytes(data[len(magic) : len(magic) + 4], "little")
+    header_end = len(magic) + 4 + size
+    header = json.loads(data[len(magic) + 4 : header_end].decode("utf-8"))
+    body = memoryview(zlib.decompress(data[header_end:]))
+
+    arena = body[: header["arena"]]
+    offset = header["arena"]
+    arrays = {}
+    for name, typecode in array_names.items():
+        values = array(typecode)
+        n_bytes = header["lengths"][name] * values.itemsize
+        values.frombytes(body[offset : offset + n_bytes])
+        if header["byteorder"] != sys.byteorder:
+            values.byteswap()
+        arrays[name] = values
+        offset += n_bytes
+
+    nodes = NodeTable.from_arrays(arena, arrays["offsets"], arrays["parents"], bloom_capacity)
+    return SearchState(
+        start=header["start"],
+        targets=header["targets"],
+        nodes=nodes,
+        level=arrays["level"],
+        position=header["position"],
+        next_level=arrays["next_level"],
+        depth=header["depth"],
+        found=header["found"],
+        max_depth=header["max_depth"],
+    )
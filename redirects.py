@@ -0,0 +1,185 @@
+"""
+Resolving article titles to their canonical form
+
+Titles are normalized as MediaWiki does (percent-encoding, underscores, first letter case),
+then redirects (`/wiki/UK` -> `/wiki/United_Kingdom`) are resolved in batches with the
+MediaWiki query API. The resolved titles are memoized, in memory and optionally in an
+SQLite database shared by every process on the host.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from filter_urls import article_title, article_url, canonical_title
+from requesting_urls import get_html
+from sqlite_connections import ThreadConnections
+from table_cache import default_cache_dir
+
+# Number of titles the MediaWiki API accepts per query
+api_batch_size = 50
+
+schema = """
+CREATE TABLE IF NOT EXISTS redirects (
+    wiki TEXT NOT NULL,
+    title TEXT NOT NULL,
+    target TEXT NOT NULL,
+    resolved_at REAL NOT NULL,
+    PRIMARY KEY (wiki, title)
+)
+"""
+
+
+class RedirectResolver:
+    """Map article titles of a wiki to the title of the article they redirect to
+
+    Arguments:
+        api_url (str): URL of the MediaWiki API of the wiki, e.g. https://en.wikipedia.org/w/api.php
+        base_url (str, optional): base url of the article URLs of the wiki, by default
+            the scheme and host of `api_url`
+        path (str | Path, optional): database file to persist the resolved titles to,
+            by default redirects.sqlite in `$WIKI_CACHE_DIR/redirects` if that is set
+        ttl (float): number of seconds a resolved title is used before asking the API again
+        timeout (float): number of seconds to wait for another process writing to the database
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        base_url: str | None = None,
+        path: str | Path | None = None,
+        ttl: float = 30 * 24 * 3600,
+        timeout: float = 30,
+    ):
+        self.api_url = api_url
+        parts = urlparse(api_url)
+        self.base_url = base_url or f"{parts.scheme}://{parts.netloc}"
+        self.wiki = parts.netloc
+        if path is None:
+            directory = default_cache_dir("redirects")
+            path = directory / "redirects.sqlite" if directory is not None else None
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        # title -> target, for the titles resolved by this object
+        self.memory: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.connections = ThreadConnections(self.path, timeout)
+        if self.path is not None:
+            with self.connections.get() as db:
+                db.execute(schema)
+
+    def _load(self, titles: list[str]) -> dict[str, str]:
+        """Find the fresh resolved titles in the database"""
+        if self.path is None or not titles:
+            return {}
+        resolved = {}
+        db = self.connections.get()
+        # Stay well below the limit on the number of query parameters
+        for i in range(0, len(titles), 500):
+            batch = titles[i : i + 500]
+            rows = db.execute(
+                f"SELECT title, target FROM redirects WHERE wiki = ? AND resolved_at > ? "
+                f"AND title IN ({','.join('?' * len(batch))})",
+                (self.wiki, time.time() - self.ttl, *batch),
+            )
+            resolved.update(rows)
+        return resolved
+
+    def _store(self, resolved: dict[str, str]) -> None:
+        if self.path is None or not resolved:
+            return
+        now = time.time()
+        with self.connections.get() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO redirects (wiki, title, target, resolved_at) VALUES (?, ?, ?, ?)",
+                [(self.wiki, title, target, now) for title, target in resolved.items()],
+            )
+
+    def query(self, titles: list[str], max_hops: int = 3) -> dict[str, str]:
+        """Ask the API what `titles` redirect to, in batches of `api_batch_size`
+
+        Arguments:
+            titles (list[str]): normalized titles
+            max_hops (int): number of redirects followed from a title, the API only follows
+                one, double redirects are resolved with more queries
+        Returns:
+            resolved (dict[str, str]): title -> the title it redirects to, or itself
+        """
+        resolved = {}
+        # Redirect targets which are redirects themselves
+        redirecting = set()
+        for i in range(0, len(titles), api_batch_size):
+            batch = titles[i : i + api_batch_size]
+            params = {
+                "action": "query",
+                "format": "json",
+                "formatversion": "2",
+                "redirects": "1",
+                "titles": "|".join(batch),
+            }
+            response = json.loads(get_html(self.api_url, params=params, raw=True)).get("query", {})
+            steps = {}
+            for step in response.get("normalized", []) + response.get("redirects", []):
+                steps[step["from"]] = step["to"]
+            redirecting.update(page["title"] for page in response.get("pages", []) if page.get("redirect"))
+            for title in batch:
+                # Follow the normalization, then the redirect, without looping on a redirect cycle
+                target, seen = title, {title}
+                while target in steps and steps[target] not in seen:
+                    target = steps[target]
+                    seen.add(target)
+                resolved[title] = target
+
+        again = sorted(redirecting & set(resolved.values()))
+        if again and max_hops > 1:
+            further = self.query(again, max_hops - 1)
+            resolved = {title: further.get(target, target) for title, target in resolved.items()}
+        return resolved
+
+    def resolve(self, titles: Iterable[str]) -> dict[str, str]:
+        """Resolve article titles, from memory, the database, or else the API
+
+        Arguments:
+            titles (Iterable[str]): article titles, in any form (percent-encoded, with underscores)
+        Returns:
+            resolved (dict[str, str]): each title -> the title of the article it stands for
+        """
+        normalized = {title: canonical_title(title) for title in titles}
+        with self.lock:
+            known = {title: self.memory[title] for title in normalized.values() if title in self.memory}
+        missing = sorted(set(normalized.values()) - set(known))
+        if missing:
+            stored = self._load(missing)
+            queried = self.query([title for title in missing if title not in stored])
+            self._store(queried)
+            known.update(stored)
+            known.update(queried)
+            with self.lock:
+                self.memory.update(stored)
+                self.memory.update(queried)
+        return {title: known[normal] for title, normal in normalized.items()}
+
+    def resolve_urls(self, urls: Iterable[str]) -> list[str]:
+        """Resolve the article URLs of this wiki to the URLs of the articles they stand for
+
+        Arguments:
+            urls (Iterable[str]): URLs, those not on this wiki are left as they are
+        Returns:
+            urls (list[str]): the resolved URLs, in the same order
+        """
+        urls = list(urls)
+        prefix = urljoin(self.base_url, "/wiki/")
+        titles = [article_title(url) for url in urls if url.startswith(prefix)]
+        resolved = self.resolve(titles)
+        return [
+            article_url(resolved[article_title(url)], self.base_url) if url.startswith(prefix) else url
+            for url in urls
+        ]
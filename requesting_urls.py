@@ -3,10 +3,19 @@ Task 1.1 - requesting HTML documents with HTTP
 """
 from __future__ import annotations
 
-import requests
+import logging
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from instrumentation import count, timed
 
-def get_html(url: str, params: dict | None = None, output: str | None = None):
+logger = logging.getLogger(__name__)
+
+
+def get_html(
+    url: str, params: dict | None = None, output: str | None = None, raw: bool = False
+) -> str | bytes:
     """Get an HTML page and return its contents.
 
     Args:
@@ -16,21 +25,79 @@ def get_html(url: str, params: dict | None = None, output: str | None = None):
             URL parameters to add.
         output (str, optional):
             (optional) path where output should be saved.
+        raw (bool, optional):
+            Return the body as it was received, without decoding it. Decoding a page
+            whose charset is not declared makes requests guess it from the whole body,
+            which is slow on large pages, and copies it; the parsers accept the bytes.
     Returns:
-        html (str):
-            The HTML of the page, as text.
+        html (str | bytes):
+            The HTML of the page, as text, or as bytes with `raw`.
     """
+    import requests
+
     # passing the optional parameters argument to the get function
-    response = requests.get(url, params=params)
+    start = time.perf_counter()
+    with timed("fetch", "get_html"):
+        response = requests.get(url, params=params)
+    content = response.content
+    count("wiki_pages_fetched_total", status=str(response.status_code))
+    count("wiki_fetched_bytes_total", len(content))
+    logger.debug(
+        "GET %s: %s, %d bytes in %.3f s",
+        response.url, response.status_code, len(content), time.perf_counter() - start,
+    )
 
-    html_str = response.text
+    if raw:
+        if output:
+            # Same layout as below, with the body written as it was received
+            with timed("write", "get_html"), open(output, 'wb') as f:
+                f.write(response.url.encode('utf-8') + b'\n' + content)
+        return content
+
+    with timed("decode", "get_html"):
+        html_str = response.text
 
     if output:
         # if output is specified, the request url and text content are written
         # to the file at `output`.
         # The first line should be the URL,
         # and the rest of the file should be the response contents.
-        with open(output, 'w') as f:
+        with timed("write", "get_html"), open(output, 'w') as f:
             f.write(response.url + '\n' + html_str)
 
     return html_str
+
+
+def get_html_many(
+    urls: Iterable[str], params: dict | None = None, max_workers: int = 8, raw: bool = False
+) -> Iterator[tuple[str, str | bytes]]:
+    """Get several HTML pages concurrently, yielding each one as soon as it has arrived.
+
+    At most `max_workers` requests are in flight at a time. Since pages are yielded in
+    the order they finish downloading, the caller can parse one page while the
+    remaining ones are still being fetched.
+
+    Args:
+        urls (Iterable[str]):
+            The URLs to retrieve. Duplicates are only fetched once.
+        params (dict, optional):
+            URL parameters to add to every request.
+        max_workers (int, optional):
+            Maximum number of concurrent requests.
+        raw (bool, optional):
+            Yield the pages as bytes, see get_html.
+    Yields:
+        (url, html) (tuple[str, str | bytes]):
+            The requested URL and the HTML of the page, as text or bytes.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(get_html, url, params, None, raw): url for url in dict.fromkeys(urls)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            # Don't start the remaining downloads if the caller stops early
+            for future in futures:
+                future.cancel()
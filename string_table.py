@@ -0,0 +1,46 @@
+"""
+Strings stored as one utf-8 blob plus offsets
+
+The title table of wiki_graph and the term, date and event tables of anniversary_index are
+saved as two arrays each and memory-mapped back in; indexing decodes a single entry, so a
+table is never decoded as a whole.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class StringTable:
+    """Read-only sequence of strings stored as one utf-8 blob plus offsets
+
+    The strings are `blob[offsets[i]:offsets[i + 1]]`.
+
+    Arguments:
+        blob (np.ndarray): the encoded strings one after the other, as uint8
+        offsets (np.ndarray): start of each string in `blob`, followed by the length of `blob`
+    """
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: list[str]) -> StringTable:
+        """The table of `strings`, in order"""
+        import numpy as np
+
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.blob[start:end].tobytes().decode("utf-8")
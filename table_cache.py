@@ -0,0 +1,222 @@
+"""
+Caching parsed tables by page revision
+
+Parsed results are stored per (page URL, parser), together with the page revision they
+were parsed from, in an in-memory LRU tier and an optional on-disk tier.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from instrumentation import count
+
+# Environment variable pointing to a directory for the on-disk caches
+cache_dir_variable = "WIKI_CACHE_DIR"
+
+# MediaWiki pages embed their revision id in the page config
+revision_pat = re.compile(r'"wgRevisionId"\s*:\s*(\d+)')
+revision_bytes_pat = re.compile(revision_pat.pattern.encode())
+
+# Returned by the lookups when nothing is cached
+MISSING = object()
+
+
+def default_cache_dir(name: str) -> Path | None:
+    """Return the directory for the on-disk cache `name`, if caching to disk is enabled
+
+    Arguments:
+        name (str): sub-directory for this cache
+    Returns:
+        directory (Path | None): `$WIKI_CACHE_DIR/name`, or None when the variable is not set
+    """
+    root = os.environ.get(cache_dir_variable)
+    return Path(root) / name if root else None
+
+
+def url_revision(url: str) -> str | None:
+    """Return the revision a permanent link (with `oldid=`) points to, or None for other URLs"""
+    oldid = parse_qs(urlsplit(url).query).get("oldid")
+    return f"rev:{oldid[0]}" if oldid else None
+
+
+def html_revision(html: str | bytes) -> str:
+    """Return the revision id of a wiki page, or a hash of its content if it has none"""
+    # Search bytes as they are, rather than decoding the whole page
+    pattern = revision_pat if isinstance(html, str) else revision_bytes_pat
+    match = pattern.search(html)
+    if match:
+        revision = match.group(1)
+        return f"rev:{revision if isinstance(revision, str) else revision.decode()}"
+    data = html if isinstance(html, bytes) else html.encode("utf-8")
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+class TableCache:
+    """Two-tier cache of parsed pages, keyed by page URL, parser name and page revision
+
+    An entry younger than `ttl` seconds is used without any request. An older entry is
+    revalidated: the page is fetched again, and if its revision did not change the cached
+    result is used instead of parsing the page again. Permanent links (`oldid=`) never expire.
+
+    The in-memory tier keeps the `max_entries` most recently used entries. The on-disk tier,
+    enabled by `directory`, keeps `max_disk_entries` pickled entries and evicts the least
+    recently used files.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        ttl: float = 24 * 3600,
+        max_entries: int = 256,
+        max_disk_entries: int = 4096,
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        # (url, name) -> (revision, stored at, value)
+        self.memory: OrderedDict[tuple[str, str], tuple[str, float, object]] = OrderedDict()
+        self.lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: tuple[str, str]) -> Path:
+        digest = hashlib.sha256("\n".join(key).encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.pickle"
+
+    def _load(self, key: tuple[str, str]) -> tuple[str, float, object] | None:
+        """Find an entry in memory, or else on disk"""
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, *entry = pickle.load(f)
+            # Mark the file as recently used
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if tuple(stored_key) != key:
+            return None
+        entry = tuple(entry)
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: tuple[str, str], entry: tuple[str, float, object]) -> None:
+        """Put an entry in the memory tier, evicting the least recently used ones"""
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _store(self, key: tuple[str, str], entry: tuple[str, float, object]) -> None:
+        self._remember(key, entry)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        # Write to a temporary file first, so readers never see a half written entry
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, *entry), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        files = list(self.directory.glob("*.pickle"))
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=lambda path: path.stat().st_mtime)
+        for path in files[: len(files) - self.max_disk_entries]:
+            path.unlink(missing_ok=True)
+
+    def _fresh(self, url: str, entry: tuple[str, float, object]) -> bool:
+        revision, stored_at, _ = entry
+        if url_revision(url) == revision:
+            return True
+        return time.time() - stored_at < self.ttl
+
+    def get(self, url: str, name: str) -> object:
+        """Return the fresh cached result of parser `name` for `url`, or MISSING"""
+        entry = self._load((url, name))
+        if entry is None or not self._fresh(url, entry):
+            return MISSING
+        return entry[2]
+
+    def get_for_html(self, url: str, name: str, html: str | bytes) -> object:
+        """Return the cached result of parser `name` for `url` if it was parsed from the same
+        revision as `html`, or MISSING. A matching entry is refreshed."""
+        entry = self._load((url, name))
+        if entry is None or entry[0] != html_revision(html):
+            return MISSING
+        self._store((url, name), (entry[0], time.time(), entry[2]))
+        return entry[2]
+
+    def put(self, url: str, name: str, html: str | bytes, value: object) -> None:
+        """Store the result of parser `name` on the page `html` fetched from `url`"""
+        revision = url_revision(url) or html_revision(html)
+        self._store((url, name), (revision, time.time(), value))
+
+    def cached(
+        self, url: str, parse: Callable[[str], object], fetch: Callable[[str], str]
+    ) -> object:
+        """Return `parse(fetch(url))`, from the cache when possible
+
+        Arguments:
+            url (str): the page URL
+            parse (Callable[[str], object]): parser taking the page html, its qualified name
+                is used in the cache key
+            fetch (Callable[[str], str]): function fetching the page html
+        Returns:
+            value (object): the parsed result
+        """
+        name = f"{parse.__module__}.{parse.__qualname__}"
+        value = self.get(url, name)
+        if value is not MISSING:
+            count("wiki_cache_hits_total", cache="tables")
+            return value
+        return self.parsed(url, parse, fetch(url))
+
+    def parsed(self, url: str, parse: Callable[[str | bytes], object], html: str | bytes) -> object:
+        """Return `parse(html)` for the page `html` fetched from `url`, from the cache when the
+        page revision did not change, see cached
+
+        Arguments:
+            url (str): the page URL
+            parse (Callable[[str | bytes], object]): parser taking the page html, see cached
+            html (str | bytes): the page, already fetched
+        Returns:
+            value (object): the parsed result
+        """
+        name = f"{parse.__module__}.{parse.__qualname__}"
+        value = self.get_for_html(url, name, html)
+        if value is MISSING:
+            count("wiki_cache_misses_total", cache="tables")
+            value = parse(html)
+            self.put(url, name, html, value)
+        else:
+            # The page was fetched again, but had not changed
+            count("wiki_cache_hits_total", cache="tables", revalidated="true")
+        return value
+
+    def clear(self) -> None:
+        """Remove every entry, in memory and on disk"""
+        with self.lock:
+            self.memory.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*.pickle"):
+                path.unlink(missing_ok=True)
@@ -1,6 +1,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 assignment4 = Path(__file__).parent.parent.absolute()
 
 # Ensure assignment4 dir is on sys.path
@@ -36,3 +38,140 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "task44: mark test to run only tests for task 4.4"
     )
+
+
+class LocalWiki:
+    """A local stand-in for the wiki, serving pages from a dict
+
+    `pages` maps a path (with query string, if any) to either an HTML string,
+    or a callable taking the parsed query parameters and returning the response body.
+    Every requested path is recorded in `requests`.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        self.server = None
+
+    def url(self, path):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def count(self, path):
+        """Number of times `path` was requested"""
+        return self.requests.count(path)
+
+    def page_requests(self):
+        """The requested article paths, without the API requests"""
+        return [path for path in self.requests if path.startswith("/wiki/")]
+
+    def serve_graph(self, graph, api_limit=500, redirects=None):
+        """Serve articles linking to each other as in `graph` (title -> linked titles),
+        and a MediaWiki API at /w/api.php answering `linkshere` queries
+        with at most `api_limit` results per response.
+
+        `redirects` maps titles to the title of the article they redirect to: the article
+        is served at both, and the API resolves them in `redirects` queries."""
+        import json
+
+        from filter_urls import article_url, canonical_title
+
+        redirects = redirects or {}
+
+        linkshere = {}
+        for title, links in graph.items():
+            anchors = "".join(
+                f'<li><a href="{article_url(link, "")}" title="{link}">{link}</a></li>'
+                for link in links
+            )
+            self.pages[article_url(title, "")] = f"""<html><body>
+            <a href="#content">Jump to content</a>
+            <a href="/wiki/Special:Random">Random article</a>
+            <h1>{title}</h1><ul>{anchors}</ul>
+            <a href="https://www.example.com/">External</a>
+            </body></html>"""
+            for link in links:
+                linkshere.setdefault(link, []).append(title)
+        for title, target in redirects.items():
+            self.pages[article_url(title, "")] = self.pages[article_url(target, "")]
+
+        def api(query):
+            if "redirects" in query:
+                titles = query["titles"][0].split("|")
+                normalized = [
+                    {"fromencoded": False, "from": t, "to": canonical_title(t)}
+                    for t in titles
+                    if canonical_title(t) != t
+                ]
+                resolved = [
+                    {"from": canonical_title(t), "to": redirects[canonical_title(t)]}
+                    for t in titles
+                    if canonical_title(t) in redirects
+                ]
+                pages = []
+                for t in titles:
+                    page = {"ns": 0, "title": redirects.get(canonical_title(t), canonical_title(t))}
+                    # the API only follows one redirect, and flags double redirects
+                    if page["title"] in redirects:
+                        page["redirect"] = True
+                    pages.append(page)
+                query_result = {"normalized": normalized, "redirects": resolved, "pages": pages}
+                return json.dumps({"batchcomplete": True, "query": query_result})
+            if query.get("prop") != ["linkshere"]:
+                return None
+            titles = query["titles"][0].split("|")
+            limit = query.get("lhlimit", ["max"])[0]
+            limit = api_limit if limit == "max" else min(int(limit), api_limit)
+            # continuation is an offset into all the backlinks of the batch
+            results = [(title, link) for title in titles for link in linkshere.get(title, [])]
+            offset = int(query.get("lhcontinue", ["0"])[0])
+            chunk = results[offset : offset + limit]
+            pages = [
+                {"title": title, "linkshere": [{"ns": 0, "title": link} for t, link in chunk if t == title]}
+                for title in titles
+            ]
+            response = {"batchcomplete": True, "query": {"pages": pages}}
+            if offset + limit < len(results):
+                response["continue"] = {"lhcontinue": str(offset + limit), "continue": "||"}
+            return json.dumps(response)
+
+        self.pages["/w/api.php"] = api
+
+
+@pytest.fixture
+def local_wiki():
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    wiki = LocalWiki()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            wiki.requests.append(self.path)
+            parts = urlsplit(self.path)
+            page = wiki.pages.get(self.path, wiki.pages.get(parts.path))
+            if callable(page):
+                page = page(parse_qs(parts.query))
+            if page is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = page if isinstance(page, bytes) else page.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    wiki.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(
+        target=wiki.server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield wiki
+    wiki.server.shutdown()
+    wiki.server.server_close()
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from anniversary_index import AnniversaryIndex, read_anniversary_tables, tokenize
+from find_anniversaries import anniversary_list_to_df
+
+sample_list = [
+    "May 19: The creator has birthday! ; Beautiful day\n",
+    "December 1: just a beautiful day (always?); Winter is coming (No daylight past 15:00)",
+    "June 3: Another beautiful day; hmmm, (1999)\n",
+    "July 4: Independence Day in the United States (1776); Day of the States",
+]
+
+
+@pytest.fixture
+def index():
+    return AnniversaryIndex.from_frame(anniversary_list_to_df(sample_list))
+
+
+def test_tokenize():
+    assert tokenize("Winter is coming (No daylight past 15:00)") == [
+        "winter",
+        "is",
+        "coming",
+        "no",
+        "daylight",
+        "past",
+        "15",
+        "00",
+    ]
+
+
+def test_search_terms(index):
+    res = index.search("beautiful day")
+    assert set(res["Date"]) == {"May 19", "December 1", "June 3"}
+    assert list(res.columns) == ["Date", "Event", "Score"]
+    assert res["Score"].is_monotonic_decreasing
+    # a missing term matches nothing
+    assert index.search("beautiful unicorn").empty
+
+
+def test_search_boolean(index):
+    res = index.search("winter OR birthday")
+    assert set(res["Event"]) == {
+        "Winter is coming (No daylight past 15:00)",
+        "The creator has birthday!",
+    }
+    res = index.search("day -beautiful")
+    assert set(res["Date"]) == {"July 4"}
+    res = index.search("day NOT states")
+    assert set(res["Date"]) == {"May 19", "December 1", "June 3"}
+
+
+def test_search_phrase(index):
+    res = index.search('"united states"')
+    assert list(res["Event"]) == ["Independence Day in the United States (1776)"]
+    # the words are present, but not as a phrase
+    assert index.search('"states united"').empty
+
+
+def test_save_load(index, tmp_path):
+    index.save(tmp_path / "index")
+    loaded = AnniversaryIndex.load(tmp_path / "index")
+    assert isinstance(loaded.arrays["post_docs"], np.memmap)
+    expected = index.search('day -"united states"', k=None)
+    res = loaded.search('day -"united states"', k=None)
+    assert list(res["Event"]) == list(expected["Event"])
+    assert np.allclose(res["Score"], expected["Score"])
+
+
+def test_read_anniversary_tables():
+    tables_dir = Path(__file__).parent.parent / "tables_of_anniversaries"
+    df = read_anniversary_tables(tables_dir)
+    assert list(df.columns) == ["Date", "Event"]
+    assert "April Fools' Day" in set(df["Event"])
+    index = AnniversaryIndex.from_frame(df)
+    res = index.search('"fools"')
+    assert "April 1" in set(res["Date"])
@@ -0,0 +1,201 @@
+import threading
+import time
+from functools import partial
+
+import pytest
+from crawler import Crawler, crawl
+from filter_urls import article_url, find_img_src, find_urls, scan_article_links
+
+# title -> linked titles
+graph = {
+    "Start": ["Alpha", "Beta", "Gamma"],
+    "Alpha": ["Start", "Delta"],
+    "Beta": ["Delta", "Epsilon"],
+    "Gamma": ["Zeta"],
+    "Delta": ["Eta"],
+    "Epsilon": [],
+    "Zeta": [],
+    "Eta": [],
+}
+
+
+@pytest.fixture
+def wiki(local_wiki):
+    local_wiki.serve_graph(graph)
+    return local_wiki
+
+
+def page(wiki, title):
+    return wiki.url(article_url(title, ""))
+
+
+# the stand-in wiki is not on wikipedia.org, find its articles with the race scanner
+same_wiki = scan_article_links
+
+
+def test_crawl(wiki):
+    results = list(
+        crawl(
+            [page(wiki, "Start")],
+            extractors={"size": len, "images": find_img_src},
+            max_depth=1,
+            links=same_wiki,
+            delay=0,
+        )
+    )
+    assert sorted(r.url for r in results) == sorted(page(wiki, t) for t in ["Start", "Alpha", "Beta", "Gamma"])
+    assert [r.depth for r in results] == [0, 1, 1, 1]
+    assert all(r.error is None and r.data["size"] > 0 and r.data["images"] == set() for r in results)
+    # each page is fetched once, even though Alpha links back to Start
+    assert len(wiki.page_requests()) == 4
+
+
+def test_crawl_budgets_and_priority(wiki):
+    # depth first towards the end of the alphabet
+    crawler = Crawler(
+        [page(wiki, "Start")],
+        max_depth=5,
+        max_pages=3,
+        links=same_wiki,
+        delay=0,
+        max_workers=1,
+        priority=lambda url, depth: -ord(url.rsplit("/", 1)[1][0]),
+    )
+    urls = [r.url for r in crawler.crawl()]
+    assert urls == [page(wiki, t) for t in ["Start", "Gamma", "Zeta"]]
+    assert crawler.metrics.pages == 3
+    assert crawler.metrics.backlog == 2
+
+
+def test_crawl_politeness(wiki):
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+    times = []
+
+    def slow(html):
+        def serve(query):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+                times.append(time.monotonic())
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return html
+
+        return serve
+
+    for path, html in list(wiki.pages.items()):
+        if path.startswith("/wiki/"):
+            wiki.pages[path] = slow(html)
+
+    metrics = []
+    results = list(
+        crawl(
+            [page(wiki, "Start")],
+            max_depth=3,
+            links=same_wiki,
+            max_workers=8,
+            per_host=1,
+            delay=0.02,
+            on_metrics=metrics.append,
+            report_every=0.05,
+        )
+    )
+    assert len(results) == len(graph)
+    # one request at a time to the host, at least `delay` apart
+    assert max_in_flight[0] == 1
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.015
+    # live metrics, and a final report
+    assert len(metrics) >= 2
+    assert metrics[-1].pages == len(graph)
+    assert metrics[-1].backlog == 0
+
+
+def test_crawl_errors(wiki):
+    def failing(html):
+        raise ValueError("no dates")
+
+    results = list(
+        crawl(
+            [page(wiki, "Epsilon"), page(wiki, "Nowhere"), "http://127.0.0.1:9/wiki/Start"],
+            extractors={"dates": failing, "urls": partial(find_urls, base_url="https://en.wikipedia.org")},
+            links=same_wiki,
+            delay=0,
+        )
+    )
+    assert len(results) == 3
+    by_url = {r.url: r for r in results}
+    assert by_url[page(wiki, "Epsilon")].error == "dates: no dates"
+    assert "https://www.example.com/" in by_url[page(wiki, "Epsilon")].data["urls"]
+    # a page that could not be fetched is reported, not raised
+    assert by_url["http://127.0.0.1:9/wiki/Start"].error
+    with pytest.raises(ValueError):
+        Crawler([], max_workers=0)
+
+
+def test_crawl_documents(wiki):
+    seen = []
+
+    def documents(page):
+        seen.append(page)
+        return type(page).__name__
+
+    results = list(
+        crawl(
+            [page(wiki, "Start")],
+            extractors={"type": documents, "images": find_img_src},
+            max_depth=1,
+            links=same_wiki,
+            delay=0,
+            documents=True,
+        )
+    )
+    assert len(results) == 4
+    assert all(r.error is None and r.data == {"type": "Document", "images": set()} for r in results)
+    # the links were found from the same document the extractors were given
+    assert all(page.hrefs for page in seen)
+
+
+def test_crawl_schedule_per_host():
+    seeds = ["https://a.org/wiki/2", "https://a.org/wiki/1", "https://b.org/wiki/3"]
+    crawler = Crawler(seeds, priority=lambda url, depth: int(url[-1]), delay=10)
+    assert crawler.metrics.backlog == 3
+    # the best URL of the hosts that can take a request, a.org waits out its delay after one
+    assert crawler._next_ready(now=0) == ("a.org", "https://a.org/wiki/1", 0)
+    crawler.next_request["a.org"] = 10
+    assert crawler._next_ready(now=0) == ("b.org", "https://b.org/wiki/3", 0)
+    assert crawler._next_ready(now=0) is None
+    assert crawler._next_time() == 10
+    assert crawler._next_ready(now=10) == ("a.org", "https://a.org/wiki/2", 0)
+    assert crawler.frontiers == {}
+
+
+def test_crawl_waits_without_spinning(wiki, monkeypatch):
+    import crawler
+
+    def slow(html):
+        def serve(query):
+            time.sleep(0.1)
+            return html
+
+        return serve
+
+    for path, html in list(wiki.pages.items()):
+        if path.startswith("/wiki/"):
+            wiki.pages[path] = slow(html)
+
+    calls = [0]
+    real_wait = crawler.wait
+
+    def counting_wait(*args, **kwargs):
+        calls[0] += 1
+        return real_wait(*args, **kwargs)
+
+    monkeypatch.setattr(crawler, "wait", counting_wait)
+    # the only worker is busy while the other seeds' host is ready: wait for the page, don't poll
+    seeds = [page(wiki, title) for title in ["Start", "Alpha", "Beta", "Gamma"]]
+    results = list(crawl(seeds, max_depth=0, links=same_wiki, max_workers=1, delay=0))
+    assert len(results) == 4
+    assert calls[0] <= 2 * len(results)
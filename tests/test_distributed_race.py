@@ -0,0 +1,77 @@
+import threading
+import time
+
+from distributed_race import SharedFrontier, find_path_distributed, run_worker
+from filter_urls import article_title, article_url
+from wiki_race_challenge import get_links
+
+# title -> linked titles
+graph = {
+    "Start": ["Alpha", "Beta", "Gamma"],
+    "Alpha": ["Start", "Delta"],
+    "Beta": ["Delta", "Epsilon"],
+    "Gamma": ["Gamma", "Dungeons & Dragons"],
+    "Delta": ["Zeta"],
+    "Epsilon": ["Zeta"],
+    "Dungeons & Dragons": ["Eta"],
+    "Zeta": ["Finish"],
+    "Eta": ["Finish"],
+    "Finish": ["Start"],
+    "Island": ["Start"],
+}
+
+
+def check_path(path, length):
+    titles = [article_title(u) for u in path]
+    assert len(titles) == length + 1
+    for a, b in zip(titles, titles[1:]):
+        assert b in graph[a], f"{a} does not link to {b}"
+
+
+def test_shared_frontier(local_wiki, tmp_path):
+    local_wiki.serve_graph(graph)
+    start = local_wiki.url(article_url("Start", ""))
+    finish = local_wiki.url(article_url("Finish", ""))
+    frontier = SharedFrontier(tmp_path / "race.sqlite")
+    frontier.start(start, finish)
+
+    # workers only get the articles of the current level
+    assert frontier.claim() == (0, start, 0)
+    assert frontier.claim() is None
+    # an expired claim is handed back
+    frontier.advance(lease=0)
+    node, url, depth = frontier.claim()
+    assert (node, url, depth) == (0, start, 0)
+    frontier.complete(0, 0, [local_wiki.url(article_url("Alpha", ""))])
+    assert frontier.advance(lease=60)
+    node, url, depth = frontier.claim()
+    assert (url, depth) == (local_wiki.url(article_url("Alpha", "")), 1)
+    frontier.complete(node, depth, get_links(url))
+
+    # worker threads, each with its own connection, finish the search
+    threads = [threading.Thread(target=run_worker, args=(tmp_path / "race.sqlite",)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while frontier.advance(lease=5):
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    path = frontier.found_path()
+    assert path[0] == start
+    assert path[-1] == finish
+    check_path(path, 4)
+
+
+def test_find_path_distributed(local_wiki, tmp_path):
+    local_wiki.serve_graph(graph)
+    start = local_wiki.url(article_url("Start", ""))
+    path = find_path_distributed(start, local_wiki.url(article_url("Finish", "")), processes=2)
+    check_path(path, 4)
+    # each article is fetched once, and finish never
+    requests = local_wiki.page_requests()
+    assert len(requests) == len(set(requests))
+    assert article_url("Finish", "") not in requests
+
+    island = local_wiki.url(article_url("Island", ""))
+    assert find_path_distributed(start, island, path=tmp_path / "race.sqlite", processes=2) == []
+    assert find_path_distributed(start, start, processes=1) == [start]
@@ -0,0 +1,84 @@
+import pytest
+import wikitables
+from document import Document
+from filter_urls import find_articles, find_img_src, find_urls, scan_article_links
+from find_anniversaries import extract_anniversaries
+from image_harvest import find_images
+from wikitables import read_wikitable, read_wikitables
+
+sample_HTML = """<html><head><title>Tromsø</title><style>p { color: red }</style></head>
+<body>
+<script>var links = "<a href='/wiki/Script'>";</script>
+<p><b><a href="/wiki/October_19" title="October 19">October 19</a></b>: Tromsø – Ålesund</p>
+<p>See <a href="/wiki/Troms%C3%B8#History">history</a>, <a href="/wiki/Help:Contents">help</a>
+and <a href="https://www.example.com/">elsewhere</a>.<!-- a comment --></p>
+<img src="/Flag.png" srcset="/Flag-2x.png 2x" width="20">
+<table class="wikitable"><tr><th>Sport</th><th>Gold<sup class="reference">[1]</sup></th></tr>
+<tr><td>Sailing</td><td>17</td></tr></table>
+<table><tr><th>Other</th></tr><tr><td>x</td></tr></table>
+</body></html>
+"""
+
+
+@pytest.fixture(params=["str", "bytes"])
+def html(request):
+    return sample_HTML if request.param == "str" else sample_HTML.encode("utf-8")
+
+
+def test_document_extractors(html):
+    url = "https://en.wikipedia.org/wiki/Troms%C3%B8"
+    doc = Document(html, url)
+    assert doc.text == sample_HTML
+    assert doc.data == sample_HTML.encode("utf-8")
+
+    assert find_urls(doc, base_url=url) == find_urls(sample_HTML, base_url=url) == doc.links
+    assert find_articles(doc, base_url=url) == find_articles(sample_HTML, base_url=url) == doc.articles
+    assert scan_article_links(doc, url) == scan_article_links(sample_HTML, url)
+    assert find_img_src(doc) == {"/Flag.png"} == doc.images
+    assert find_images(doc) == find_images(sample_HTML)
+    assert extract_anniversaries(doc, "October") == ["October 19: Tromsø – Ålesund"]
+
+    dfs = read_wikitables(doc)
+    assert [list(df.columns) for df in dfs] == [["Sport", "Gold"], ["Other"]]
+    assert read_wikitable(doc, attrs={"class": "wikitable"})["Gold"].tolist() == [17]
+    assert [table.rows[0][0].text for table in doc.tables] == ["Sport", "Other"]
+
+
+def test_document_visible_text(html):
+    doc = Document(html)
+    assert doc.visible_text == (
+        "October 19: Tromsø – Ålesund See history, help and elsewhere. Sport Gold[1] Sailing 17 Other x"
+    )
+
+
+def test_document_parses_once(monkeypatch):
+    import bs4
+
+    parsed = []
+
+    class CountingSoup(bs4.BeautifulSoup):
+        def __init__(self, *args, **kwargs):
+            parsed.append("soup")
+            super().__init__(*args, **kwargs)
+
+    def parse_tables(html, flavor, encoding="utf-8"):
+        parsed.append(flavor)
+        return real_parse_tables(html, flavor, encoding)
+
+    real_parse_tables = wikitables.parse_tables
+    monkeypatch.setattr(wikitables, "parse_tables", parse_tables)
+    monkeypatch.setattr(bs4, "BeautifulSoup", CountingSoup)
+
+    doc = Document(sample_HTML.encode("utf-8"))
+    read_wikitable(doc, match="sailing")
+    read_wikitable(doc, match="other", flavor="bs4")
+    read_wikitables(doc)
+    assert doc.visible_text
+    assert doc.tables
+    # one parse for the soup and every table read
+    assert parsed == ["soup"]
+    # the tables are read without the hidden elements, which stay in the shared soup
+    assert read_wikitable(doc).columns[1] == "Gold"
+    assert doc.soup.find("sup") is not None
+    assert doc.soup is doc.soup
+    assert doc.hrefs is doc.hrefs
@@ -2,9 +2,17 @@ from pathlib import Path
 
 import pytest
 from fetch_olympic_statistics import (
+    fetch_country_pages,
     find_best_country_in_sport,
+    get_all_sport_stats,
+    get_country_sport_stats,
+    get_medal_table,
+    parse_medal_table,
+    rank_countries,
     get_scandi_stats,
+    get_page,
     get_sport_stats,
+    parse_country_pages,
     report_scandi_stats,
 )
 
@@ -161,3 +169,182 @@ def test_report_scandi_stats(tmpdir):
     assert (dest_dir / "Sailing_medal_ranking.png").is_file()
     assert (dest_dir / "total_medal_ranking.png").is_file()
     assert (dest_dir / "best_of_sport_by_Gold.md").is_file()
+
+
+def medal_table_html(rows):
+    """An 'All-time Olympic Games medal table' page with the given
+    (country, summer medals, winter medals) rows"""
+    body = "".join(
+        f"""<tr><td><a href="/wiki/{country}_at_the_Olympics">{country}</a> ({country[:3].upper()})</td>
+        <td>25</td><td>{summer[0]}</td><td>{summer[1]}</td><td>{summer[2]}</td><td>{sum(summer):,}</td>
+        <td>23</td><td>{winter[0]}</td><td>{winter[1]}</td><td>{winter[2]}</td><td>{sum(winter):,}</td>
+        <td>48</td><td>{summer[0] + winter[0]:,}</td><td>{summer[1] + winter[1]}</td>
+        <td>{summer[2] + winter[2]}</td><td>{sum(summer) + sum(winter):,}</td></tr>
+        """
+        for country, summer, winter in rows
+    )
+    return f"""<html><body>
+    <table class="wikitable sortable">
+    <tr><th rowspan="2">Team</th><th colspan="5">Summer Olympic Games</th>
+        <th colspan="5">Winter Olympic Games</th><th colspan="5">Combined total</th></tr>
+    <tr><th>No.</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th>
+        <th>No.</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th>
+        <th>No.</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th></tr>
+    {body}
+    </table></body></html>"""
+
+
+def country_page_html(sports):
+    """A country page with a 'Medals by summer sport' table for the given
+    {sport: (gold, silver, bronze)} mapping"""
+    body = "".join(
+        f"<tr><th><a href='/wiki/{sport}'>{sport}</a></th><td>{g}</td><td>{s}</td><td>{b}</td>"
+        f"<td>{g + s + b}</td></tr>"
+        for sport, (g, s, b) in sports.items()
+    )
+    return f"""<html><body>
+    <table class="wikitable">
+    <tr><th colspan="5"><span>Medals by summer sport</span></th></tr>
+    <tr><th>Sport</th><th>Gold</th><th>Silver</th><th>Bronze</th><th>Total</th></tr>
+    {body}
+    <tr><th>Totals (3 entries)</th><td>99</td><td>99</td><td>99</td><td>297</td></tr>
+    </table></body></html>"""
+
+
+local_medal_rows = [
+    ("United States", (1061, 836, 739), (113, 122, 95)),
+    ("Norway", (61, 51, 49), (148, 133, 124)),
+    ("Sweden", (147, 177, 179), (65, 51, 60)),
+    ("Denmark", (48, 78, 79), (0, 1, 0)),
+]
+
+local_sport_stats = {
+    "Norway": {"Sailing": (17, 11, 4), "Athletics": (5, 8, 4), "Football": (0, 0, 1)},
+    "Sweden": {"Sailing": (10, 12, 11), "Athletics": (23, 25, 38), "Football": (0, 0, 1)},
+    "Denmark": {"Sailing": (12, 8, 9), "Cycling": (8, 11, 10)},
+}
+
+
+@pytest.fixture
+def local_olympics(local_wiki):
+    local_wiki.pages["/wiki/All-time_Olympic_Games_medal_table"] = medal_table_html(
+        local_medal_rows
+    )
+    for country, sports in local_sport_stats.items():
+        local_wiki.pages[f"/wiki/{country}_at_the_Olympics"] = country_page_html(sports)
+    return local_wiki
+
+
+def test_get_scandi_stats_local(local_olympics):
+    country_dict = get_scandi_stats(
+        local_olympics.url("/wiki/All-time_Olympic_Games_medal_table")
+    )
+    assert country_dict["Norway"] == {
+        "url": local_olympics.url("/wiki/Norway_at_the_Olympics"),
+        "medals": {"Summer": 61, "Winter": 148},
+    }
+    assert sorted(country_dict) == ["Denmark", "Norway", "Sweden"]
+
+
+def test_get_all_sport_stats(local_olympics):
+    sport_stats = get_all_sport_stats(local_olympics.url("/wiki/Norway_at_the_Olympics"))
+    assert sport_stats == {
+        "Sailing": {"Gold": 17, "Silver": 11, "Bronze": 4},
+        "Athletics": {"Gold": 5, "Silver": 8, "Bronze": 4},
+        "Football": {"Gold": 0, "Silver": 0, "Bronze": 1},
+    }
+    # the totals row is not a sport
+    assert not any(sport.startswith("Total") for sport in sport_stats)
+    assert get_sport_stats(
+        local_olympics.url("/wiki/Norway_at_the_Olympics"), "sailing"
+    ) == {"Gold": 17, "Silver": 11, "Bronze": 4}
+    assert get_sport_stats(
+        local_olympics.url("/wiki/Norway_at_the_Olympics"), "Archery"
+    ) == {"Gold": 0, "Silver": 0, "Bronze": 0}
+
+
+def test_fetch_then_parse_local(local_olympics):
+    url = local_olympics.url("/wiki/All-time_Olympic_Games_medal_table")
+    html = get_page(url)
+    country_dict = get_scandi_stats(url, html=html)
+    assert country_dict == get_scandi_stats(url)
+    pages = fetch_country_pages(country_dict)
+    assert set(pages) == {info["url"] for info in country_dict.values()}
+    requests = len(local_olympics.requests)
+    # parsing doesn't fetch anything
+    assert parse_country_pages(country_dict, pages) == get_country_sport_stats(country_dict)
+    assert len(local_olympics.requests) == requests
+    assert local_olympics.count("/wiki/All-time_Olympic_Games_medal_table") == 1
+
+
+def test_report_scandi_stats_local(local_olympics, tmp_path):
+    report_scandi_stats(
+        local_olympics.url("/wiki/All-time_Olympic_Games_medal_table"),
+        ["Sailing", "Athletics", "Football", "Cycling"],
+        work_dir=tmp_path,
+    )
+    dest_dir = tmp_path / "olympic_games_results"
+    assert (dest_dir / "total_medal_ranking.png").is_file()
+    assert (dest_dir / "Cycling_medal_ranking.png").is_file()
+    best = (dest_dir / "best_of_sport_by_Gold.md").read_text()
+    assert "| Sailing | Norway |" in best
+    assert "| Athletics | Sweden |" in best
+    assert "| Football | None |" in best
+    assert "| Cycling | Denmark |" in best
+    # every country page is fetched exactly once
+    for country in local_sport_stats:
+        assert local_olympics.count(f"/wiki/{country}_at_the_Olympics") == 1
+
+
+def test_get_medal_table(local_olympics):
+    table = get_medal_table(
+        local_olympics.url("/wiki/All-time_Olympic_Games_medal_table")
+    )
+    assert list(table.index) == ["United States", "Norway", "Sweden", "Denmark"]
+    assert list(table.columns) == ["URL"] + [
+        f"{games} {count}"
+        for games in ["Summer", "Winter", "Combined"]
+        for count in ["Games", "Gold", "Silver", "Bronze", "Total"]
+    ]
+    assert table.loc["Norway", "URL"] == local_olympics.url("/wiki/Norway_at_the_Olympics")
+    assert table.loc["United States", "Summer Total"] == 2636
+    assert table.loc["Sweden", "Combined Gold"] == 212
+    assert str(table["Winter Bronze"].dtype) == "int64"
+
+
+def test_parse_medal_table_unlinked():
+    import re
+
+    html = medal_table_html(local_medal_rows)
+    # no team links, and counts that are not numbers
+    html = re.sub(r'<a href="[^"]*">([^<]*)</a>', r"\1", html)
+    html = html.replace("<td>148</td>", "<td>n/a</td>").replace("<td>0</td>", "<td>–</td>")
+    # thousands separators and footnote marks in the same columns
+    html = html.replace("<td>1,174</td>", "<td>1,174‡</td>")
+    table = parse_medal_table(html)
+    # a count that is not a number drops its row, a dash counts as 0
+    assert list(table.index) == ["United States", "Sweden", "Denmark"]
+    assert table["URL"].isna().all()
+    assert table.loc["Denmark", "Winter Gold"] == 0
+    assert table.loc["Sweden", "Winter Gold"] == 65
+    assert table.loc["United States", "Combined Gold"] == 1174
+    assert table.loc["United States", "Summer Total"] == 2636
+    assert str(table["Winter Gold"].dtype) == "int64"
+
+
+def test_rank_countries(local_olympics):
+    table = get_medal_table(
+        local_olympics.url("/wiki/All-time_Olympic_Games_medal_table")
+    )
+    ranking = rank_countries(table, "Winter Gold", k=2)
+    assert list(ranking.index) == ["Norway", "United States"]
+    assert list(ranking["Rank"]) == [1, 2]
+
+    ranking = rank_countries(table, "Summer Games", countries=["Norway", "Sweden", "Denmark"])
+    # all tied
+    assert list(ranking["Rank"]) == [1, 1, 1]
+
+    ranking = rank_countries(table, "Combined Bronze", countries=["Sweden", "Denmark"])
+    assert list(ranking.index) == ["Sweden", "Denmark"]
+    with pytest.raises(ValueError):
+        rank_countries(table, "Summer Platinum")
@@ -1,7 +1,7 @@
 import warnings
 
 import pytest
-from filter_urls import find_articles, find_img_src, find_urls
+from filter_urls import find_articles, find_img_src, find_urls, scan_article_links
 from requesting_urls import get_html
 
 # Test some random urls
@@ -130,3 +130,45 @@ def test_find_img_src():
         "https://some.jpg",
         "/foo.png",
     }
+
+
+def test_scan_article_links():
+    html = """
+    <a href="#fragment-only">anchor link</a>
+    <a href="/wiki/Dungeons_%26_Dragons#History">article</a>
+    <a class="x" href="/wiki/Help:Contents">help</a>
+    <A HREF="https://en.wikipedia.org/wiki/Nobel_Prize">absolute article</a>
+    <a href="https://no.wikipedia.org/wiki/Nobelprisen">other wiki</a>
+    <a href="/wiki/Dungeons_%26_Dragons">again</a>
+    <a href="/w/index.php?title=Nobel_Prize">not an article</a>
+    """
+    base_url = "https://en.wikipedia.org/wiki/Peace"
+    expected = [
+        "https://en.wikipedia.org/wiki/Dungeons_%26_Dragons",
+        "https://en.wikipedia.org/wiki/Nobel_Prize",
+    ]
+    assert scan_article_links(html, base_url) == expected
+    assert scan_article_links(html.encode("utf-8"), base_url) == expected
+    # the same articles as find_articles, restricted to the same wiki
+    articles = find_articles(html, base_url="https://en.wikipedia.org")
+    assert set(expected) == {url for url in articles if url.startswith("https://en.")}
+
+
+def test_find_urls_bytes():
+    html = """
+    <a href="/wiki/Troms%C3%B8#History">Tromsø</a>
+    <a href="/wiki/Ålesund">Ålesund</a>
+    <a href="/wiki/Help:Contents">help</a>
+    <img src="/Ålesund.png">
+    """
+    base_url = "https://en.wikipedia.org"
+    data = html.encode("utf-8")
+    assert find_urls(data, base_url) == find_urls(html, base_url)
+    assert find_articles(data, base_url=base_url) == find_articles(html, base_url=base_url)
+    assert "https://en.wikipedia.org/wiki/Ålesund" in find_articles(data)
+    assert find_img_src(data) == find_img_src(html) == {"/Ålesund.png"}
+    # other encodings can be declared
+    assert find_urls(html.encode("utf-16-le"), base_url, encoding="utf-16-le") == set()
+    latin = '<a href="/wiki/Ålesund">'.encode("latin-1")
+    assert find_urls(latin, base_url, encoding="latin-1") == {"https://en.wikipedia.org/wiki/Ålesund"}
+    assert scan_article_links(latin, base_url, encoding="latin-1") == ["https://en.wikipedia.org/wiki/Ålesund"]
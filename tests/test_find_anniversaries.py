@@ -33,6 +33,14 @@ def test_extract_anniversaries():
     assert res == sol
 
 
+def test_extract_anniversaries_bytes():
+    html = sample_HTML.replace("October 19</a></b>", "October 19</a></b>: Tromsø")
+    res = extract_anniversaries(html.encode("utf-8"), "October")
+    assert res == ["October 1", "October 19: Tromsø"]
+    res = extract_anniversaries(html.encode("latin-1"), "October", encoding="latin-1")
+    assert res == ["October 1", "October 19: Tromsø"]
+
+
 sample_list = [
     "May 19: The creator has birthday! ; Beautiful day\n",
     "December 1: just a beautiful day (always?); Winter is coming (No daylight past 15:00)",
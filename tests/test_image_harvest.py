@@ -0,0 +1,112 @@
+import pytest
+from image_harvest import (
+    Image,
+    choose_image_url,
+    find_images,
+    harvest_images,
+    normalize_image_url,
+    parse_srcset,
+)
+
+sample_HTML = """
+<img alt="Flag" src="//upload.wikimedia.org/thumb/Flag.png/100px-Flag.png" width="100" height="50"
+     srcset="//upload.wikimedia.org/thumb/Flag.png/150px-Flag.png 1.5x, //upload.wikimedia.org/thumb/Flag.png/200px-Flag.png 2x">
+<img src="/static/logo.svg">
+<img nosrc>
+<img src="a.jpg" srcset="a,1.jpg 320w, a-640.jpg 640w,a-1024.jpg 1024w" sizes="50vw">
+<img src="/w/index.php?title=x&amp;action=raw">
+"""
+
+
+def test_parse_srcset():
+    assert parse_srcset("a.png 1.5x, b.png 2x") == [("a.png", None, 1.5), ("b.png", None, 2.0)]
+    assert parse_srcset("a,1.jpg 320w,b.jpg 640w") == [("a,1.jpg", 320, None), ("b.jpg", 640, None)]
+    assert parse_srcset("a.png, b.png 2x, c.png bogus") == [("a.png", None, 1.0), ("b.png", None, 2.0)]
+    assert parse_srcset("") == []
+
+
+def test_find_images():
+    images = find_images(sample_HTML)
+    assert [image.src for image in images] == [
+        "//upload.wikimedia.org/thumb/Flag.png/100px-Flag.png",
+        "/static/logo.svg",
+        "a.jpg",
+        "/w/index.php?title=x&action=raw",
+    ]
+    assert images[0].width == 100
+    assert [width for _, width, _ in images[2].srcset] == [320, 640, 1024]
+
+
+def test_find_images_quoting():
+    html = """
+    <img src='a.png' srcset='a-2x.png 2x' width='50'>
+    <IMG SRC=b.png WIDTH=80 alt="x = 'y'">
+    <img alt="src=c.png">
+    """
+    images = find_images(html)
+    assert images == [
+        Image("a.png", [("a-2x.png", None, 2.0)], 50),
+        Image("b.png", [], 80),
+    ]
+    # raw pages, as from get_html_many(raw=True)
+    assert find_images(html.encode("utf-8")) == images
+    assert find_images("<img src='Å.png'>".encode("latin-1"), encoding="latin-1")[0].src == "Å.png"
+
+
+@pytest.mark.parametrize(
+    "target_width, expected",
+    [
+        (None, "100px-Flag.png"),
+        (90, "100px-Flag.png"),
+        (120, "150px-Flag.png"),
+        (200, "200px-Flag.png"),
+        # nothing wide enough, take the widest
+        (500, "200px-Flag.png"),
+    ],
+)
+def test_choose_image_url(target_width, expected):
+    image = find_images(sample_HTML)[0]
+    assert choose_image_url(image, target_width).endswith(expected)
+
+
+def test_choose_image_url_widths():
+    image = find_images(sample_HTML)[2]
+    assert choose_image_url(image, 600) == "a-640.jpg"
+    assert choose_image_url(Image("a.jpg", [], None), 600) == "a.jpg"
+
+
+def test_normalize_image_url():
+    page = "https://en.wikipedia.org/wiki/Norway"
+    assert normalize_image_url("//upload.wikimedia.org/a.png", page) == "https://upload.wikimedia.org/a.png"
+    assert normalize_image_url("/static/logo.svg", page) == "https://en.wikipedia.org/static/logo.svg"
+
+
+def test_harvest_images(local_wiki, tmp_path):
+    local_wiki.pages["/thumb/150px-Flag.png"] = b"\x89PNG flag"
+    local_wiki.pages["/thumb/300px-Flag.png"] = b"\x89PNG big flag"
+    # the same image under another name
+    local_wiki.pages["/other/Flag.png"] = b"\x89PNG flag"
+    html = """
+    <img src="//{host}/thumb/100px-Flag.png" width="100"
+         srcset="//{host}/thumb/150px-Flag.png 1.5x, //{host}/thumb/300px-Flag.png 3x">
+    <img src="/other/Flag.png">
+    <img src="/missing.png">
+    """.format(host=local_wiki.url("").split("//")[1])
+    page = local_wiki.url("/wiki/Norway")
+    pages = [(page, html), (page.replace("Norway", "Sweden"), html)]
+
+    files = harvest_images(pages, tmp_path / "images", target_width=120)
+    flag = local_wiki.url("/thumb/150px-Flag.png")
+    other = local_wiki.url("/other/Flag.png")
+    assert set(files) == {flag, other}
+    # stored once by content
+    assert files[flag] == files[other]
+    assert files[flag].read_bytes() == b"\x89PNG flag"
+    assert files[flag].suffix == ".png"
+    assert local_wiki.count("/thumb/150px-Flag.png") == 1
+    assert local_wiki.count("/thumb/300px-Flag.png") == 0
+
+    # downloaded URLs are not downloaded again
+    local_wiki.requests.clear()
+    assert harvest_images(pages, tmp_path / "images", target_width=120) == files
+    assert local_wiki.requests == ["/missing.png"]
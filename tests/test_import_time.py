@@ -0,0 +1,38 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+assignment4 = Path(__file__).parent.parent.absolute()
+
+heavy_modules = ["pandas", "matplotlib", "bs4", "requests", "lxml", "numpy"]
+
+# Modules built on numpy arrays, which import it at the top
+allowed_heavy = {
+    "anniversary_index": {"numpy"},
+    "wiki_graph": {"numpy"},
+}
+
+# Every module of the assignment, scripts like example-plot.py can't be imported
+modules = sorted(path.stem for path in assignment4.glob("*.py") if path.stem.isidentifier())
+
+
+@pytest.mark.parametrize("module", modules)
+def test_lazy_imports(module):
+    """Importing a module must not pull in the heavy dependencies,
+    they are imported in the functions using them"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=assignment4,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = set(filter(None, result.stdout.strip().split(",")))
+    allowed = allowed_heavy.get(module, set())
+    assert imported <= allowed, f"{module} imports {imported - allowed}"
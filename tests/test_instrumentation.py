@@ -0,0 +1,151 @@
+import json
+import logging
+
+import instrumentation
+import pytest
+from filter_urls import find_urls
+from requesting_urls import get_html
+from table_cache import TableCache
+
+
+@pytest.fixture
+def metrics():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def counter(name, **labels):
+    for item in instrumentation.snapshot()["counters"]:
+        if item["name"] == name and item["labels"] == labels:
+            return item["value"]
+    return 0
+
+
+def histogram(stage, function):
+    for item in instrumentation.snapshot()["histograms"]:
+        if item["labels"] == {"function": function, "stage": stage}:
+            return item
+    return None
+
+
+def test_disabled():
+    instrumentation.reset()
+    assert not instrumentation.enabled
+    calls = []
+
+    @instrumentation.timed("parse", "f")
+    def f(x):
+        calls.append(x)
+        return x * 2
+
+    assert f(2) == 4 and f.__name__ == "f"
+    with instrumentation.timed("write", "f"):
+        instrumentation.count("c")
+        instrumentation.observe("h", 1.0)
+    assert instrumentation.snapshot() == {"counters": [], "histograms": []}
+
+
+def test_timed(metrics):
+    @metrics.timed("parse", "f")
+    def f(x):
+        return x
+
+    for i in range(3):
+        f(i)
+    with metrics.timed("write", "f"):
+        pass
+    metrics.observe("wiki_stage_seconds", 2.0, stage="write", function="f")
+
+    parse = histogram("parse", "f")
+    assert parse["count"] == 3 and parse["buckets"]["0.001"] == 3 and parse["buckets"]["+Inf"] == 3
+    write = histogram("write", "f")
+    assert write["count"] == 2 and write["buckets"]["1.0"] == 1 and write["buckets"]["2.5"] == 2
+    assert write["sum"] >= 2.0
+
+
+def test_get_html(metrics, local_wiki, caplog, tmpdir):
+    local_wiki.pages["/page"] = "<p>Tromsø</p>"
+    url = local_wiki.url("/page")
+    with caplog.at_level(logging.DEBUG, logger="requesting_urls"):
+        get_html(url, output=str(tmpdir / "page.txt"))
+        get_html(url, raw=True)
+        get_html(local_wiki.url("/missing"))
+    size = len("<p>Tromsø</p>".encode())
+    assert counter("wiki_pages_fetched_total", status="200") == 2
+    assert counter("wiki_pages_fetched_total", status="404") == 1
+    assert counter("wiki_fetched_bytes_total") == 2 * size
+    assert histogram("fetch", "get_html")["count"] == 3
+    assert histogram("decode", "get_html")["count"] == 2
+    assert histogram("write", "get_html")["count"] == 1
+    # one log line per fetch
+    lines = [record.getMessage() for record in caplog.records if record.name == "requesting_urls"]
+    assert len(lines) == 3
+    assert lines[0].startswith(f"GET {url}: 200, {size} bytes in ")
+
+    find_urls("<a href='x'>")
+    assert histogram("parse", "find_urls")["count"] == 1
+
+
+def parse(html):
+    return html.upper()
+
+
+def test_cache_hits(metrics):
+    cache = TableCache(ttl=0)
+    pages = {"u": "<p>a</p>"}
+    cache.cached("u", parse, pages.get)
+    cache.cached("u", parse, pages.get)
+    assert counter("wiki_cache_misses_total", cache="tables") == 1
+    assert counter("wiki_cache_hits_total", cache="tables", revalidated="true") == 1
+
+
+def test_export(metrics, tmp_path):
+    metrics.count("wiki_fetched_bytes_total", 12345678)
+    metrics.count("wiki_pages_fetched_total", status='2"0"0')
+    metrics.observe("wiki_stage_seconds", 0.003, stage="fetch", function="get_html")
+
+    text = metrics.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE wiki_fetched_bytes_total counter" in lines
+    assert "wiki_fetched_bytes_total 12345678" in lines
+    assert 'wiki_pages_fetched_total{status="2\\"0\\"0"} 1' in lines
+    assert "# TYPE wiki_stage_seconds histogram" in lines
+    assert 'wiki_stage_seconds_bucket{function="get_html",stage="fetch",le="0.001"} 0' in lines
+    assert 'wiki_stage_seconds_bucket{function="get_html",stage="fetch",le="0.005"} 1' in lines
+    assert 'wiki_stage_seconds_bucket{function="get_html",stage="fetch",le="+Inf"} 1' in lines
+    assert 'wiki_stage_seconds_count{function="get_html",stage="fetch"} 1' in lines
+
+    assert json.loads(metrics.to_json()) == metrics.snapshot()
+    metrics.write_metrics(tmp_path / "metrics.json")
+    metrics.write_metrics(tmp_path / "metrics.prom")
+    assert json.loads((tmp_path / "metrics.json").read_text()) == metrics.snapshot()
+    assert (tmp_path / "metrics.prom").read_text() == text
+
+
+def test_extract_excludes_fetch_and_write(metrics, monkeypatch):
+    import fetch_olympic_statistics as olympic
+
+    extract_counts = []
+
+    def write(*args):
+        # the aggregation was timed, and its timer stopped, before the report is written
+        extract_counts.append(histogram("extract", "report_scandi_stats")["count"])
+
+    country_dict = {"Norway": {"url": "u", "medals": {"Summer": 0, "Winter": 0}}}
+    monkeypatch.setattr(olympic, "get_scandi_stats", lambda url: country_dict)
+    monkeypatch.setattr(olympic, "get_country_sport_stats", lambda countries, workers: {"Norway": {}})
+    monkeypatch.setattr(olympic, "write_scandi_report", write)
+    olympic.report_scandi_stats("url", ["Sailing"], work_dir=".")
+    assert extract_counts == [1]
+    assert histogram("extract", "report_scandi_stats")["count"] == 1
+
+
+def test_parsers_timed(metrics):
+    from fetch_olympic_statistics import parse_sport_stats
+    from test_fetch_olympic_statistics import country_page_html
+
+    parse_sport_stats(country_page_html({"Sailing": (1, 2, 3)}))
+    assert histogram("parse", "parse_sport_stats")["count"] == 1
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from link_cache import LinkCache
+
+
+@pytest.fixture(params=["memory", "file"])
+def cache(request, tmp_path):
+    return LinkCache(tmp_path / "links.sqlite" if request.param == "file" else None)
+
+
+def test_link_cache(cache):
+    links = ["https://en.wikipedia.org/wiki/Peace", "https://en.wikipedia.org/wiki/Dungeons_%26_Dragons"]
+    assert cache.get("a") is None
+    cache.put("a", links)
+    cache.put("b", [])
+    assert cache.get("a") == links
+    assert cache.get("b") == []
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_link_cache_ttl(tmp_path):
+    cache = LinkCache(tmp_path / "links.sqlite", ttl=0.1)
+    cache.put("a", ["b"])
+    assert cache.get("a") == ["b"]
+    time.sleep(0.15)
+    assert cache.get("a") is None
+
+
+def test_link_cache_shared(tmp_path, monkeypatch):
+    # the default database is shared through $WIKI_CACHE_DIR
+    monkeypatch.setenv("WIKI_CACHE_DIR", str(tmp_path))
+    writer = LinkCache()
+    reader = LinkCache()
+    assert writer.path == tmp_path / "links" / "links.sqlite"
+
+    def write_and_read(i):
+        writer.put(f"page {i}", [f"link {i}"])
+        return reader.get(f"page {i}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(write_and_read, range(50)))
+    assert results == [[f"link {i}"] for i in range(50)]
+    assert len(reader) == 50
@@ -0,0 +1,76 @@
+import sys
+
+import pytest
+from node_table import BloomFilter, NodeTable, no_parent
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    titles = [f"Article {i}" for i in range(1000)]
+    for title in titles:
+        bloom.add(title)
+    # never a false negative, and about the requested false positive rate
+    assert all(title in bloom for title in titles)
+    false_positives = sum(f"Other {i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    with pytest.raises(ValueError):
+        BloomFilter(0)
+    with pytest.raises(ValueError):
+        BloomFilter(10, error_rate=1.5)
+
+
+@pytest.mark.parametrize("bloom_capacity", [None, 10])
+def test_node_table(bloom_capacity):
+    nodes = NodeTable(bloom_capacity)
+    root = nodes.add("Start")
+    a = nodes.add("Dungeons & Dragons", root)
+    b = nodes.add("Irène Joliot-Curie", a)
+    assert (root, a, b) == (0, 1, 2)
+    # titles are only added once
+    assert nodes.add("Start", b) is None
+    assert len(nodes) == 3
+    assert "Irène Joliot-Curie" in nodes
+    assert "Nowhere" not in nodes
+    assert nodes.id("Dungeons & Dragons") == a
+    assert nodes.title(b) == "Irène Joliot-Curie"
+    assert nodes.parents[root] == no_parent
+    assert nodes.path(b) == ["Start", "Dungeons & Dragons", "Irène Joliot-Curie"]
+
+
+def test_node_table_collisions(monkeypatch):
+    import node_table
+
+    # every title hashes to the same slot, they are told apart by their stored bytes
+    monkeypatch.setattr(node_table, "hash", lambda key: 0, raising=False)
+    nodes = NodeTable()
+    titles = [f"Article {i}" for i in range(50)]
+    for i, title in enumerate(titles):
+        assert nodes.add(title, i - 1) == i
+    assert all(nodes.id(title) == i for i, title in enumerate(titles))
+    assert nodes.add("Article 7") is None
+    assert nodes.id("Article 50") is None
+    assert nodes.path(2) == ["Article 0", "Article 1", "Article 2"]
+
+
+def test_node_table_memory():
+    n = 20000
+    nodes = NodeTable()
+    for i in range(n):
+        nodes.add(f"Article {i}", i - 1)
+    table_bytes = sum(sys.getsizeof(a) for a in (nodes.arena, nodes.offsets, nodes.parents, nodes.slots))
+    # the representation it replaces: URL -> parent URL
+    urls = [f"https://en.wikipedia.org/wiki/Article_{i}" for i in range(n)]
+    parents = dict(zip(urls, [None, *urls]))
+    dict_bytes = sys.getsizeof(parents) + sum(sys.getsizeof(url) for url in urls)
+    assert table_bytes / n < dict_bytes / n / 2
+
+
+def test_node_table_from_arrays():
+    nodes = NodeTable()
+    for i in range(100):
+        nodes.add(f"Article {i}", i - 1)
+    copy = NodeTable.from_arrays(bytes(nodes.arena), nodes.offsets, nodes.parents, bloom_capacity=100)
+    assert len(copy) == 100
+    assert copy.id("Article 42") == 42
+    assert copy.add("Article 100", 99) == 100
+    assert copy.path(3) == nodes.path(3)
@@ -0,0 +1,26 @@
+import json
+
+from olympic_charts import bar_chart, manifest_name, render_charts
+
+
+def test_render_charts(tmp_path):
+    charts = {
+        "a.png": bar_chart(["Norway", "Sweden"], [([1, 2], "gold"), ([3, 4], "blue")], "A"),
+        "b.png": bar_chart(["Norway", "Sweden"], [([5, 6], "gold")], "B"),
+        "c.png": bar_chart(["Denmark"], [([0], "silver")], "C"),
+    }
+    rendered = render_charts(charts, tmp_path, max_workers=2)
+    assert sorted(rendered) == ["a.png", "b.png", "c.png"]
+    for name in charts:
+        assert (tmp_path / name).read_bytes().startswith(b"\x89PNG")
+    manifest = json.loads((tmp_path / manifest_name).read_text())
+    assert sorted(manifest) == ["a.png", "b.png", "c.png"]
+
+    # nothing changed, nothing to render
+    assert render_charts(charts, tmp_path) == []
+
+    # changed data, or a missing file, is rendered again
+    charts["b.png"] = bar_chart(["Norway", "Sweden"], [([5, 7], "gold")], "B")
+    (tmp_path / "c.png").unlink()
+    assert sorted(render_charts(charts, tmp_path, max_workers=1)) == ["b.png", "c.png"]
+    assert (tmp_path / "c.png").exists()
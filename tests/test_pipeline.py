@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from pipeline import Pipeline, TaskTiming, nightly_pipeline, stage_times
+from test_fetch_olympic_statistics import local_olympics, local_sport_stats  # noqa: F401
+
+
+def test_pipeline_order_and_concurrency():
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def slow(value):
+        def task(*deps):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            return value + sum(deps)
+
+        return task
+
+    pipeline = Pipeline()
+    a = pipeline.add("a", slow(1), stage="fetch")
+    b = pipeline.add("b", slow(2), stage="fetch")
+    c = pipeline.add("c", slow(10), [a, b], stage="aggregate")
+    pipeline.add("d", slow(100), [c, a], stage="write")
+    run = pipeline.run(max_workers=4)
+    assert run.results == {"a": 1, "b": 2, "c": 13, "d": 114}
+    # a and b ran at the same time, the others after them
+    assert max_in_flight[0] == 2
+    assert [timing.name for timing in run.timings][2:] == ["c", "d"]
+    assert all(timing.error is None for timing in run.timings)
+    times = stage_times(run.timings)
+    assert list(times) == ["fetch", "aggregate", "write"]
+    assert 0.04 < times["fetch"] < 0.09
+    assert run.wall_time >= sum(times.values())
+
+
+def test_pipeline_failure(capsys):
+    def fail():
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline()
+    pipeline.add("ok", lambda: 1)
+    pipeline.add("fail", fail)
+    pipeline.add("after", lambda x: x, ["fail"])
+    pipeline.add("after that", lambda x, y: x, ["after", "ok"])
+    run = pipeline.run()
+    assert run.results == {"ok": 1}
+    errors = {timing.name: timing.error for timing in run.timings}
+    assert errors == {"ok": None, "fail": "boom", "after": "skipped", "after that": "skipped"}
+    assert "Error: fail: boom" in capsys.readouterr().out
+
+    with pytest.raises(ValueError):
+        pipeline.add("ok", lambda: 2)
+    with pytest.raises(ValueError):
+        pipeline.add("new", lambda x: x, ["unknown"])
+    with pytest.raises(ValueError):
+        pipeline.run(max_workers=0)
+
+
+def test_stage_times():
+    timings = [
+        TaskTiming("a", "fetch", 0.0, 1.0, None),
+        TaskTiming("b", "fetch", 0.5, 2.0, None),
+        TaskTiming("c", "fetch", 3.0, 3.5, None),
+        TaskTiming("d", "parse", 1.0, 1.25, None),
+    ]
+    assert stage_times(timings) == {"fetch": 2.5, "parse": 0.25}
+
+
+def anniversary_page(month, days):
+    paragraphs = "".join(
+        f'<p><b><a href="/wiki/{month}_{day}">{month} {day}</a></b>: {event}</p>' for day, event in days
+    )
+    return f"<html><body>{paragraphs}</body></html>"
+
+
+def test_nightly_pipeline(local_olympics, tmp_path):
+    local_olympics.pages["/wiki/Wikipedia:Selected_anniversaries/May"] = anniversary_page(
+        "May", [(1, "Tromsø day; Something else"), (17, "Constitution Day")]
+    )
+    local_olympics.pages["/wiki/Wikipedia:Selected_anniversaries/June"] = anniversary_page(
+        "June", [(7, "Dissolution")]
+    )
+    pipeline = nightly_pipeline(
+        tmp_path,
+        months=["May", "June"],
+        sports=["Sailing", "Cycling"],
+        anniversaries_url=local_olympics.url("/wiki/Wikipedia:Selected_anniversaries/"),
+        medal_table_url=local_olympics.url("/wiki/All-time_Olympic_Games_medal_table"),
+        render_workers=1,
+    )
+    run = pipeline.run()
+    assert all(timing.error is None for timing in run.timings)
+    assert set(stage_times(run.timings)) == {"fetch", "parse", "aggregate", "write", "render"}
+    # the Olympic pages are fetched by the fetch tasks, and handed to the parse tasks as bytes
+    stages = {timing.name: timing.stage for timing in run.timings}
+    assert stages["fetch medal table"] == stages["fetch country pages"] == "fetch"
+    assert stages["parse medal table"] == stages["parse country pages"] == "parse"
+    assert isinstance(run.results["fetch medal table"], bytes)
+    assert all(isinstance(page, bytes) for page in run.results["fetch country pages"].values())
+
+    may = (tmp_path / "tables_of_anniversaries" / "anniversaries_may.md").read_text(encoding="utf-8")
+    assert "Tromsø day" in may and "Something else" in may and "Constitution Day" in may
+    assert (tmp_path / "tables_of_anniversaries" / "anniversaries_june.md").is_file()
+
+    stats_dir = tmp_path / "olympic_games_results"
+    assert (stats_dir / "total_medal_ranking.png").is_file()
+    best = (stats_dir / "best_of_sport_by_Gold.md").read_text()
+    assert "| Sailing | Norway |" in best and "| Cycling | Denmark |" in best
+    # every page is fetched once
+    for country in local_sport_stats:
+        assert local_olympics.count(f"/wiki/{country}_at_the_Olympics") == 1
+    assert local_olympics.count("/wiki/Wikipedia:Selected_anniversaries/May") == 1
@@ -0,0 +1,42 @@
+from array import array
+
+import pytest
+from node_table import NodeTable
+from race_checkpoint import SearchState, load_checkpoint, save_checkpoint
+
+
+def test_checkpoint_round_trip(tmp_path):
+    nodes = NodeTable()
+    nodes.add("Start")
+    nodes.add("Dungeons & Dragons", 0)
+    nodes.add("Irène Joliot-Curie", 1)
+    state = SearchState(
+        start="https://en.wikipedia.org/wiki/Start",
+        targets={"Peace": ["https://en.wikipedia.org/wiki/Peace"]},
+        nodes=nodes,
+        level=array("i", [1]),
+        position=0,
+        next_level=array("i", [2]),
+        depth=1,
+        max_depth=5,
+    )
+    path = tmp_path / "race.checkpoint"
+    save_checkpoint(path, state)
+    # nothing is left behind but the checkpoint
+    assert list(tmp_path.iterdir()) == [path]
+
+    loaded = load_checkpoint(path, bloom_capacity=10)
+    assert loaded.start == state.start
+    assert loaded.targets == state.targets
+    assert (loaded.level, loaded.next_level) == (array("i", [1]), array("i", [2]))
+    assert (loaded.position, loaded.depth, loaded.max_depth, loaded.found) == (0, 1, 5, {})
+    assert loaded.nodes.path(2) == ["Start", "Dungeons & Dragons", "Irène Joliot-Curie"]
+    assert loaded.nodes.id("Dungeons & Dragons") == 1
+    assert loaded.nodes.add("Start") is None
+
+
+def test_checkpoint_invalid(tmp_path):
+    path = tmp_path / "not.checkpoint"
+    path.write_bytes(b"something else")
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
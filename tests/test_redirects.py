@@ -0,0 +1,105 @@
+import pytest
+from filter_urls import article_url, canonical_title, find_articles
+from redirects import RedirectResolver
+
+graph = {
+    "Start": ["UK", "United Kingdom", "Peace"],
+    "United Kingdom": ["Start"],
+    "Peace": ["Start"],
+}
+redirects = {"UK": "United Kingdom", "U.K.": "UK"}
+
+
+@pytest.fixture
+def wiki(local_wiki):
+    local_wiki.serve_graph(graph, redirects=redirects)
+    return local_wiki
+
+
+def test_canonical_title():
+    assert canonical_title("united_Kingdom") == "United Kingdom"
+    assert canonical_title("united%20Kingdom") == "United Kingdom"
+    assert canonical_title(" united  Kingdom ") == "United Kingdom"
+    assert canonical_title("Dungeons_%26_Dragons") == "Dungeons & Dragons"
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_resolve(wiki, tmp_path, persistent):
+    path = tmp_path / "redirects.sqlite" if persistent else None
+    resolver = RedirectResolver(wiki.url("/w/api.php"), path=path)
+    titles = ["UK", "uK", "United_Kingdom", "U.K.", "peace", "Nowhere"]
+    expected = {
+        "UK": "United Kingdom",
+        "uK": "United Kingdom",
+        "United_Kingdom": "United Kingdom",
+        # double redirects are followed
+        "U.K.": "United Kingdom",
+        "peace": "Peace",
+        "Nowhere": "Nowhere",
+    }
+    assert resolver.resolve(titles) == expected
+    # one batched request, then the titles are memoized
+    assert len(wiki.requests) == 1
+    assert resolver.resolve(titles) == expected
+    assert len(wiki.requests) == 1
+    if persistent:
+        # and shared with other resolvers using the same database
+        other = RedirectResolver(wiki.url("/w/api.php"), path=path)
+        assert other.resolve(titles) == expected
+        assert len(wiki.requests) == 1
+
+
+def test_resolve_batches(wiki, monkeypatch):
+    import redirects as redirects_module
+
+    monkeypatch.setattr(redirects_module, "api_batch_size", 2)
+    resolver = RedirectResolver(wiki.url("/w/api.php"))
+    resolved = resolver.resolve(["UK", "Peace", "U.K.", "Start", "Other"])
+    assert resolved["U.K."] == "United Kingdom"
+    # the double redirect takes one more request
+    assert len(wiki.requests) == 4
+
+
+def test_find_articles_redirects(wiki):
+    resolver = RedirectResolver(wiki.url("/w/api.php"), base_url="https://en.wikipedia.org")
+    html = """
+    <a href="/wiki/UK">UK</a>
+    <a href="/wiki/United_Kingdom">United Kingdom</a>
+    <a href="/wiki/United%20Kingdom#History">History</a>
+    <a href="https://no.wikipedia.org/wiki/Storbritannia">Norwegian</a>
+    """
+    # the resolver only changes the articles of its own wiki
+    articles = find_articles(html, redirects=resolver)
+    assert articles == {
+        "https://en.wikipedia.org/wiki/United_Kingdom",
+        "https://no.wikipedia.org/wiki/Storbritannia",
+    }
+
+
+def test_find_path_redirects(local_wiki):
+    from wiki_race_challenge import find_path
+
+    race_graph = {
+        "Start": ["UK", "United Kingdom", "U.K.", "Britain"],
+        "United Kingdom": ["London"],
+        "Britain": ["Start"],
+        "London": ["Peace"],
+        "Peace": [],
+    }
+    local_wiki.serve_graph(race_graph, redirects={"UK": "United Kingdom", "U.K.": "UK"})
+    start = local_wiki.url(article_url("Start", ""))
+    finish = local_wiki.url(article_url("Peace", ""))
+
+    path = find_path(start, finish)
+    assert len(path) == 4
+    # the same article, fetched once per name
+    assert local_wiki.count(article_url("UK", "")) == local_wiki.count(article_url("United Kingdom", "")) == 1
+
+    local_wiki.requests.clear()
+    resolver = RedirectResolver(local_wiki.url("/w/api.php"))
+    path = find_path(start, finish, redirects=resolver)
+    assert path[1:3] == [local_wiki.url(article_url(t, "")) for t in ["United Kingdom", "London"]]
+    pages = local_wiki.page_requests()
+    assert article_url("UK", "") not in pages
+    assert article_url("U.K.", "") not in pages
+    assert pages.count(article_url("United Kingdom", "")) == 1
@@ -1,7 +1,7 @@
 # Test with no params
 import pytest
 from bs4 import BeautifulSoup
-from requesting_urls import get_html
+from requesting_urls import get_html, get_html_many
 
 
 @pytest.mark.task11
@@ -51,3 +51,41 @@ def test_get_html_output(tmpdir):
     assert "<html" in rest
     assert "Higher Level Programming" in rest
     assert rest.strip().endswith("</html>")
+
+
+def test_get_html_many(local_wiki):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def slow_page(query):
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return f"<html>{query['n'][0]}</html>"
+
+    local_wiki.pages["/page"] = slow_page
+    urls = [local_wiki.url(f"/page?n={n}") for n in range(12)]
+    pages = dict(get_html_many(urls + urls[:3], max_workers=4))
+    assert pages == {url: f"<html>{n}</html>" for n, url in enumerate(urls)}
+    # duplicates are fetched once, and no more than max_workers at a time
+    assert len(local_wiki.requests) == 12
+    assert 1 < max_in_flight[0] <= 4
+
+
+def test_get_html_raw(local_wiki, tmpdir):
+    body = "<html><p>Tromsø – Ålesund</p></html>".encode("utf-8")
+    local_wiki.pages["/page"] = body
+    url = local_wiki.url("/page")
+    output = str(tmpdir / "page.html")
+    html = get_html(url, output=output, raw=True)
+    assert html == body
+    with open(output, "rb") as f:
+        assert f.read() == url.encode() + b"\n" + body
+    assert dict(get_html_many([url], raw=True)) == {url: body}
@@ -0,0 +1,31 @@
+import threading
+
+from sqlite_connections import ThreadConnections, connect
+
+
+def test_connect(tmp_path):
+    db = connect(tmp_path / "a.sqlite")
+    assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    db.close()
+
+
+def test_thread_connections(tmp_path):
+    connections = ThreadConnections(tmp_path / "b.sqlite")
+    with connections.get() as db:
+        db.execute("CREATE TABLE t (x INTEGER)")
+    assert connections.get() is connections.get()
+    # every thread gets its own connection to the same file
+    others = []
+    thread = threading.Thread(target=lambda: others.append(connections.get()))
+    thread.start()
+    thread.join()
+    assert others[0] is not connections.get()
+
+    # an in-memory database is one connection shared by the threads
+    memory = ThreadConnections(None)
+    with memory.lock(), memory.get() as db:
+        db.execute("CREATE TABLE t (x INTEGER)")
+    thread = threading.Thread(target=lambda: others.append(memory.get()))
+    thread.start()
+    thread.join()
+    assert others[1] is memory.get()
@@ -0,0 +1,17 @@
+import numpy as np
+from string_table import StringTable
+
+
+def test_string_table(tmp_path):
+    strings = ["Start", "", "Irène Joliot-Curie", "東京"]
+    table = StringTable.from_strings(strings)
+    assert len(table) == 4
+    assert [table[i] for i in range(len(table))] == strings
+    # a table read back memory-mapped decodes the same entries
+    np.save(tmp_path / "blob.npy", table.blob)
+    np.save(tmp_path / "offsets.npy", table.offsets)
+    mapped = StringTable(
+        np.load(tmp_path / "blob.npy", mmap_mode="r"), np.load(tmp_path / "offsets.npy", mmap_mode="r")
+    )
+    assert mapped[2] == "Irène Joliot-Curie"
+    assert len(StringTable.from_strings([])) == 0
@@ -0,0 +1,90 @@
+import pytest
+from table_cache import MISSING, TableCache, html_revision, url_revision
+
+
+def page(revision, text="table"):
+    return f'<script>RLCONF={{"wgRevisionId":{revision}}}</script><p>{text}</p>'
+
+
+@pytest.fixture
+def site():
+    """Pages by url, counting fetches and parses"""
+
+    class Site:
+        pages = {}
+        fetches = 0
+        parses = 0
+
+        def fetch(self, url):
+            self.fetches += 1
+            return self.pages[url]
+
+        def parse(self, html):
+            self.parses += 1
+            return html.rsplit("<p>", 1)[1]
+
+    return Site()
+
+
+def test_revisions():
+    assert url_revision("https://x/w/index.php?title=A&oldid=123") == "rev:123"
+    assert url_revision("https://x/wiki/A") is None
+    assert html_revision(page(42)) == "rev:42"
+    assert html_revision(page(42).encode()) == "rev:42"
+    assert html_revision(b"<p>a</p>") == html_revision("<p>a</p>")
+    assert html_revision(b"<p>no revision</p>").startswith("sha256:")
+    assert html_revision("<p>a</p>") != html_revision("<p>b</p>")
+    # only the revision id is decoded, the rest of the page may be in any encoding
+    assert html_revision(b"\xff\xfe" + page(7).encode("latin-1") + "ø".encode("latin-1")) == "rev:7"
+    assert html_revision("ø".encode("latin-1")).startswith("sha256:")
+
+
+def test_cached_ttl(site):
+    cache = TableCache(ttl=3600)
+    site.pages["u"] = page(1)
+    assert cache.cached("u", site.parse, site.fetch) == "table</p>"
+    assert cache.cached("u", site.parse, site.fetch) == "table</p>"
+    assert (site.fetches, site.parses) == (1, 1)
+
+
+def test_cached_revalidate(site):
+    # everything expires at once: every call fetches, but only parses new revisions
+    cache = TableCache(ttl=0)
+    site.pages["u"] = page(1)
+    cache.cached("u", site.parse, site.fetch)
+    cache.cached("u", site.parse, site.fetch)
+    assert (site.fetches, site.parses) == (2, 1)
+
+    site.pages["u"] = page(2, "new table")
+    assert cache.cached("u", site.parse, site.fetch) == "new table</p>"
+    assert (site.fetches, site.parses) == (3, 2)
+
+
+def test_cached_permalink(site):
+    cache = TableCache(ttl=0)
+    url = "https://x/w/index.php?title=A&oldid=7"
+    site.pages[url] = page(7)
+    cache.cached(url, site.parse, site.fetch)
+    cache.cached(url, site.parse, site.fetch)
+    assert (site.fetches, site.parses) == (1, 1)
+
+
+def test_disk_tier(site, tmp_path):
+    site.pages["u"] = page(1)
+    TableCache(tmp_path).cached("u", site.parse, site.fetch)
+    # a new cache, e.g. in another process, reads the entry from disk
+    cache = TableCache(tmp_path)
+    assert cache.cached("u", site.parse, site.fetch) == "table</p>"
+    assert (site.fetches, site.parses) == (1, 1)
+    cache.clear()
+    assert TableCache(tmp_path).get("u", "any") is MISSING
+
+
+def test_lru_eviction(site, tmp_path):
+    cache = TableCache(tmp_path, max_entries=2, max_disk_entries=2)
+    for url in "abc":
+        site.pages[url] = page(1, url)
+        cache.put(url, "p", site.pages[url], url)
+    assert list(cache.memory) == [("b", "p"), ("c", "p")]
+    assert len(list(tmp_path.glob("*.pickle"))) == 2
+    assert cache.get("c", "p") == "c"
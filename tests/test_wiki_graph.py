@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from filter_urls import article_url
+from wiki_graph import LinkGraph, csr
+
+edges = [
+    ("Start", "Alpha"),
+    ("Start", "Beta"),
+    ("Alpha", "Delta"),
+    ("Beta", "Delta"),
+    ("Beta", "Delta"),
+    ("Delta", "Finish"),
+    ("Finish", "Start"),
+    ("Dungeons & Dragons", "Start"),
+    ("Island", "Island"),
+]
+
+
+@pytest.fixture
+def graph():
+    return LinkGraph.from_edges(edges)
+
+
+def test_csr():
+    indptr, indices = csr(np.array([2, 0, 2, 2]), np.array([1, 1, 0, 1]), 3)
+    assert indptr.tolist() == [0, 1, 1, 3]
+    assert indices.tolist() == [1, 0, 1]
+    assert indices.dtype == np.int32
+
+
+def test_from_edges(graph):
+    assert len(graph) == 7
+    assert graph.title(graph.id("Delta")) == "Delta"
+    assert graph.id("Nowhere") is None
+    assert graph.links("Start") == ["Alpha", "Beta"]
+    # duplicated links are only stored once
+    assert graph.links("Beta") == ["Delta"]
+    assert sorted(graph.backlinks("Start")) == ["Dungeons & Dragons", "Finish"]
+    assert graph.links("Nowhere") == []
+
+
+def test_shortest_path(graph):
+    assert graph.shortest_path("Dungeons & Dragons", "Finish") in (
+        ["Dungeons & Dragons", "Start", "Alpha", "Delta", "Finish"],
+        ["Dungeons & Dragons", "Start", "Beta", "Delta", "Finish"],
+    )
+    assert graph.shortest_path("Finish", "Start") == ["Finish", "Start"]
+    assert graph.shortest_path("Start", "Start") == ["Start"]
+    assert graph.shortest_path("Start", "Island") == []
+    assert graph.shortest_path("Start", "Nowhere") == []
+
+
+def test_save_load(graph, tmp_path):
+    graph.save(tmp_path / "graph")
+    loaded = LinkGraph.load(tmp_path / "graph")
+    assert isinstance(loaded.indices, np.memmap)
+    assert len(loaded) == len(graph)
+    assert loaded.links("Start") == ["Alpha", "Beta"]
+    assert len(loaded.shortest_path("Dungeons & Dragons", "Finish")) == 5
+
+
+def test_from_tsv(tmp_path):
+    path = tmp_path / "links.tsv"
+    path.write_text(
+        "# source\ttarget\nStart\tDungeons_&_Dragons\n\nDungeons_&_Dragons\tFinish\textra\n",
+        encoding="utf-8",
+    )
+    graph = LinkGraph.from_tsv(path)
+    assert graph.shortest_path("Start", "Finish") == ["Start", "Dungeons & Dragons", "Finish"]
+
+
+def test_from_pages(tmp_path):
+    def page(*titles):
+        return "".join(f'<a href="{article_url(title, "")}">{title}</a>' for title in titles) + (
+            '<a href="/wiki/File:Image.png">file</a><a href="#top">top</a>'
+        )
+
+    (tmp_path / "Start.html").write_text(page("Dungeons & Dragons", "Alpha"), encoding="utf-8")
+    (tmp_path / "Dungeons_%26_Dragons.html").write_text(page("Irène Joliot-Curie"), encoding="utf-8")
+    graph = LinkGraph.from_pages(tmp_path)
+    assert sorted(graph.links("Start")) == ["Alpha", "Dungeons & Dragons"]
+    assert graph.shortest_path("Start", "Irène Joliot-Curie") == [
+        "Start",
+        "Dungeons & Dragons",
+        "Irène Joliot-Curie",
+    ]
+    assert graph.id("File:Image.png") is None
@@ -0,0 +1,248 @@
+import pytest
+from filter_urls import article_title, article_url
+from wiki_race_challenge import find_path, find_paths, get_backlinks, get_links, resume_path
+
+# a small wiki, title -> linked titles
+graph = {
+    "Start": ["Alpha", "Beta", "Gamma"],
+    "Alpha": ["Start", "Delta"],
+    "Beta": ["Delta", "Epsilon"],
+    "Gamma": ["Gamma", "Dungeons & Dragons"],
+    "Delta": ["Zeta"],
+    "Epsilon": ["Zeta", "Irène Joliot-Curie"],
+    "Dungeons & Dragons": ["Irène Joliot-Curie"],
+    "Zeta": ["Finish"],
+    "Irène Joliot-Curie": ["Eta"],
+    "Eta": ["Theta"],
+    "Theta": ["Finish"],
+    "Finish": ["Start"],
+    "Island": ["Start"],
+}
+
+
+@pytest.fixture
+def race(local_wiki):
+    local_wiki.serve_graph(graph)
+    return local_wiki
+
+
+def url(race, title):
+    return race.url(article_url(title, ""))
+
+
+def check_path(path, length):
+    """Check that `path` follows links of `graph` and has `length` links"""
+    titles = [article_title(u) for u in path]
+    assert len(titles) == length + 1
+    for a, b in zip(titles, titles[1:]):
+        assert b in graph[a], f"{a} does not link to {b}"
+
+
+def test_get_links(race):
+    links = get_links(url(race, "Gamma"))
+    assert links == [url(race, "Gamma"), url(race, "Dungeons & Dragons")]
+
+
+def test_get_backlinks(local_wiki):
+    # one result per response, to exercise the continuation
+    local_wiki.serve_graph(graph, api_limit=1)
+    backlinks = get_backlinks(["Zeta", "Start", "Island"], local_wiki.url("/w/api.php"))
+    assert sorted(backlinks["Zeta"]) == ["Delta", "Epsilon"]
+    assert sorted(backlinks["Start"]) == ["Alpha", "Finish", "Island"]
+    assert backlinks["Island"] == []
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_find_path(race, bidirectional):
+    start, finish = url(race, "Start"), url(race, "Finish")
+    path = find_path(start, finish, bidirectional=bidirectional)
+    assert path[0] == start
+    assert path[-1] == finish
+    check_path(path, 4)
+    if not bidirectional:
+        assert find_path(start, finish, bloom_capacity=100) == path
+    # finish is recognized as soon as it is linked to, never fetched
+    assert race.count(article_url("Finish", "")) == 0
+
+    path = find_path(url(race, "Gamma"), finish, bidirectional=bidirectional)
+    check_path(path, 5)
+    assert find_path(start, start, bidirectional=bidirectional) == [start]
+    assert find_path(start, url(race, "Island"), bidirectional=bidirectional) == []
+
+
+def test_find_path_bidirectional_fetches_less(race):
+    start, finish = url(race, "Start"), url(race, "Finish")
+    find_path(start, finish)
+    forward_fetches = len(race.page_requests())
+    race.requests.clear()
+    find_path(start, finish, bidirectional=True)
+    assert len(race.page_requests()) < forward_fetches
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_find_path_concurrent(race, bidirectional):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def slow(html):
+        def page(query):
+            with lock:
+                in_flight[0] += 1
+                max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            return html
+
+        return page
+
+    for path, html in list(race.pages.items()):
+        if path.startswith("/wiki/"):
+            race.pages[path] = slow(html)
+
+    start, finish = url(race, "Start"), url(race, "Finish")
+    serial = find_path(start, finish, bidirectional=bidirectional)
+    assert max_in_flight[0] == 1
+    # the same shortest path, with the pages of a level fetched at the same time
+    path = find_path(start, finish, bidirectional=bidirectional, max_workers=4)
+    assert path == serial
+    check_path(path, 4)
+    assert find_path(start, url(race, "Island"), max_workers=4) == []
+    assert 1 < max_in_flight[0] <= 4
+
+
+def test_find_path_offline(race, tmp_path):
+    from wiki_graph import LinkGraph
+
+    edges = [(title, link) for title, links in graph.items() for link in links]
+    LinkGraph.from_edges(edges).save(tmp_path / "graph")
+    start, finish = url(race, "Start"), url(race, "Finish")
+    path = find_path(start, finish, graph=tmp_path / "graph")
+    assert path[0] == start
+    assert path[-1] == finish
+    check_path(path, 4)
+    assert find_path(start, url(race, "Island"), graph=tmp_path / "graph") == []
+    # no page was fetched
+    assert race.requests == []
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"graph": "graph", "bidirectional": True},
+        {"heuristic": True, "processes": 2},
+        {"graph": "graph", "cache": "cache"},
+        {"processes": 2, "checkpoint": "race.checkpoint"},
+        {"heuristic": True, "redirects": "resolver"},
+        {"bidirectional": True, "bloom_capacity": 100},
+        {"api_url": "https://en.wikipedia.org/w/api.php"},
+    ],
+)
+def test_find_path_incompatible_options(options):
+    # rejected before any search starts
+    with pytest.raises(ValueError):
+        find_path("https://en.wikipedia.org/wiki/Start", "https://en.wikipedia.org/wiki/Finish", **options)
+
+
+def test_find_path_heuristic(local_wiki):
+    distractors = [f"Distractor {i}" for i in range(8)]
+    topic_graph = {
+        "Start": distractors + ["Peace treaty"],
+        **{title: ["Start"] for title in distractors},
+        "Peace treaty": ["Start", "Nobel Peace Prize"],
+        "Nobel Peace Prize": ["Peace", "Nobel Prize"],
+    }
+    local_wiki.serve_graph(topic_graph)
+    start = local_wiki.url(article_url("Start", ""))
+    finish = local_wiki.url(article_url("Nobel Peace Prize", ""))
+
+    assert len(find_path(start, finish)) == 3
+    bfs_fetches = len(local_wiki.page_requests())
+    local_wiki.requests.clear()
+    path = find_path(start, finish, heuristic=True)
+    assert [article_title(u) for u in path] == ["Start", "Peace treaty", "Nobel Peace Prize"]
+    # the finish profile, Start and Peace treaty
+    assert len(local_wiki.page_requests()) == 3 < bfs_fetches
+
+
+def test_find_path_heuristic_race(race):
+    start, finish = url(race, "Start"), url(race, "Finish")
+    path = find_path(start, finish, heuristic=True, max_workers=2)
+    assert path[0] == start
+    assert path[-1] == finish
+    check_path(path, len(path) - 1)
+    assert find_path(start, url(race, "Island"), heuristic=True) == []
+
+
+@pytest.mark.parametrize("bidirectional", [False, True])
+def test_find_path_cache(race, tmp_path, bidirectional):
+    from link_cache import LinkCache
+
+    start, finish = url(race, "Start"), url(race, "Finish")
+    path = find_path(start, finish, bidirectional=bidirectional, cache=LinkCache(tmp_path / "links.sqlite"))
+    assert race.page_requests()
+    race.requests.clear()
+    # another search, with its own connection to the database, needs no page
+    cache = LinkCache(tmp_path / "links.sqlite")
+    assert find_path(start, finish, bidirectional=bidirectional, cache=cache) == path
+    assert race.page_requests() == []
+
+
+def test_find_paths(race):
+    start = url(race, "Start")
+    finishes = [url(race, title) for title in ["Finish", "Delta", "Eta", "Island", "Start"]]
+    paths = find_paths(start, finishes)
+    assert list(paths) == finishes
+    for finish, length in zip(finishes, [4, 2, 4, None, 0]):
+        if length is None:
+            assert paths[finish] == []
+        else:
+            assert paths[finish][-1] == finish
+            check_path(paths[finish], length)
+    # one search for all the finishes, fetching each page at most once
+    assert len(race.page_requests()) == len(set(race.page_requests()))
+
+    race.requests.clear()
+    paths = find_paths(start, finishes[:3], max_depth=2, max_workers=4)
+    assert paths[finishes[0]] == paths[finishes[2]] == []
+    check_path(paths[finishes[1]], 2)
+    # only the articles at depth 0 and 1 are fetched
+    assert set(race.page_requests()) <= {article_url(t, "") for t in ["Start", "Alpha", "Beta", "Gamma"]}
+
+
+def test_resume_path(race, tmp_path, monkeypatch):
+    import wiki_race_challenge
+
+    start, finish = url(race, "Start"), url(race, "Finish")
+    expected = find_path(start, finish)
+    race.requests.clear()
+
+    # crash while fetching the fifth page
+    get_links = wiki_race_challenge.get_links
+    fetched = []
+
+    def crashing_get_links(page_url, cache=None):
+        if len(fetched) == 4:
+            raise KeyboardInterrupt
+        fetched.append(page_url)
+        return get_links(page_url, cache)
+
+    checkpoint = tmp_path / "race.checkpoint"
+    monkeypatch.setattr(wiki_race_challenge, "get_links", crashing_get_links)
+    with pytest.raises(KeyboardInterrupt):
+        find_path(start, finish, checkpoint=checkpoint, checkpoint_every=0)
+    assert checkpoint.exists()
+    before = race.page_requests()
+    assert len(before) == 4
+
+    monkeypatch.setattr(wiki_race_challenge, "get_links", get_links)
+    race.requests.clear()
+    assert resume_path(checkpoint) == expected
+    # no page is fetched again, and the finished search removes its checkpoint
+    assert not set(race.page_requests()) & set(before)
+    assert not checkpoint.exists()
+
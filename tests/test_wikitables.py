@@ -0,0 +1,106 @@
+import pytest
+from wikitables import Cell, coerce_numeric, expand_spans, find_column, parse_numbers, read_wikitable, read_wikitables
+
+sample_HTML = """
+<table class="wikitable">
+<tr><th colspan="4">Medals by summer sport</th></tr>
+<tr><th rowspan="2">Sport</th><th colspan="2">Medals</th><th rowspan="2">Total</th></tr>
+<tr><th><img alt="Gold medal" src="gold.png"></th><th>Silver</th></tr>
+<tr><th><a href="/wiki/Sailing">Sailing</a><sup class="reference">[a]</sup></th>
+    <td>17</td><td>11</td><td>1,234</td></tr>
+<tr><th><a href="/wiki/Athletics">Athletics</a></th><td>5</td><td>&mdash;</td><td>2.5</td></tr>
+<tr><th>Totals (2 entries)</th><td>22</td><td>11</td>
+    <td><span style="display:none">0001</span>1,236.5</td></tr>
+</table>
+"""
+
+nested_HTML = """
+<table class="layout"><tr><td>
+  <p>Medals by summer sport</p>
+  <table class="wikitable sortable">
+    <tr><th>Medals by summer sport</th><th>Gold</th></tr>
+    <tr><td>Rowing</td><td>3</td></tr>
+  </table>
+</td></tr></table>
+<table class="wikitable"><tr><th>Other</th></tr><tr><td>x</td></tr></table>
+"""
+
+
+@pytest.fixture(params=["bs4", "lxml"])
+def flavor(request):
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    return request.param
+
+
+def test_expand_spans():
+    a = Cell(True, "a", None, 2, 1)
+    b = Cell(True, "b", None, 1, 2)
+    c = Cell(False, "c", None, 1, 1)
+    d = Cell(False, "d", None, 3, 1)
+    grid = expand_spans([[a, b, d], [c], [c, c]])
+    assert grid == [
+        [a, b, b, d],
+        [a, c, None, d],
+        [c, c, None, d],
+    ]
+
+
+def test_read_wikitable(flavor):
+    df = read_wikitable(sample_HTML, match="summer sport", links=True, flavor=flavor)
+    assert df.attrs["caption"] == "Medals by summer sport"
+    assert list(df.columns) == [
+        "Sport",
+        "Sport link",
+        "Medals Gold medal",
+        "Medals Silver",
+        "Total",
+    ]
+    assert list(df["Sport"]) == ["Sailing", "Athletics", "Totals (2 entries)"]
+    assert list(df["Sport link"].fillna("")) == ["/wiki/Sailing", "/wiki/Athletics", ""]
+    # numeric coercion
+    assert str(df["Medals Gold medal"].dtype) == "Int64"
+    assert list(df["Medals Gold medal"]) == [17, 5, 22]
+    assert str(df["Medals Silver"].dtype) == "Int64"
+    assert df["Medals Silver"].isna().tolist() == [False, True, False]
+    assert str(df["Total"].dtype) == "Float64"
+    assert list(df["Total"]) == [1234, 2.5, 1236.5]
+    assert find_column(df, "gold") == "Medals Gold medal"
+    assert find_column(df, "bronze") is None
+
+
+def test_coerce_numeric():
+    import pandas as pd
+
+    column = pd.Series(["1,061", "209‡", "12[a]", "–", None], dtype="string")
+    assert coerce_numeric(column).tolist() == [1061, 209, 12, pd.NA, pd.NA]
+    # a cell that is not a number leaves the column as it is, parse_numbers tells which one
+    column = pd.Series(["n/a", "5", ""], dtype="string")
+    assert coerce_numeric(column) is column
+    numbers, present = parse_numbers(column)
+    assert numbers.isna().tolist() == [True, False, True]
+    assert present.tolist() == [True, True, False]
+
+
+def test_read_wikitables_nested(flavor):
+    dfs = read_wikitables(nested_HTML, match="summer sport", flavor=flavor)
+    # only the inner table, not the layout table around it
+    assert len(dfs) == 1
+    assert list(dfs[0].columns) == ["Medals by summer sport", "Gold"]
+    assert dfs[0]["Gold"].tolist() == [3]
+
+    df = read_wikitable(nested_HTML, attrs={"class": "wikitable"}, flavor=flavor)
+    assert list(df.columns) == ["Medals by summer sport", "Gold"]
+    with pytest.raises(ValueError):
+        read_wikitable(nested_HTML, match="winter sport", flavor=flavor)
+
+
+def test_read_wikitable_bytes(flavor):
+    html = sample_HTML.replace("Athletics</a>", "Friidrett – Ålesund</a>")
+    df = read_wikitable(html.encode("utf-8"), match="summer sport", links=True, flavor=flavor)
+    assert list(df["Sport"]) == ["Sailing", "Friidrett – Ålesund", "Totals (2 entries)"]
+    assert list(df["Total"]) == [1234, 2.5, 1236.5]
+
+    latin = html.replace(" –", "").encode("latin-1")
+    df = read_wikitable(latin, match="summer sport", flavor=flavor, encoding="latin-1")
+    assert df["Sport"][1] == "Friidrett Ålesund"
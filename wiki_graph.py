@@ -0,0 +1,307 @@
+"""
+Offline link graph for wiki races
+
+The links between articles are stored as a compressed sparse row (CSR) adjacency structure:
+the links of article `i` are `indices[indptr[i]:indptr[i + 1]]`, with a second CSR for the
+links pointing to each article. Articles are numbered in sorted title order, so a title is
+found by binary search in the title table. The arrays are saved as .npy files and
+memory-mapped back in, so a saved graph loads instantly and races need no requests.
+"""
+from __future__ import annotations
+
+import json
+from bisect import bisect_left
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from filter_urls import article_title, find_articles
+from string_table import StringTable
+
+# Array files making up a saved graph
+array_names = [
+    "indptr",
+    "indices",
+    "rev_indptr",
+    "rev_indices",
+    "title_blob",
+    "title_offsets",
+]
+
+
+def csr(sources: np.ndarray, targets: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Build the CSR arrays of the edges `sources[i] -> targets[i]` between `n` nodes
+
+    Arguments:
+        sources (np.ndarray): source node of each edge
+        targets (np.ndarray): target node of each edge
+        n (int): number of nodes
+    Returns:
+        indptr, indices (tuple[np.ndarray, np.ndarray]): the targets of node i are
+            indices[indptr[i]:indptr[i + 1]], sorted and without duplicates
+    """
+    # Sort the edges by source, then target, and drop the duplicates
+    keys = np.unique(sources.astype(np.int64) * n + targets)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(np.bincount(keys // n, minlength=n), dtype=np.int64)
+    return indptr, (keys % n).astype(np.int32)
+
+
+def expand(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Get all the edges out of the nodes in `frontier`
+
+    Arguments:
+        indptr, indices (np.ndarray): the CSR arrays, see `csr`
+        frontier (np.ndarray): node ids
+    Returns:
+        sources, targets (tuple[np.ndarray, np.ndarray]): the edges, grouped by source in frontier order
+    """
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    # Position of every edge in `indices`: the start of its group plus its offset in the group
+    group_starts = np.cumsum(lengths) - lengths
+    offsets = np.arange(lengths.sum(), dtype=np.int64) - np.repeat(group_starts, lengths)
+    targets = np.asarray(indices[np.repeat(starts, lengths) + offsets])
+    return np.repeat(frontier, lengths), targets
+
+
+class LinkGraph:
+    """Links between wiki articles, as forward and reverse CSR arrays over integer article ids"""
+
+    def __init__(self, arrays: dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.titles = StringTable(arrays["title_blob"], arrays["title_offsets"])
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.rev_indptr = arrays["rev_indptr"]
+        self.rev_indices = arrays["rev_indices"]
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[tuple[str, str]]) -> LinkGraph:
+        """Build the graph from (source title, target title) pairs
+
+        Parameters:
+            edges (Iterable[tuple[str, str]]): the links, titles may be repeated in any order
+        Returns:
+            graph (LinkGraph): the graph, with every title of `edges` as an article
+        """
+        # Intern the titles while reading the edges, then renumber them in sorted order
+        ids: dict[str, int] = {}
+        sources, targets = [], []
+        for source, target in edges:
+            sources.append(ids.setdefault(source, len(ids)))
+            targets.append(ids.setdefault(target, len(ids)))
+
+        titles = sorted(ids)
+        order = np.empty(len(ids), dtype=np.int32)
+        order[[ids[title] for title in titles]] = np.arange(len(titles), dtype=np.int32)
+        sources = order[np.array(sources, dtype=np.int64)]
+        targets = order[np.array(targets, dtype=np.int64)]
+
+        indptr, indices = csr(sources, targets, len(titles))
+        rev_indptr, rev_indices = csr(targets, sources, len(titles))
+        table = StringTable.from_strings(titles)
+        arrays = {
+            "indptr": indptr,
+            "indices": indices,
+            "rev_indptr": rev_indptr,
+            "rev_indices": rev_indices,
+            "title_blob": table.blob,
+            "title_offsets": table.offsets,
+        }
+        return cls(arrays)
+
+    @classmethod
+    def from_tsv(cls, path: str | Path) -> LinkGraph:
+        """Build the graph from a tab separated file with one `source<TAB>target` link per line
+
+        Titles may be written with underscores, as in the Wikipedia dumps. Empty lines,
+        lines starting with '#' and extra columns are ignored.
+
+        Parameters:
+            path (str | Path): the file to read
+        Returns:
+            graph (LinkGraph): the graph
+        """
+        def edges():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    source, target, *_ = line.rstrip("\n").split("\t")
+                    yield source.replace("_", " "), target.replace("_", " ")
+
+        return cls.from_edges(edges())
+
+    @classmethod
+    def from_pages(
+        cls, directory: str | Path, base_url: str = "https://en.wikipedia.org"
+    ) -> LinkGraph:
+        """Build the graph from a directory of saved article pages
+
+        Each `<title>.html` file is an article, named as in its URL (`Dungeons_%26_Dragons.html`),
+        and its links are the articles found by `filter_urls.find_articles`.
+
+        Parameters:
+            directory (str | Path): the directory with the pages
+            base_url (str): the base url passed to `find_articles`
+        Returns:
+            graph (LinkGraph): the graph
+        """
+        def edges():
+            for path in sorted(Path(directory).glob("*.html")):
+                source = article_title("/wiki/" + path.stem)
+                html = path.read_text(encoding="utf-8")
+                for url in find_articles(html, base_url=base_url):
+                    yield source, article_title(url)
+
+        return cls.from_edges(edges())
+
+    def save(self, directory: str | Path) -> None:
+        """Write the graph to `directory`, one .npy file per array
+
+        Parameters:
+            directory (str | Path): directory to save to, created if missing
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in array_names:
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(self.arrays[name]))
+        with open(directory / "meta.json", "w") as f:
+            json.dump({"articles": len(self), "links": len(self.indices)}, f)
+
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> LinkGraph:
+        """Load a graph written by `save`
+
+        Parameters:
+            directory (str | Path): directory the graph was saved to
+            mmap (bool): memory-map the arrays instead of reading them into memory
+        Returns:
+            graph (LinkGraph): the loaded graph
+        """
+        directory = Path(directory)
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in array_names
+        }
+        return cls(arrays)
+
+    def id(self, title: str) -> int | None:
+        """Return the id of the article `title`, or None if it is not in the graph"""
+        i = bisect_left(self.titles, title)
+        if i < len(self.titles) and self.titles[i] == title:
+            return i
+        return None
+
+    def title(self, i: int) -> str:
+        """Return the title of the article with id `i`"""
+        return self.titles[i]
+
+    def links(self, title: str) -> list[str]:
+        """Return the titles of the articles `title` links to"""
+        i = self.id(title)
+        if i is None:
+            return []
+        return [self.titles[j] for j in self.indices[self.indptr[i] : self.indptr[i + 1]]]
+
+    def backlinks(self, title: str) -> list[str]:
+        """Return the titles of the articles linking to `title`"""
+        i = self.id(title)
+        if i is None:
+            return []
+        return [
+            self.titles[j]
+            for j in self.rev_indices[self.rev_indptr[i] : self.rev_indptr[i + 1]]
+        ]
+
+    def shortest_path(self, start: str, finish: str) -> list[str]:
+        """Find a shortest chain of links from `start` to `finish`
+
+        A bidirectional breadth-first search, expanding a whole level of the smaller frontier
+        at a time with vectorized numpy operations.
+
+        Parameters:
+            start (str): title of the first article
+            finish (str): title of the last article
+        Returns:
+            titles (list[str]): the titles along the path, from `start` to `finish`,
+                or an empty list if there is none
+        """
+        source, target = self.id(start), self.id(finish)
+        if source is None or target is None:
+            return []
+        if source == target:
+            return [start]
+
+        n = len(self)
+        # Distance from `start` and parent towards it, distance to `finish` and child towards it
+        dist_f = np.full(n, -1, dtype=np.int32)
+        dist_b = np.full(n, -1, dtype=np.int32)
+        parent = np.full(n, -1, dtype=np.int32)
+        child = np.full(n, -1, dtype=np.int32)
+        dist_f[source] = dist_b[target] = 0
+        forward = np.array([source], dtype=np.int32)
+        backward = np.array([target], dtype=np.int32)
+
+        while len(forward) and len(backward):
+            if len(forward) <= len(backward):
+                frontier, indptr, indices, dist, links, other = (
+                    forward, self.indptr, self.indices, dist_f, parent, dist_b
+                )
+            else:
+                frontier, indptr, indices, dist, links, other = (
+                    backward, self.rev_indptr, self.rev_indices, dist_b, child, dist_f
+                )
+            sources, targets = expand(indptr, indices, frontier)
+            new = dist[targets] < 0
+            # Keep the first edge reaching each new node, as a serial search would
+            nodes, first = np.unique(targets[new], return_index=True)
+            dist[nodes] = dist[frontier[0]] + 1
+            links[nodes] = sources[new][first]
+
+            meets = nodes[other[nodes] >= 0]
+            if len(meets):
+                meet = meets[np.argmin(dist_f[meets] + dist_b[meets])]
+                break
+            if frontier is forward:
+                forward = nodes.astype(np.int32)
+            else:
+                backward = nodes.astype(np.int32)
+        else:
+            return []
+
+        # Join the two halves of the path at the node where they met
+        path = []
+        node = int(meet)
+        while node >= 0:
+            path.append(node)
+            node = int(parent[node])
+        path.reverse()
+        node = int(child[meet])
+        while node >= 0:
+            path.append(node)
+            node = int(child[node])
+        return [self.titles[i] for i in path]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build an offline link graph for wiki races")
+    parser.add_argument("source", help="a tab separated file of links, or a directory of saved pages")
+    parser.add_argument("output", help="directory to save the graph to")
+    parser.add_argument("--base-url", default="https://en.wikipedia.org", help="base url of saved pages")
+    args = parser.parse_args()
+
+    if Path(args.source).is_dir():
+        graph = LinkGraph.from_pages(args.source, base_url=args.base_url)
+    else:
+        graph = LinkGraph.from_tsv(args.source)
+    graph.save(args.output)
+    print(f"Saved {len(graph)} articles and {len(graph.indices)} links to {args.output}")
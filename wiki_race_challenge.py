@@ -2,17 +2,99 @@
 Bonus task
 """
 from __future__ import annotations
-import requests
-from bs4 import BeautifulSoup
-from collections import deque
+import heapq
+import json
+import math
+import re
+import time
+from array import array
+from collections import Counter, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urljoin, urlparse
 
+from filter_urls import article_title, article_url, scan_article_links
+from instrumentation import timed
+from node_table import NodeTable
+from race_checkpoint import SearchState, load_checkpoint, save_checkpoint
+from redirects import RedirectResolver, api_batch_size
+from requesting_urls import get_html
 
-def find_path(start: str, finish: str) -> list[str]:
+# Only used in annotations, numpy is only needed for offline races and imported when a graph is used
+if TYPE_CHECKING:
+    from link_cache import LinkCache
+    from wiki_graph import LinkGraph
+
+# Words of article titles, and the category links of a page
+word_pat = re.compile(r"\w+")
+category_pat = re.compile(r'href="/wiki/Category:([^"#]+)', flags=re.IGNORECASE)
+
+# Words too common to tell whether two articles are related
+stop_words = {"a", "an", "and", "at", "by", "de", "for", "from", "in", "list", "of", "on", "the", "to", "with"}
+
+# The options of find_path each of its searches supports, the level by level one by default
+search_options = {
+    "graph": set(),
+    "processes": {"cache"},
+    "heuristic": {"max_workers", "bloom_capacity", "cache"},
+    "bidirectional": {"api_url", "max_workers", "cache"},
+    "levels": {"max_workers", "bloom_capacity", "cache", "checkpoint", "redirects"},
+}
+
+
+# The whole race, the fetches it makes are also recorded on their own by get_html
+@timed("end_to_end", "find_path")
+def find_path(
+    start: str,
+    finish: str,
+    bidirectional: bool = False,
+    api_url: str | None = None,
+    max_workers: int = 1,
+    graph: LinkGraph | str | Path | None = None,
+    bloom_capacity: int | None = None,
+    heuristic: bool = False,
+    cache: LinkCache | None = None,
+    checkpoint: str | Path | None = None,
+    checkpoint_every: float = 60,
+    processes: int | None = None,
+    redirects: RedirectResolver | None = None,
+) -> list[str]:
     """Find the shortest path from `start` to `finish`
 
     Arguments:
       start (str): wikipedia article URL to start from
       finish (str): wikipedia article URL to stop at
+      bidirectional (bool): search from both ends at once, backwards from `finish` through
+        the pages linking to it, until the two searches meet in the middle
+      api_url (str, optional): URL of the MediaWiki API used for the backward search,
+        by default /w/api.php on the host of `start`
+      max_workers (int): number of pages fetched at the same time. The pages of a BFS level
+        are fetched concurrently, but processed in order, and a level is always completed
+        before the next one, so the path found is still a shortest one.
+      graph (LinkGraph | str | Path, optional): search an offline link graph, or the directory
+        it was saved to (see wiki_graph), instead of fetching the pages
+      bloom_capacity (int, optional): expected number of articles visited, to check a Bloom
+        filter before the table of visited articles in huge searches (see node_table)
+      heuristic (bool): follow the links most similar to `finish` first, instead of searching
+        level by level (see find_path_best_first). Usually much faster, but the path found
+        may be longer than the shortest one.
+      cache (LinkCache, optional): persistent cache of the links of each page (see link_cache),
+        checked before fetching a page, and shared by every search using the same database
+      checkpoint (str | Path, optional): file to save the state of the level by level search to,
+        to continue it with resume_path after a crash (see find_paths)
+      checkpoint_every (float): number of seconds between checkpoints, see find_paths
+      processes (int, optional): share the level by level search between this many worker
+        processes (see distributed_race), the cache, if any, is shared through its database
+      redirects (RedirectResolver, optional): resolve the titles of the linked articles
+        (see redirects), so an article reached through redirects or spelling variants
+        is only fetched once, in the level by level search
+
+    `graph`, `processes`, `heuristic` and `bidirectional` each choose a different search,
+    and can't be combined. Passing an option the chosen search doesn't support
+    (see `search_options`) raises a ValueError instead of ignoring it.
 
     Returns:
       urls (list[str]):
@@ -22,48 +104,558 @@ def find_path(start: str, finish: str) -> list[str]:
         All items of the list should be URLs for wikipedia articles.
         Each article should have a direct link to the next article in the list.
     """
-    # Initialize dictionary, to track of visited URLs and their parent URLs
-    visited = {start: None}
-    # Initialize queue with start URL
-    queue = deque([start])
-
-    # Continue until queue is empty
-    while queue:
-        # Pop the next URL from the front of the queue
-        url = queue.popleft()
-        if url == finish:
-            path = []
-            # Follow the path backward from finish to start
-            while url is not None:
-                path.append(url)
-                url = visited[url]
-            # Reverse the path so it goes from start to finish and return it
-            return path[::-1]
+    searches = {
+        "graph": graph is not None,
+        "processes": processes is not None,
+        "heuristic": heuristic,
+        "bidirectional": bidirectional,
+    }
+    chosen = [name for name, used in searches.items() if used]
+    if len(chosen) > 1:
+        raise ValueError(f"{' and '.join(chosen)} choose different searches, they can't be combined")
+    search = chosen[0] if chosen else "levels"
+    options = {
+        "api_url": api_url is not None,
+        "max_workers": max_workers != 1,
+        "bloom_capacity": bloom_capacity is not None,
+        "cache": cache is not None,
+        "checkpoint": checkpoint is not None,
+        "redirects": redirects is not None,
+    }
+    unsupported = [name for name, used in options.items() if used and name not in search_options[search]]
+    if unsupported:
+        raise ValueError(f"The {search} search doesn't support {', '.join(unsupported)}")
+
+    if graph is not None:
+        return find_path_offline(start, finish, graph)
+
+    if processes is not None:
+        from distributed_race import find_path_distributed
+
+        cache_path = cache.path if cache is not None else None
+        return find_path_distributed(start, finish, processes=processes, cache=cache_path)
+
+    if heuristic:
+        return find_path_best_first(start, finish, max_workers, bloom_capacity, cache)
+
+    if bidirectional:
+        if api_url is None:
+            api_url = urljoin(start, "/w/api.php")
+        return find_path_bidirectional(start, finish, api_url, max_workers, cache)
+
+    paths = find_paths(
+        start,
+        [finish],
+        max_workers=max_workers,
+        cache=cache,
+        bloom_capacity=bloom_capacity,
+        checkpoint=checkpoint,
+        checkpoint_every=checkpoint_every,
+        redirects=redirects,
+    )
+    return paths[finish]
+
+
+def find_paths(
+    start: str,
+    finishes: Iterable[str],
+    max_depth: int | None = None,
+    max_workers: int = 1,
+    cache: LinkCache | None = None,
+    bloom_capacity: int | None = None,
+    checkpoint: str | Path | None = None,
+    checkpoint_every: float = 60,
+    redirects: RedirectResolver | None = None,
+) -> dict[str, list[str]]:
+    """Find the shortest paths from `start` to each of `finishes`, with a single search
+
+    The search goes level by level as in find_path, and stops when every finish article
+    has been found, or after `max_depth` levels.
+
+    Arguments:
+      start (str): wikipedia article URL to start from
+      finishes (Iterable[str]): wikipedia article URLs to find paths to
+      max_depth (int, optional): maximum number of links of a path, by default no limit
+      max_workers (int): number of pages fetched at the same time
+      cache (LinkCache, optional): see find_path
+      bloom_capacity (int, optional): see find_path
+      checkpoint (str | Path, optional): file to save the state of the search to, at the end
+        of every level, every `checkpoint_every` seconds and when the search is interrupted.
+        An interrupted search is continued by resume_paths. The file is removed once the
+        search is over.
+      checkpoint_every (float): number of seconds between checkpoints within a level
+      redirects (RedirectResolver, optional): see find_path
+
+    Returns:
+      paths (dict[str, list[str]]): finish URL -> the path from `start` to it, see find_path,
+        or an empty list if it could not be reached within `max_depth` links
+    """
+    finishes = list(finishes)
+    titles = resolve_titles([article_title(url) for url in [start, *finishes]], redirects)
+    # The finish URLs of each article title to find
+    targets: dict[str, list[str]] = {}
+    for finish, title in zip(finishes, titles[1:]):
+        targets.setdefault(title, []).append(finish)
+
+    # Track the visited articles by title, each with an integer id and the id of its parent
+    nodes = NodeTable(bloom_capacity)
+    title = titles[0]
+    nodes.add(title)
+    state = SearchState(start, targets, nodes, max_depth=max_depth)
+    if title in targets:
+        state.found[title] = 0
+    return search_levels(state, max_workers, cache, checkpoint, checkpoint_every, redirects)
+
+
+def resume_paths(
+    checkpoint: str | Path,
+    max_workers: int = 1,
+    cache: LinkCache | None = None,
+    bloom_capacity: int | None = None,
+    checkpoint_every: float = 60,
+    redirects: RedirectResolver | None = None,
+) -> dict[str, list[str]]:
+    """Continue a search of find_paths (or find_path) from its checkpoint
+
+    Arguments:
+      checkpoint (str | Path): the checkpoint file of the interrupted search,
+        which keeps being updated as the search goes on
+      max_workers, cache, bloom_capacity, checkpoint_every, redirects: see find_paths
+
+    Returns:
+      paths (dict[str, list[str]]): see find_paths
+    """
+    state = load_checkpoint(checkpoint, bloom_capacity)
+    return search_levels(state, max_workers, cache, checkpoint, checkpoint_every, redirects)
+
+
+def resume_path(
+    checkpoint: str | Path, max_workers: int = 1, cache: LinkCache | None = None
+) -> list[str]:
+    """Continue a search of find_path from its checkpoint
+
+    Arguments:
+      checkpoint (str | Path): the checkpoint file of the interrupted search
+      max_workers, cache: see find_path
+
+    Returns:
+      urls (list[str]): the path found, see find_path
+    """
+    paths = resume_paths(checkpoint, max_workers, cache)
+    return next(iter(paths.values()))
+
+
+def search_levels(
+    state: SearchState,
+    max_workers: int = 1,
+    cache: LinkCache | None = None,
+    checkpoint: str | Path | None = None,
+    checkpoint_every: float = 60,
+    redirects: RedirectResolver | None = None,
+) -> dict[str, list[str]]:
+    """Run the level by level search of find_paths from `state`, see find_paths"""
+    start, targets, nodes, found = state.start, state.targets, state.nodes, state.found
+    base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+    saved_at = time.monotonic()
+
+    def done() -> bool:
+        return len(found) == len(targets)
+
+    try:
+        # Continue until a level is empty, every finish article has been found, or the depth limit
+        while state.level and not done() and (state.max_depth is None or state.depth < state.max_depth):
+            # Only the articles of the level not expanded before a restart are left
+            level = state.level[state.position :]
+            urls = (start if node == 0 else article_url(nodes.title(node), base_url) for node in level)
+            # Iterate over all the articles the articles of the level link to
+            for node, (_, links) in zip(level, iter_links(urls, max_workers, cache)):
+                for title in resolve_titles([article_title(url) for url in links], redirects):
+                    # If this article has not been visited yet, add it to the next level and mark it as visited
+                    next_node = nodes.add(title, node)
+                    if next_node is None:
+                        continue
+                    state.next_level.append(next_node)
+                    # The levels are expanded in order, so the first time a finish is found is the closest
+                    if title in targets:
+                        found[title] = next_node
+                        if done():
+                            break
+                state.position += 1
+                if done():
+                    break
+                if checkpoint is not None and time.monotonic() - saved_at >= checkpoint_every:
+                    save_checkpoint(checkpoint, state)
+                    saved_at = time.monotonic()
+            state.level, state.position, state.next_level = state.next_level, 0, array("i")
+            state.depth += 1
+            if checkpoint is not None and not done():
+                save_checkpoint(checkpoint, state)
+                saved_at = time.monotonic()
+    except BaseException:
+        # Keep what was fetched so far, the search can be resumed from there
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, state)
+        raise
+
+    if checkpoint is not None:
+        Path(checkpoint).unlink(missing_ok=True)
+
+    paths = {}
+    for title, urls in targets.items():
+        for finish in urls:
+            # If the finish article was not found, its path is an empty list
+            if title not in found:
+                paths[finish] = []
+                continue
+            # Follow the parents from finish back to start
+            path = [article_url(t, base_url) for t in nodes.path(found[title])]
+            path[0], path[-1] = start, finish
+            paths[finish] = path
+    return paths
+
+
+def resolve_titles(titles: list[str], redirects: RedirectResolver | None) -> list[str]:
+    """Resolve article titles with `redirects`, if any, leaving them as they are on errors"""
+    if redirects is None or not titles:
+        return titles
+    try:
+        resolved = redirects.resolve(titles)
+    except Exception as e:
+        print(f"Error: {e}")
+        return titles
+    return [resolved[title] for title in titles]
+
+
+def title_words(title: str) -> set[str]:
+    """Get the lower case words of an article title, without the stop words"""
+    return set(word_pat.findall(title.lower())) - stop_words
+
+
+def finish_profile(finish: str) -> dict[str, float]:
+    """Describe the finish article by the words of its title, its links and its categories
+
+    Arguments:
+      finish (str): wikipedia article URL, fetched once
+
+    Returns:
+      weights (dict[str, float]): word -> weight, the share of the profile titles with the word,
+        plus 1 for the words of the finish title itself
+    """
+    html = get_html(finish)
+    titles = [article_title(url) for url in scan_article_links(html, base_url=finish)]
+    # Categories are about the topic of the article, count them twice
+    categories = [unquote(name).replace("_", " ") for name in category_pat.findall(html)]
+    counts = Counter()
+    for title in titles + categories * 2:
+        counts.update(title_words(title))
+    n_titles = len(titles) + 2 * len(categories)
+    weights = {word: count / n_titles for word, count in counts.items()}
+    for word in title_words(article_title(finish)):
+        weights[word] = weights.get(word, 0) + 1
+    return weights
+
+
+def similarity(title: str, weights: dict[str, float]) -> float:
+    """Score how related an article title is to a profile made by finish_profile"""
+    words = title_words(title)
+    if not words:
+        return 0.0
+    return sum(weights.get(word, 0) for word in words) / math.sqrt(len(words))
+
+
+def find_path_best_first(
+    start: str,
+    finish: str,
+    max_workers: int = 1,
+    bloom_capacity: int | None = None,
+    cache: LinkCache | None = None,
+) -> list[str]:
+    """Find a path from `start` to `finish`, following the links most similar to `finish` first
+
+    A greedy best-first search: the finish article is fetched once to build a profile of
+    words (finish_profile), every article found is scored by the similarity of its title to it,
+    and the best scoring articles are fetched first, `max_workers` at a time.
+    Ties go to the article closest to `start`. The path is usually found after a small
+    fraction of the fetches of find_path, but is not always the shortest one.
+
+    Arguments:
+      start (str): wikipedia article URL to start from
+      finish (str): wikipedia article URL to stop at
+      max_workers (int): number of pages fetched at the same time
+      bloom_capacity (int, optional): see find_path
+      cache (LinkCache, optional): see find_path
+
+    Returns:
+      urls (list[str]): the path from `start` to `finish`, see find_path
+    """
+    base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+    target = article_title(finish)
+    nodes = NodeTable(bloom_capacity)
+    nodes.add(article_title(start))
+    found = nodes.id(target)
 
+    if found is None:
         try:
-            # Fetch the content of the current URL, and parse with BeautifulSoup
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # Iterate over all 'a' tags (links) in the HTML content
-            for link in soup.find_all('a'):
-                href = link.get('href')
-                # If this link is a relative link to another Wikipedia article, follow it
-                if href and href.startswith('/wiki/') and ':' not in href:
-                    next_url = 'https://en.wikipedia.org' + href
-                    # If this URL has not been visited yet, add it to the queue and mark it as visited
-                    if next_url not in visited:
-                        visited[next_url] = url
-                        queue.append(next_url)
+            weights = finish_profile(finish)
         except Exception as e:
             print(f"Error: {e}")
-    # If visited all reachable URLs without finding the finish URL, return empty list
-    return []
+            weights = {word: 1.0 for word in title_words(target)}
+
+    # Articles to fetch, as (-score, depth, node), so the best scoring ones come out first
+    frontier = [(0.0, 0, 0)]
+    while frontier and found is None:
+        batch = [heapq.heappop(frontier) for _ in range(min(max(max_workers, 1), len(frontier)))]
+        urls = (start if node == 0 else article_url(nodes.title(node), base_url) for _, _, node in batch)
+        for (_, depth, node), (_, links) in zip(batch, iter_links(urls, max_workers, cache)):
+            for next_url in links:
+                title = article_title(next_url)
+                next_node = nodes.add(title, node)
+                if next_node is None:
+                    continue
+                if title == target:
+                    found = next_node
+                    break
+                heapq.heappush(frontier, (-similarity(title, weights), depth + 1, next_node))
+            if found is not None:
+                break
+
+    if found is None:
+        return []
+
+    # Follow the parents from finish back to start
+    path = [article_url(title, base_url) for title in nodes.path(found)]
+    path[0], path[-1] = start, finish
+    return path
+
+
+def find_path_offline(start: str, finish: str, graph: LinkGraph | str | Path) -> list[str]:
+    """Find the shortest path from `start` to `finish` in an offline link graph, without any request
+
+    Arguments:
+      start (str): wikipedia article URL to start from
+      finish (str): wikipedia article URL to stop at
+      graph (LinkGraph | str | Path): the link graph, or the directory it was saved to
+
+    Returns:
+      urls (list[str]): the path from `start` to `finish`, see find_path
+    """
+    from wiki_graph import LinkGraph
+
+    if not isinstance(graph, LinkGraph):
+        graph = LinkGraph.load(graph)
+    if start == finish:
+        return [start]
+
+    base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+    titles = graph.shortest_path(article_title(start), article_title(finish))
+    if not titles:
+        return []
+    path = [article_url(title, base_url) for title in titles]
+    path[0], path[-1] = start, finish
+    return path
+
+
+def iter_links(
+    urls: Iterable[str], max_workers: int = 1, cache: LinkCache | None = None
+) -> Iterator[tuple[str, list[str]]]:
+    """Get the links of several articles, fetching up to `max_workers` pages at the same time
+
+    The pages are fetched over a sliding window ahead of the one being yielded,
+    but the results are yielded in the order of `urls`.
+    A page that could not be fetched is reported, and yielded with no links.
+
+    Arguments:
+      urls (Iterable[str]): URLs of the articles
+      max_workers (int): number of pages fetched at the same time
+      cache (LinkCache, optional): cache of the links of each page, see get_links
+
+    Yields:
+      (url, links) (tuple[str, list[str]]): each URL, with the result of get_links
+    """
+    def links_of(url: str) -> list[str]:
+        try:
+            return get_links(url, cache)
+        except Exception as e:
+            print(f"Error: {e}")
+            return []
+
+    if max_workers <= 1:
+        for url in urls:
+            yield url, links_of(url)
+        return
+
+    urls = iter(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Keep the workers busy with the pages after the one being processed
+        window = deque(
+            (url, executor.submit(links_of, url)) for url in islice(urls, 2 * max_workers)
+        )
+        try:
+            while window:
+                url, future = window.popleft()
+                for next_url in islice(urls, 1):
+                    window.append((next_url, executor.submit(links_of, next_url)))
+                yield url, future.result()
+        finally:
+            # Don't fetch the rest of the window if the caller stops early
+            for _, future in window:
+                future.cancel()
+
+
+def get_links(url: str, cache: LinkCache | None = None) -> list[str]:
+    """Get the articles a wiki article links to
+
+    Arguments:
+      url (str): URL of the article
+      cache (LinkCache, optional): cache of the links of each page, the page is only fetched
+        if its links are not cached, or are older than the cache ttl
+
+    Returns:
+      urls (list[str]): URLs of the linked articles on the same wiki, in order of appearance
+    """
+    if cache is not None:
+        links = cache.get(url)
+        if links is not None:
+            return links
+    # Fetch the content of the URL, and scan it for links to the articles of the same wiki
+    links = scan_article_links(get_html(url, raw=True), base_url=url)
+    if cache is not None:
+        cache.put(url, links)
+    return links
+
+
+def get_backlinks(titles: list[str], api_url: str) -> dict[str, list[str]]:
+    """Get the articles linking to each of `titles`, using the MediaWiki `linkshere` query
+
+    Arguments:
+      titles (list[str]): article titles, queried in batches of `api_batch_size`
+      api_url (str): URL of the MediaWiki API, e.g. https://en.wikipedia.org/w/api.php
+
+    Returns:
+      backlinks (dict[str, list[str]]): the titles of the articles linking to each title
+    """
+    backlinks = {title: [] for title in titles}
+    for i in range(0, len(titles), api_batch_size):
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "prop": "linkshere",
+            "lhprop": "title",
+            "lhnamespace": "0",
+            "lhlimit": "max",
+            "titles": "|".join(titles[i : i + api_batch_size]),
+        }
+        # Follow the continuation until all the backlinks of the batch are listed
+        while True:
+            response = json.loads(get_html(api_url, params=params, raw=True))
+            for page in response.get("query", {}).get("pages", []):
+                linking = backlinks.setdefault(page["title"], [])
+                linking.extend(link["title"] for link in page.get("linkshere", []))
+            if "continue" not in response:
+                break
+            params.update(response["continue"])
+    return backlinks
+
+
+def find_path_bidirectional(
+    start: str,
+    finish: str,
+    api_url: str,
+    max_workers: int = 1,
+    cache: LinkCache | None = None,
+) -> list[str]:
+    """Find the shortest path from `start` to `finish`, searching from both ends
+
+    The forward search follows the links of each page, the backward search the pages linking
+    to each page (fetched in batches from the MediaWiki API). Each step expands a whole level
+    of the smaller frontier, and the search stops as soon as the two searches meet.
+    That takes about 2*b^(d/2) page expansions instead of b^d for a path of length d.
+
+    Arguments:
+      start (str): wikipedia article URL to start from
+      finish (str): wikipedia article URL to stop at
+      api_url (str): URL of the MediaWiki API
+      max_workers (int): number of pages fetched at the same time in the forward search
+      cache (LinkCache, optional): see find_path
+
+    Returns:
+      urls (list[str]): the path from `start` to `finish`, see find_path
+    """
+    base_url = f"{urlparse(start).scheme}://{urlparse(start).netloc}"
+
+    def canonical(url: str) -> str:
+        # The same form for links read from pages and titles from the API
+        return article_url(article_title(url), base_url)
+
+    source, target = canonical(start), canonical(finish)
+    if source == target:
+        return [start]
+
+    # Parent towards `start` of every page found forwards,
+    # and next page towards `finish` of every page found backwards
+    parents: dict[str, str | None] = {source: None}
+    children: dict[str, str | None] = {target: None}
+    forward, backward = [source], [target]
+
+    meet = None
+    while forward and backward and meet is None:
+        next_level = []
+        if len(forward) <= len(backward):
+            # Expand the forward frontier by one level
+            for url, links in iter_links(forward, max_workers, cache):
+                for link in map(canonical, links):
+                    if link not in parents:
+                        parents[link] = url
+                        next_level.append(link)
+                        if link in children:
+                            meet = link
+                            break
+                if meet is not None:
+                    break
+            forward = next_level
+        else:
+            # Expand the backward frontier by one level
+            try:
+                backlinks = get_backlinks([article_title(url) for url in backward], api_url)
+            except Exception as e:
+                print(f"Error: {e}")
+                return []
+            for url in backward:
+                for title in backlinks.get(article_title(url), []):
+                    link = article_url(title, base_url)
+                    if link not in children:
+                        children[link] = url
+                        next_level.append(link)
+                        if link in parents:
+                            meet = link
+                            break
+                if meet is not None:
+                    break
+            backward = next_level
+
+    if meet is None:
+        return []
+
+    # Join the two halves of the path at the page where they met
+    path = []
+    url = meet
+    while url is not None:
+        path.append(url)
+        url = parents[url]
+    path.reverse()
+    url = children[meet]
+    while url is not None:
+        path.append(url)
+        url = children[url]
+    path[0], path[-1] = start, finish
+    return path
 
 
 if __name__ == "__main__":
     start = "https://en.wikipedia.org/wiki/Python_(programming_language)"
     finish = "https://en.wikipedia.org/wiki/Peace"
-    path = find_path(start, finish)
+    path = find_path(start, finish, bidirectional=True)
     assert path[0] == start
     assert path[-1] == finish
 
@@ -0,0 +1,483 @@
+"""
+Extracting wiki tables into pandas DataFrames
+
+Handles rowspan/colspan, header rows and numeric columns,
+with an lxml fast path and a BeautifulSoup fallback.
+"""
+from __future__ import annotations
+
+import codecs
+import re
+from collections import namedtuple
+from importlib.util import find_spec
+from typing import TYPE_CHECKING
+
+from document import Document
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# lxml is optional, tables are parsed with BeautifulSoup without it
+has_lxml = find_spec("lxml") is not None
+
+# One table cell, before rowspan/colspan expansion
+Cell = namedtuple("Cell", ["header", "text", "href", "rowspan", "colspan"])
+
+# A table reduced to its caption and rows of cells,
+# `head` being the number of rows inside <thead>
+RawTable = namedtuple("RawTable", ["caption", "rows", "head"])
+
+# Elements whose text is not part of the cell value: footnote references and hidden sort keys
+hidden_selector = 'sup.reference, [style*="display:none"], [style*="display: none"]'
+hidden_xpath = (
+    "//sup[contains(concat(' ', normalize-space(@class), ' '), ' reference ')]"
+    " | //*[contains(translate(@style, ' ', ''), 'display:none')]"
+)
+
+whitespace_pat = re.compile(r"\s+")
+# Values that stand for "nothing" in a numeric column
+empty_values = {"", "-", "–", "—"}
+# Footnote marks written after a number, e.g. '209‡' or '12[a]'
+number_mark_pat = r"(?:[*†‡§¶#]|\[[^\]]*\])+$"
+
+
+def _span(value) -> int:
+    """Parse a rowspan/colspan attribute, treating junk as 1"""
+    try:
+        return max(int(str(value).strip().rstrip(";")), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _clean(text: str) -> str:
+    return whitespace_pat.sub(" ", text).strip()
+
+
+def _match_attrs(get, attrs: dict[str, str] | None) -> bool:
+    """Check a table's attributes against `attrs`, comparing classes token by token"""
+    for key, value in (attrs or {}).items():
+        actual = get(key)
+        if actual is None:
+            return False
+        if key == "class":
+            tokens = actual.split() if isinstance(actual, str) else list(actual)
+            if value not in tokens:
+                return False
+        elif actual != value:
+            return False
+    return True
+
+
+def parse_tables(html: str | bytes, flavor: str, encoding: str = "utf-8") -> object:
+    """Parse an HTML page for reading its tables
+
+    The lxml tree comes without the hidden elements, the BeautifulSoup one keeps them
+    and they are skipped while reading the cells, so a Document can share its soup.
+
+    Arguments:
+        html (str | bytes): the html to parse, or the raw page (see get_html)
+        flavor (str): "lxml" or "bs4"
+        encoding (str): encoding of `html` when it is bytes
+    Returns:
+        tree (lxml.html.HtmlElement | bs4.BeautifulSoup): the parsed page
+    """
+    if flavor == "lxml":
+        import lxml.html
+
+        if isinstance(html, bytes):
+            # Without a declared encoding lxml guesses one, often wrongly.
+            # libxml2 doesn't know every Python alias, e.g. 'latin-1', pass the canonical name
+            parser = lxml.html.HTMLParser(encoding=codecs.lookup(encoding).name)
+            doc = lxml.html.fromstring(html, parser=parser)
+        else:
+            doc = lxml.html.fromstring(html)
+        for element in doc.xpath(hidden_xpath):
+            element.drop_tree()
+        return doc
+
+    from bs4 import BeautifulSoup
+
+    if isinstance(html, bytes):
+        # Declaring the encoding saves BeautifulSoup from detecting it over the whole page
+        soup = BeautifulSoup(html, "html.parser", from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(html, "html.parser")
+    return soup
+
+
+def _lxml_tables(doc, match, attrs) -> list[RawTable]:
+    """Find and read the tables with lxml (fast path)"""
+    found = []
+    for table in doc.iter("table"):
+        if not _match_attrs(table.get, attrs):
+            continue
+        if match is not None and not match.search(table.text_content()):
+            continue
+        found.append(table)
+    # Skip layout tables that merely contain a matching table
+    nested = {id(parent) for table in found for parent in table.iterancestors("table")}
+    found = [table for table in found if id(table) not in nested]
+
+    raw_tables = []
+    for table in found:
+        caption = table.find("caption")
+        rows = []
+        head = 0
+        for tr in table.xpath("./tr | ./thead/tr | ./tbody/tr | ./tfoot/tr"):
+            if tr.getparent().tag == "thead":
+                head += 1
+            cells = []
+            for td in tr.xpath("./th | ./td"):
+                text = _clean(td.text_content())
+                if not text:
+                    # Fall back to the alt text of icons, e.g. medal images in headers
+                    text = _clean(" ".join(td.xpath(".//img/@alt")))
+                hrefs = td.xpath(".//a/@href")
+                cells.append(
+                    Cell(
+                        td.tag == "th",
+                        text,
+                        hrefs[0] if hrefs else None,
+                        _span(td.get("rowspan")),
+                        _span(td.get("colspan")),
+                    )
+                )
+            rows.append(cells)
+        raw_tables.append(
+            RawTable(_clean(caption.text_content()) if caption is not None else None, rows, head)
+        )
+    return raw_tables
+
+
+def _visible_nodes(element, hidden: set[int]):
+    """The descendants of a BeautifulSoup element in order, without the hidden ones and their content"""
+    from bs4 import Tag
+
+    for child in element.children:
+        if isinstance(child, Tag):
+            if id(child) in hidden:
+                continue
+            yield child
+            yield from _visible_nodes(child, hidden)
+        else:
+            yield child
+
+
+def _visible_text(element, hidden: set[int]) -> str:
+    """The text of a BeautifulSoup element, as get_text, without the hidden elements"""
+    from bs4 import CData, NavigableString
+
+    if not hidden:
+        return element.get_text()
+    return "".join(node for node in _visible_nodes(element, hidden) if type(node) in (NavigableString, CData))
+
+
+def _bs4_tables(soup, match, attrs) -> list[RawTable]:
+    """Find and read the tables with BeautifulSoup, skipping the hidden elements"""
+    # The soup may be shared (see Document), the hidden elements are skipped, not removed
+    hidden = {id(element) for element in soup.select(hidden_selector)}
+    found = []
+    for table in soup.find_all("table"):
+        if not _match_attrs(table.get, attrs):
+            continue
+        if match is not None and not match.search(_visible_text(table, hidden)):
+            continue
+        found.append(table)
+    # Skip layout tables that merely contain a matching table
+    nested = {id(parent) for table in found for parent in table.find_parents("table")}
+    found = [table for table in found if id(table) not in nested]
+
+    raw_tables = []
+    for table in found:
+        caption = table.find("caption")
+        if caption is not None and caption.find_parent("table") is not table:
+            caption = None
+        rows = []
+        head = 0
+        for tr in table.find_all("tr"):
+            # Rows of nested tables belong to those tables
+            if tr.find_parent("table") is not table:
+                continue
+            if tr.parent.name == "thead":
+                head += 1
+            cells = []
+            for td in tr.find_all(["th", "td"], recursive=False):
+                text = _clean(_visible_text(td, hidden))
+                tags = [node for node in _visible_nodes(td, hidden) if node.name is not None]
+                if not text:
+                    # Fall back to the alt text of icons, e.g. medal images in headers
+                    text = _clean(" ".join(tag.get("alt", "") for tag in tags if tag.name == "img"))
+                link = next((tag for tag in tags if tag.name == "a" and tag.has_attr("href")), None)
+                cells.append(
+                    Cell(
+                        td.name == "th",
+                        text,
+                        link["href"] if link else None,
+                        _span(td.get("rowspan")),
+                        _span(td.get("colspan")),
+                    )
+                )
+            rows.append(cells)
+        raw_tables.append(
+            RawTable(_clean(caption.get_text()) if caption is not None else None, rows, head)
+        )
+    return raw_tables
+
+
+def expand_spans(rows: list[list[Cell]]) -> list[list[Cell | None]]:
+    """Lay the cells out on a rectangular grid, repeating each cell over its rowspan and colspan
+
+    Arguments:
+        rows (list[list[Cell]]): the cells of each table row
+    Returns:
+        grid (list[list[Cell | None]]): one list per row, all of the same length,
+            with None where the table has no cell
+    """
+    grid = []
+    # column -> (rows left, cell) for cells spanning down from earlier rows
+    pending: dict[int, tuple[int, Cell]] = {}
+    for cells in rows:
+        row: list[Cell | None] = []
+        i = 0
+        while i < len(cells) or any(col >= len(row) for col in pending):
+            col = len(row)
+            if col in pending:
+                # A cell from a row above occupies this column
+                left, cell = pending.pop(col)
+                row.append(cell)
+                if left > 1:
+                    pending[col] = (left - 1, cell)
+            elif i < len(cells):
+                cell = cells[i]
+                i += 1
+                for col in range(col, col + cell.colspan):
+                    row.append(cell)
+                    if cell.rowspan > 1:
+                        pending[col] = (cell.rowspan - 1, cell)
+            else:
+                # A gap before a cell spanning down from above
+                row.append(None)
+        grid.append(row)
+
+    width = max((len(row) for row in grid), default=0)
+    for row in grid:
+        row.extend([None] * (width - len(row)))
+    return grid
+
+
+def parse_numbers(column: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Read the number in each cell text of a column, like 1234 for '1,234' or '1,234‡'
+
+    Thousands separators, spaces and footnote marks after the number are ignored.
+
+    Arguments:
+        column (pd.Series): column of strings
+    Returns:
+        numbers (pd.Series): the number of each cell, NA for the empty cells and the cells
+            that are not a number
+        present (pd.Series): whether each cell is not empty, see empty_values
+    """
+    import pandas as pd
+
+    cleaned = (
+        column.astype("string")
+        .str.replace(r"[,\s  ]", "", regex=True)
+        .str.replace(number_mark_pat, "", regex=True)
+        .str.replace("−", "-", regex=False)
+    )
+    cleaned = cleaned.mask(cleaned.isin(empty_values) | cleaned.isna())
+    return pd.to_numeric(cleaned, errors="coerce"), cleaned.notna()
+
+
+def coerce_numeric(column: pd.Series) -> pd.Series:
+    """Convert a column of cell texts like '1,234' to integers (or floats), if every value is a number
+
+    Arguments:
+        column (pd.Series): column of strings
+    Returns:
+        column (pd.Series): an Int64 or Float64 column with NA for empty cells,
+            or the column unchanged if it has non-numeric values
+    """
+    numbers, present = parse_numbers(column)
+    if not present.any() or numbers[present].isna().any():
+        return column
+    if (numbers[present] % 1 == 0).all():
+        return numbers.astype("Int64")
+    return numbers.astype("Float64")
+
+
+def _column_names(header: list[list[Cell | None]], width: int) -> list[str]:
+    """Join the header rows of each column into one name per column, like 'Summer Olympic Games Gold'"""
+    if not header:
+        return [str(i) for i in range(width)]
+    names = []
+    for j in range(width):
+        labels: list[str] = []
+        for row in header:
+            cell = row[j]
+            if cell is not None and cell.text and (not labels or labels[-1] != cell.text):
+                labels.append(cell.text)
+        names.append(" ".join(labels) or str(j))
+
+    # Disambiguate repeated names the way pandas does
+    seen: dict[str, int] = {}
+    for j, name in enumerate(names):
+        if name in seen:
+            seen[name] += 1
+            names[j] = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+    return names
+
+
+def table_to_df(table: RawTable, links: bool = False, numeric: bool = True) -> pd.DataFrame:
+    """Turn a table read by `find_tables` into a typed DataFrame
+
+    Leading rows made only of <th> cells (or inside <thead>) are the header.
+    A header row that is a single cell across the whole table is taken as the table title,
+    and is stored with the caption in `df.attrs["caption"]`.
+
+    Arguments:
+        table (RawTable): the table
+        links (bool): add a '<column> link' column with the first link href of each cell,
+            for every column that has links
+        numeric (bool): convert numeric columns to Int64/Float64
+    Returns:
+        df (pd.DataFrame): the table, text columns having the "string" dtype
+    """
+    import pandas as pd
+
+    grid = expand_spans(table.rows)
+    width = len(grid[0]) if grid else 0
+
+    # Header rows: the <thead>, or else the leading rows of <th> cells
+    n_header = table.head
+    if not n_header:
+        while n_header < len(grid) and all(
+            cell is None or cell.header for cell in grid[n_header]
+        ):
+            n_header += 1
+    header, body = grid[:n_header], grid[n_header:]
+    if n_header == len(grid) and grid:
+        # Only <th> cells: take the first row as header and the rest as data
+        header, body = grid[:1], grid[1:]
+
+    captions = [table.caption] if table.caption else []
+    while len(header) > 1 and width > 1 and all(cell is header[0][0] for cell in header[0]):
+        captions.append(header[0][0].text)
+        header = header[1:]
+
+    names = _column_names(header, width)
+    data = {}
+    for j, name in enumerate(names):
+        data[name] = pd.Series(
+            [row[j].text if row[j] is not None else None for row in body], dtype="string"
+        )
+        if numeric:
+            data[name] = coerce_numeric(data[name])
+        if links:
+            hrefs = [row[j].href if row[j] is not None else None for row in body]
+            if any(hrefs):
+                data[f"{name} link"] = pd.Series(hrefs, dtype="string")
+
+    df = pd.DataFrame(data)
+    df.attrs["caption"] = " ".join(captions) or None
+    return df
+
+
+def find_tables(
+    html: str | bytes | Document,
+    match: str | re.Pattern | None = None,
+    attrs: dict[str, str] | None = None,
+    flavor: str | None = None,
+    encoding: str = "utf-8",
+) -> list[RawTable]:
+    """Find the tables in an HTML page and read their cells
+
+    Arguments:
+        html (str | bytes | Document): the html to parse, the raw page (see get_html), or a
+            Document, parsed once however many times its tables are read
+        match (str | re.Pattern, optional): only tables whose text matches this regular expression
+            (case-insensitively). A table only containing a matching table is skipped in favour of it.
+        attrs (dict, optional): only tables with these attributes, e.g. {"class": "wikitable"}
+        flavor (str, optional): "lxml" or "bs4", by default lxml when it is installed, and bs4 for
+            a Document, whose soup is read so the page isn't parsed again
+        encoding (str): encoding of `html` when it is bytes
+    Returns:
+        tables (list[RawTable]): the matching tables, in document order
+    """
+    if flavor is None:
+        flavor = "bs4" if isinstance(html, Document) or not has_lxml else "lxml"
+    if flavor not in {"lxml", "bs4"}:
+        raise ValueError(f"{flavor} is an invalid flavor, must be 'lxml' or 'bs4'")
+    if flavor == "lxml" and not has_lxml:
+        raise ImportError("lxml is required for flavor='lxml'")
+    if isinstance(match, str):
+        match = re.compile(match, re.IGNORECASE)
+
+    if isinstance(html, Document):
+        tree = html.table_tree(flavor)
+    else:
+        tree = parse_tables(html, flavor, encoding)
+    read = _lxml_tables if flavor == "lxml" else _bs4_tables
+    return read(tree, match, attrs)
+
+
+def read_wikitables(
+    html: str | bytes | Document,
+    match: str | re.Pattern | None = None,
+    attrs: dict[str, str] | None = None,
+    links: bool = False,
+    flavor: str | None = None,
+    encoding: str = "utf-8",
+) -> list[pd.DataFrame]:
+    """Read all matching tables of an HTML page into DataFrames
+
+    See `find_tables` for the arguments, and `table_to_df` for `links` and the table layout.
+
+    Returns:
+        dfs (list[pd.DataFrame]): one DataFrame per matching table
+    """
+    return [
+        table_to_df(table, links=links)
+        for table in find_tables(html, match, attrs, flavor, encoding)
+    ]
+
+
+def read_wikitable(
+    html: str | bytes | Document,
+    match: str | re.Pattern | None = None,
+    attrs: dict[str, str] | None = None,
+    links: bool = False,
+    flavor: str | None = None,
+    encoding: str = "utf-8",
+) -> pd.DataFrame:
+    """Read the first matching table of an HTML page into a DataFrame
+
+    See `find_tables` for the arguments, and `table_to_df` for `links` and the table layout.
+
+    Returns:
+        df (pd.DataFrame): the first matching table
+    Raises:
+        ValueError: if no table matches
+    """
+    tables = find_tables(html, match, attrs, flavor, encoding)
+    if not tables:
+        raise ValueError(f"No table found matching match={match!r}, attrs={attrs!r}")
+    return table_to_df(tables[0], links=links)
+
+
+def find_column(df: pd.DataFrame, *words: str) -> str | None:
+    """Find the first column whose name contains all of `words`, ignoring case
+
+    Arguments:
+        df (pd.DataFrame): the table
+        words (str): words the column name must contain, e.g. "summer", "gold"
+    Returns:
+        name (str | None): the column name, or None if no column matches
+    """
+    for name in df.columns:
+        lower = str(name).lower()
+        if not lower.endswith(" link") and all(word.lower() in lower for word in words):
+            return name
+    return None